@@ -0,0 +1,184 @@
+"""Per-prophet availability calendar for mock booking generation.
+
+Each prophet day is a bitmap of 15-minute slots between DAY_START_HOUR and
+DAY_END_HOUR, one bit per ``prophet_availability`` row. Booking a course
+clears the consecutive slots it covers, so bookings handed out by the calendar
+never overlap and always fall inside the prophet's availability.
+"""
+import random
+from bisect import bisect_left, insort
+from datetime import time
+
+SLOT_MINUTES = 15
+DAY_START_HOUR = 7
+DAY_END_HOUR = 23
+SLOTS_PER_DAY = (DAY_END_HOUR - DAY_START_HOUR) * 60 // SLOT_MINUTES
+
+def slot_count(duration_min):
+    """Number of 15-minute slots a booking of duration_min occupies"""
+    return -(-int(duration_min) // SLOT_MINUTES)
+
+def slot_time(slot):
+    """Start time of a slot index within the day"""
+    minutes = DAY_START_HOUR * 60 + slot * SLOT_MINUTES
+    return time(minutes // 60, minutes % 60)
+
+def window_starts(bitmap, length):
+    """Bitmap of slots where `length` consecutive free slots begin"""
+    starts = bitmap
+    for shift in range(1, length):
+        starts &= bitmap >> shift
+    return starts
+
+def nth_set_bit(bitmap, n):
+    """Index of the n-th (0-based) set bit, counting from the lowest"""
+    for _ in range(n):
+        bitmap &= bitmap - 1
+    return (bitmap & -bitmap).bit_length() - 1
+
+def nearest_set_bit(bitmap, index):
+    """Index of the set bit closest to `index` (the later one on a tie); bitmap must not be 0"""
+    later = bitmap >> index
+    after = index + nth_set_bit(later, 0) if later else None
+    before = (bitmap & ((1 << index) - 1)).bit_length() - 1
+    if after is None or (before >= 0 and index - before < after - index):
+        return before
+    return after
+
+class _DaySet:
+    """Set of day offsets with O(1) add, discard and random choice.
+
+    The first choice_from builds a sorted copy of the days, kept up to date
+    from then on, so sets only ever drawn from as a whole never pay for it.
+    """
+
+    __slots__ = ("items", "positions", "ordered")
+
+    def __init__(self):
+        self.items = []
+        self.positions = {}
+        self.ordered = None
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, day):
+        if day not in self.positions:
+            self.positions[day] = len(self.items)
+            self.items.append(day)
+            if self.ordered is not None:
+                insort(self.ordered, day)
+
+    def discard(self, day):
+        position = self.positions.pop(day, None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last
+            self.positions[last] = position
+        if self.ordered is not None:
+            del self.ordered[bisect_left(self.ordered, day)]
+
+    def choice(self, rng):
+        return self.items[rng.randrange(len(self.items))]
+
+    def choice_from(self, first_day, rng):
+        """A uniformly drawn day from first_day on, or None if there is none"""
+        if self.ordered is None:
+            self.ordered = sorted(self.items)
+        start = bisect_left(self.ordered, first_day)
+        if start == len(self.ordered):
+            return None
+        return self.ordered[start + rng.randrange(len(self.ordered) - start)]
+
+class AvailabilityCalendar:
+    """Index of free availability slots per prophet and day.
+
+    ``durations`` lists every course duration (in minutes) that will be
+    booked. For each of them the calendar keeps the set of days that still
+    have a long enough free window, so ``book`` finds a slot without scanning
+    or retrying.
+
+    Start slots are uniform within the chosen day unless ``hours`` is given:
+    a popularity.HourProfile whose busy slots bookings start as close to as
+    possible.
+    """
+
+    def __init__(self, durations, rng=random, hours=None):
+        self.lengths = sorted({slot_count(d) for d in durations})
+        self.rng = rng
+        self.hours = hours
+        self._free = {}  # prophet_id -> {day: bitmap of free slots}
+        self._fits = {}  # prophet_id -> {length: _DaySet of days with a free window}
+
+    def open(self, prophet_id, day, start_slot, length):
+        """Mark `length` slots from start_slot on `day` as available"""
+        if prophet_id not in self._free:
+            self._free[prophet_id] = {}
+            self._fits[prophet_id] = {n: _DaySet() for n in self.lengths}
+        days = self._free[prophet_id]
+        bitmap = days.get(day, 0) | (((1 << length) - 1) << start_slot)
+        days[day] = bitmap
+        for n, fitting_days in self._fits[prophet_id].items():
+            if window_starts(bitmap, n):
+                fitting_days.add(day)
+
+    def __getstate__(self):
+        # The random module cannot be pickled; an unpickled calendar draws
+        # from the random module of the process it lands in
+        state = self.__dict__.copy()
+        state["rng"] = None if self.rng is random else self.rng
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.rng is None:
+            self.rng = random
+
+    def free_slots(self, prophet_id, day):
+        """Bitmap of the slots still free for a prophet on a day"""
+        return self._free.get(prophet_id, {}).get(day, 0)
+
+    def book(self, prophet_id, duration_min, first_day=None):
+        """Reserve a free window for a booking, returning (day, start_slot) or None when the prophet is full.
+
+        With first_day the day is drawn among the fitting days from first_day
+        on, and None is returned only when there are none.
+        """
+        length = slot_count(duration_min)
+        fits = self._fits.get(prophet_id)
+        if not fits or not fits[length]:
+            return None
+
+        if first_day is None:
+            day = fits[length].choice(self.rng)
+        else:
+            day = fits[length].choice_from(first_day, self.rng)
+            if day is None:
+                return None
+        days = self._free[prophet_id]
+        starts = window_starts(days[day], length)
+        if self.hours is None:
+            start_slot = nth_set_bit(starts, self.rng.randrange(starts.bit_count()))
+        else:
+            start_slot = nearest_set_bit(starts, self.hours.booking_slot(self.rng))
+
+        self._take(prophet_id, day, start_slot, length)
+        return day, start_slot
+
+    def reserve(self, prophet_id, day, start_slot, length):
+        """Mark `length` slots from start_slot on `day` as taken by a booking made elsewhere"""
+        if self.free_slots(prophet_id, day):
+            self._take(prophet_id, day, start_slot, length)
+
+    def _take(self, prophet_id, day, start_slot, length):
+        days = self._free[prophet_id]
+        bitmap = days[day] & ~(((1 << length) - 1) << start_slot)
+        if bitmap:
+            days[day] = bitmap
+        else:
+            del days[day]
+        for n, fitting_days in self._fits[prophet_id].items():
+            if not window_starts(bitmap, n):
+                fitting_days.discard(day)
@@ -0,0 +1,244 @@
+"""Benchmark suite for the mock data generator.
+
+Times every ``generate_*`` function of mock.py on its own (``generate``) and
+streamed through ``save_csv`` (``save_csv``), plus whole ``generate_dataset``
+runs per engine, at several scales. Each case runs in a fresh process so its
+peak RSS is its own. Results are written as JSON and can be compared against
+a stored baseline:
+
+    python3 benchmark.py --scales small medium --output results.json
+    python3 benchmark.py --update-baseline            # store a baseline
+    python3 benchmark.py                              # compare, exit 1 on regression
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import cached_property
+
+import mock
+from availability import AvailabilityCalendar
+from ids import IdEngine
+from metrics import peak_rss_mb
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+
+SCALES = {
+    "small": {**mock.DEFAULT_SCALE, "customers": 1_000, "prophets": 50},
+    "medium": {**mock.DEFAULT_SCALE, "customers": 20_000, "prophets": 1_000},
+    "large": {**mock.DEFAULT_SCALE, "customers": 100_000, "prophets": 5_000},
+}
+MODES = ["generate", "save_csv"]
+ENGINE_MODES = [f"dataset-{engine}" for engine in mock.ENGINES]
+
+# Cases faster than this are too noisy to flag for throughput
+MIN_COMPARED_SECONDS = 0.1
+
+# Fixed clock so every run generates the same rows
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+class Fixtures:
+    """Parent keys a generator needs, built on first use and outside the timed section"""
+
+    def __init__(self, scale):
+        self.scale = scale
+
+    @cached_property
+    def account_ids(self):
+        account_ids = defaultdict(list)
+        for account in mock.generate_accounts(mock.account_ranges(self.scale)):
+            account_ids[account["role"]].append(account["id"])
+        return account_ids
+
+    @cached_property
+    def customer_ids(self):
+        return [c["id"] for c in mock.generate_customers(self.account_ids["CUSTOMER"])]
+
+    @cached_property
+    def prophet_ids(self):
+        return [p["id"] for p in mock.generate_prophets(self.account_ids["PROPHET"])]
+
+    @cached_property
+    def horoscope_methods(self):
+        return mock.generate_horoscope_methods()
+
+    @cached_property
+    def courses(self):
+        return [c for c in mock.generate_courses(self.prophet_ids, self.horoscope_methods) if c["is_active"]]
+
+    @cached_property
+    def active_courses(self):
+        return [(c["id"], c["prophet_id"], c["duration_min"]) for c in self.courses]
+
+    @cached_property
+    def course_prices(self):
+        return {c["id"]: c["price"] for c in self.courses}
+
+    def calendar(self, filled=True):
+        calendar = AvailabilityCalendar(mock.COURSE_DURATIONS)
+        if filled:
+            for _ in mock.generate_prophet_availabilities(self.prophet_ids, calendar, self.scale["availability_days"]):
+                pass
+        return calendar
+
+    @cached_property
+    def bookings(self):
+        return list(mock.generate_bookings(self.customer_ids, self.active_courses, self.calendar(), self.scale))
+
+# Table -> function of the fixtures returning the row generator to time. The
+# arguments are evaluated before timing starts, the generator body after.
+TABLES = {
+    "accounts": lambda f: mock.generate_accounts(mock.account_ranges(f.scale)),
+    "user_details": lambda f: mock.generate_user_details(
+        f.account_ids["CUSTOMER"] + f.account_ids["PROPHET"] + f.account_ids["ADMIN"]),
+    "customers": lambda f: mock.generate_customers(f.account_ids["CUSTOMER"]),
+    "prophets": lambda f: mock.generate_prophets(f.account_ids["PROPHET"]),
+    "prophet_methods": lambda f: mock.generate_prophet_methods(f.prophet_ids, f.horoscope_methods),
+    "prophet_availabilities": lambda f: mock.generate_prophet_availabilities(
+        f.prophet_ids, f.calendar(filled=False), f.scale["availability_days"]),
+    "courses": lambda f: mock.generate_courses(f.prophet_ids, f.horoscope_methods),
+    "bookings": lambda f: mock.generate_bookings(f.customer_ids, f.active_courses, f.calendar(), f.scale),
+    "transactions": lambda f: mock.generate_transactions(f.bookings, f.course_prices),
+    "transaction_accounts": lambda f: mock.generate_transaction_accounts(f.prophet_ids),
+    "reviews": lambda f: mock.generate_reviews(f.bookings),
+    "reports": lambda f: mock.generate_reports(f.customer_ids, f.account_ids["ADMIN"]),
+}
+
+def run_case(scale_name, table, mode, seed):
+    """Run one benchmark case; meant to be the only work of a fresh process"""
+    scale = SCALES[scale_name]
+    random.seed(seed)
+    mock.ids = IdEngine(seed)
+    mock.now = NOW
+
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        mock.output_dir = directory
+        if mode.startswith("dataset-"):
+            mock.engine = mode.removeprefix("dataset-")
+        else:
+            rows = TABLES[table](Fixtures(scale))
+
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        if mode.startswith("dataset-"):
+            count = sum(mock.generate_dataset(scale, seed=seed)[0].values())
+        elif mode == "save_csv":
+            count = mock.save_csv(table, rows)[table]
+        else:
+            count = sum(1 for _ in rows)
+        wall = time.perf_counter() - start
+        rss_after = peak_rss_mb()
+
+    return {
+        "scale": scale_name,
+        "table": table,
+        "mode": mode,
+        "rows": count,
+        "wall_s": round(wall, 4),
+        "rows_per_s": round(count / wall, 1) if wall else None,
+        "peak_rss_mb": round(rss_after, 1),
+        "rss_growth_mb": round(rss_after - rss_before, 1),
+    }
+
+def run_isolated(case):
+    # A new spawned process per case keeps peak RSS from leaking between cases
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_case, *case).result()
+
+def run_suite(scales, tables, modes, seed, repeat):
+    results = []
+    for scale_name in scales:
+        cases = [(scale_name, table, mode, seed) for mode in modes if mode in MODES for table in tables]
+        cases += [(scale_name, "all", mode, seed) for mode in modes if mode in ENGINE_MODES]
+        for case in cases:
+            # Best of `repeat` runs by wall time
+            result = min((run_isolated(case) for _ in range(repeat)), key=lambda r: r["wall_s"])
+            print(f"{result['scale']:>6} {result['mode']:<14} {result['table']:<22} {result['rows']:>9} rows "
+                  f"{result['wall_s']:>8.3f}s {result['rows_per_s'] or 0:>12,.0f} rows/s "
+                  f"peak {result['peak_rss_mb']:>7.1f} MB (+{result['rss_growth_mb']:.1f})")
+            results.append(result)
+    return results
+
+def compare(results, baseline, tolerance):
+    """Regressions against baseline results: rows/sec down or peak RSS up by more than `tolerance`"""
+    previous = {(r["scale"], r["table"], r["mode"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get((result["scale"], result["table"], result["mode"]))
+        if old is None:
+            continue
+        name = f"{result['scale']} {result['mode']} {result['table']}"
+        comparable = max(result["wall_s"], old["wall_s"]) >= MIN_COMPARED_SECONDS
+        if comparable and old["rows_per_s"] and result["rows_per_s"] < old["rows_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['rows_per_s']:,.0f} rows/s vs {old['rows_per_s']:,.0f} in baseline")
+        if result["peak_rss_mb"] > old["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{name}: peak RSS {result['peak_rss_mb']:.1f} MB vs {old['peak_rss_mb']:.1f} MB in baseline")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the mock data generators")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["small", "medium"])
+    parser.add_argument("--tables", nargs="+", choices=list(TABLES), default=list(TABLES))
+    parser.add_argument("--modes", nargs="+", choices=MODES + ENGINE_MODES, default=MODES + ENGINE_MODES,
+                        help="generate / save_csv time single tables; dataset-<engine> times generate_dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case, the fastest one is kept")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative drop in rows/sec or rise in peak RSS before a case counts as a regression")
+    args = parser.parse_args(argv)
+    if "dataset-numpy" in args.modes and importlib.util.find_spec("numpy") is None:
+        args.modes.remove("dataset-numpy")
+        print("Skipping dataset-numpy: numpy is not installed")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "results": run_suite(args.scales, args.tables, args.modes, args.seed, args.repeat),
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to store one")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(report["results"], json.load(f), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""Local cache of generated datasets, addressed by what they were generated from.
+
+A seeded run's output depends only on its options (seed, clock, table
+sizes, format, engine, ...), on prisma/schema.prisma and on the generator
+code, so the SHA-256 of those is the key of a dataset. After a run the
+chunk files listed in its manifest are copied into ``<cache>/<key>/``; a
+later run with the same key copies them back into its output directory
+instead of generating anything.
+
+Cached files are read-only. With the ``hardlink`` link mode they are
+hard-linked both ways instead, which saves the copies but makes the output
+directory, the cache entry and the dataset it was stored from the same
+files: they become read-only as well, and a file edited in place anyway
+(after a chmod) changes all of them and fails the entry's check on its next
+use. ``symlink`` points the output at the cached files. The generator itself
+never writes into an existing file, it replaces it.
+
+Before an entry is reused its files are checked against the size,
+modification time and inode recorded when they were stored, which costs a
+stat per file; with ``verify`` their SHA-256 is checked as well, which reads
+the whole dataset. An entry that fails the check is dropped and
+regenerated. Entries are evicted least recently used first once the cache
+holds more than its size limit. Small files that get rewritten in place
+(manifest.json, load.sql, oracle.json) are copied rather than linked.
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from prisma_schema import SCHEMA_PATH
+from writers import MANIFEST
+
+DEFAULT_MAX_GB = 10.0
+ENTRY = "entry.json"
+LINK_MODES = ["copy", "hardlink", "symlink"]
+# Output files that are not chunks but part of the dataset
+EXTRA_FILES = ["load.sql", "oracle.json"]
+HASH_READ_BYTES = 1 << 20
+READ_ONLY = 0o444
+
+# Source files whose changes change the generated data
+GENERATOR_SOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py")
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while data := f.read(HASH_READ_BYTES):
+            digest.update(data)
+    return digest.hexdigest()
+
+def dataset_key(params):
+    """Key of the dataset generated with `params` from the current schema and generator code"""
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode())
+    digest.update(file_sha256(SCHEMA_PATH).encode())
+    for path in sorted(glob.glob(GENERATOR_SOURCES)):
+        digest.update(os.path.basename(path).encode())
+        digest.update(file_sha256(path).encode())
+    return digest.hexdigest()
+
+def _replace(path):
+    """Make way for a new file at `path`, unlinking rather than truncating whatever is there"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.lexists(path):
+        os.unlink(path)
+
+def _hardlink(source, target):
+    """Hard-link target to source; False on another file system or where links are not supported"""
+    try:
+        os.link(source, target)
+        return True
+    except OSError:
+        return False
+
+def _link(source, target, mode):
+    """Put `source` at `target` as a copy, or a link to the same data for the link modes"""
+    _replace(target)
+    if mode == "copy":
+        shutil.copyfile(source, target)
+        return
+    if mode == "hardlink" and _hardlink(source, target):
+        return
+    os.symlink(os.path.abspath(source), target)
+
+class DatasetCache:
+    """Datasets under `root` by key, evicted LRU beyond `max_bytes`"""
+
+    def __init__(self, root, max_bytes=int(DEFAULT_MAX_GB * 1024 ** 3)):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def _entry(self, key):
+        try:
+            with open(os.path.join(self.path(key), ENTRY), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _verify(self, key, entry, full=False):
+        """Name of the first file of an entry that is missing or changed, or None when all are intact.
+
+        Files are hashed only when `full` is set or the entry predates the
+        recorded modification times.
+        """
+        for file in entry["files"]:
+            path = os.path.join(self.path(key), file["path"])
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return file["path"]
+            if stat.st_size != file["bytes"]:
+                return file["path"]
+            if "mtime_ns" in file and (stat.st_mtime_ns, stat.st_ino) != (file["mtime_ns"], file["inode"]):
+                return file["path"]
+            if (full or "mtime_ns" not in file) and file_sha256(path) != file["sha256"]:
+                return file["path"]
+        return None
+
+    def restore(self, key, directory, link="copy", verify=False):
+        """Put the cached dataset `key` into `directory`; False when there is no intact entry"""
+        entry = self._entry(key)
+        if entry is None:
+            return False
+        broken = self._verify(key, entry, verify)
+        if broken is not None:
+            print(f"Warning: Cached dataset {key[:12]} failed its integrity check at {broken}; regenerating")
+            shutil.rmtree(self.path(key), ignore_errors=True)
+            return False
+        for file in entry["files"]:
+            source = os.path.join(self.path(key), file["path"])
+            target = os.path.join(directory, file["path"])
+            if file["linked"]:
+                _link(source, target, link)
+            else:
+                _replace(target)
+                shutil.copyfile(source, target)
+        # The entry's modification time is its last use
+        os.utime(os.path.join(self.path(key), ENTRY))
+        return True
+
+    def store(self, key, directory, params, link="copy"):
+        """Add the dataset in `directory`, as listed by its manifest, to the cache.
+
+        Chunks are copied, or hard-linked with link="hardlink" where the file
+        system allows it; either way the cached files are made read-only.
+        """
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        chunks = [chunk for table in manifest["tables"].values() for chunk in table["chunks"]]
+        extras = [name for name in EXTRA_FILES if os.path.isfile(os.path.join(directory, name))]
+
+        os.makedirs(self.root, exist_ok=True)
+        staging = os.path.join(self.root, f".{key}.{os.getpid()}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        files = []
+        for chunk in chunks:
+            source = os.path.join(directory, chunk["path"])
+            target = os.path.join(staging, chunk["path"])
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if not (link == "hardlink" and _hardlink(source, target)):
+                shutil.copyfile(source, target)
+            files.append({"path": chunk["path"], "bytes": chunk["bytes"], "sha256": chunk["sha256"], "linked": True})
+        for name in [MANIFEST, *extras]:
+            shutil.copyfile(os.path.join(directory, name), os.path.join(staging, name))
+            files.append({"path": name, "bytes": os.path.getsize(os.path.join(staging, name)),
+                          "sha256": file_sha256(os.path.join(staging, name)), "linked": False})
+        for file in files:
+            os.chmod(os.path.join(staging, file["path"]), READ_ONLY)
+            stat = os.stat(os.path.join(staging, file["path"]))
+            file.update(mtime_ns=stat.st_mtime_ns, inode=stat.st_ino)
+        with open(os.path.join(staging, ENTRY), "w", encoding="utf-8") as f:
+            json.dump({"key": key, "params": params, "stored_at": time.time(),
+                       "bytes": sum(file["bytes"] for file in files), "files": files}, f, indent=2)
+            f.write("\n")
+        try:
+            os.rename(staging, self.path(key))
+        except OSError:
+            # A concurrent run stored the same dataset first
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict(keep=key)
+
+    def entries(self):
+        """(last used, bytes, key) of every entry, least recently used first"""
+        found = []
+        for key in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            entry = self._entry(key)
+            if entry is not None:
+                found.append((os.path.getmtime(os.path.join(self.path(key), ENTRY)), entry["bytes"], key))
+        return sorted(found)
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the cache fits max_bytes; `keep` is never removed"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self.path(key), ignore_errors=True)
+            total -= size
+            print(f"Evicted cached dataset {key[:12]} ({size / (1024 * 1024):.1f} MB)")
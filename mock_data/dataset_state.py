@@ -0,0 +1,174 @@
+"""Read back the state of a generated CSV dataset for incremental runs.
+
+Only what is needed to keep appending to a dataset is kept: IDs as 64-bit
+integer keys in arrays instead of strings, the active courses, the SCHEDULED
+bookings that may still change status (as sorted key columns, about 40 bytes
+a booking), and the last day with availability.
+Every table is streamed chunk by chunk through the dataset's manifest.json,
+including the chunks of earlier increments.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from itertools import compress
+from datetime import date, datetime, timezone
+
+from writers import MANIFEST
+
+DatasetState = namedtuple("DatasetState", "manifest customer_ids prophet_ids active_courses course_prices scheduled_bookings last_available_date")
+
+def key(hex_id):
+    """Compact integer key of a 16-hex-char ID"""
+    return int(hex_id, 16)
+
+def hex_id(key):
+    return f"{key:016x}"
+
+class HexIds:
+    """Read-only sequence of hex IDs backed by an array of integer keys"""
+
+    def __init__(self, keys):
+        self.keys = keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, index):
+        return hex_id(self.keys[index])
+
+    def __iter__(self):
+        return map(hex_id, self.keys)
+
+class ScheduledBookings:
+    """Booking key -> (customer key, end timestamp, prophet key, course key) of SCHEDULED bookings.
+
+    Kept as five parallel arrays sorted by booking key and looked up by
+    bisection, so a booking costs 40 bytes instead of a dict entry and tuple.
+    Fill with append() and call finish() before looking anything up.
+    """
+
+    def __init__(self):
+        self.keys = array("Q")
+        self.customers = array("Q")
+        self.ends = array("q")
+        self.prophets = array("Q")
+        self.courses = array("Q")
+
+    def _columns(self):
+        return self.keys, self.customers, self.ends, self.prophets, self.courses
+
+    def append(self, booking_key, customer_key, end, prophet_key, course_key):
+        for column, value in zip(self._columns(), (booking_key, customer_key, end, prophet_key, course_key)):
+            column.append(value)
+
+    def finish(self, removed=()):
+        """Sort by booking key, then drop the bookings whose keys are in `removed`"""
+        order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        columns = [array(column.typecode, map(column.__getitem__, order)) for column in self._columns()]
+        del order
+        self.keys, self.customers, self.ends, self.prophets, self.courses = columns
+        kept = bytearray(b"\x01") * len(self.keys)
+        for booking_key in removed:
+            index = self._index(booking_key)
+            if index is not None:
+                kept[index] = 0
+        if kept.count(0):
+            columns = [array(column.typecode, compress(column, kept)) for column in self._columns()]
+            self.keys, self.customers, self.ends, self.prophets, self.courses = columns
+        return self
+
+    def _index(self, booking_key):
+        index = bisect_left(self.keys, booking_key)
+        return index if index < len(self.keys) and self.keys[index] == booking_key else None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, booking_key):
+        return self._index(booking_key) is not None
+
+    def __getitem__(self, booking_key):
+        index = self._index(booking_key)
+        if index is None:
+            raise KeyError(booking_key)
+        return self.customers[index], self.ends[index], self.prophets[index], self.courses[index]
+
+    def items(self):
+        """(booking key, (customer key, end timestamp, prophet key, course key)) in booking key order"""
+        return zip(self.keys, zip(self.customers, self.ends, self.prophets, self.courses))
+
+def load_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; generate the dataset with this version of mock.py first")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def open_text(path):
+    """Open a (possibly gzip or zstd compressed) CSV chunk for reading"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    if path.endswith(".zst"):
+        import zstandard
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")), encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+def chunk_paths(directory, manifest, table):
+    """Files of a table in load order; without a manifest, the plain <table>.csv if it exists"""
+    if manifest is None:
+        path = os.path.join(directory, f"{table}.csv")
+        return [path] if os.path.exists(path) else []
+    return [os.path.join(directory, chunk["path"]) for chunk in manifest["tables"].get(table, {}).get("chunks", [])]
+
+def read_rows(directory, manifest, table):
+    """Stream a table's rows as dicts from all of its chunks, in order"""
+    for path in chunk_paths(directory, manifest, table):
+        with open_text(path) as f:
+            yield from csv.DictReader(f)
+
+def timestamp(value):
+    """Epoch seconds of a generated naive datetime, which is UTC wall time"""
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp())
+
+def read_state(directory):
+    manifest = load_manifest(directory)
+    if manifest["format"] != "csv":
+        raise ValueError(f"Incremental runs need a csv dataset, {directory} is {manifest['format']}")
+
+    def keys(table, column="id"):
+        return array("Q", (key(row[column]) for row in read_rows(directory, manifest, table)))
+
+    active_courses = []
+    course_prices = {}
+    for row in read_rows(directory, manifest, "courses"):
+        if row["is_active"] == "True":
+            active_courses.append((row["id"], row["prophet_id"], int(row["duration_min"])))
+            course_prices[row["id"]] = row["price"]
+
+    # Minus the bookings an earlier increment already moved on
+    scheduled_bookings = ScheduledBookings()
+    for row in read_rows(directory, manifest, "bookings"):
+        if row["status"] == "SCHEDULED":
+            scheduled_bookings.append(
+                key(row["id"]), key(row["customer_id"]), timestamp(row["end_datetime"]),
+                key(row["prophet_id"]), key(row["course_id"]),
+            )
+    scheduled_bookings.finish(key(row["id"]) for row in read_rows(directory, manifest, "booking_status_updates"))
+
+    # ISO dates sort like the dates themselves
+    last_date = max((row["date"] for row in read_rows(directory, manifest, "prophet_availabilities")), default=None)
+
+    return DatasetState(
+        manifest=manifest,
+        customer_ids=HexIds(keys("customers")),
+        prophet_ids=HexIds(keys("prophets")),
+        active_courses=active_courses,
+        course_prices=course_prices,
+        scheduled_bookings=scheduled_bookings,
+        last_available_date=date.fromisoformat(last_date) if last_date else None,
+    )
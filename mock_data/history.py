@@ -0,0 +1,112 @@
+"""Timestamps for datasets with a long history (--history-days).
+
+By default every row is created ``now``. With a history the platform starts
+``days`` days before now and grows: a founding share of the accounts signs
+up in the first week, the rest at a steady rate over the whole history, so
+activity rises as members accumulate. Everything else happens after what it
+depends on:
+
+- customer, prophet and user detail rows are created with their account;
+- courses, transaction accounts and availability windows follow their
+  prophet, and availability is published a few days ahead of its date;
+- bookings are made after both the customer signed up and the course was
+  created, some lead time before they start; those that have ended are
+  COMPLETED or FAILED, the rest still SCHEDULED;
+- a completed booking's transaction is PAID_OUT once its payout date has
+  passed, and reviews are written a little after the booking ended;
+- reports are filed any time after signup and, when assigned, resolved a
+  few days later.
+
+``updated_at`` is the creation time, or for rows that were edited later a
+time between their creation and now. Nothing happens after ``now``.
+Signup times are a hash of the account's global index, keyed with the
+master seed, rather than random draws, so every stage, shard and worker
+process agrees on them without passing them around, and another --seed
+gives other signups.
+"""
+import hashlib
+import random
+from datetime import timedelta
+
+FOUNDING_SHARE = 0.2  # of the accounts, signed up in the first LAUNCH_DAYS
+LAUNCH_DAYS = 7
+EDIT_PROBABILITY = 0.3  # of a row having been updated after it was created
+COURSE_DELAY_DAYS = 14.0  # mean days from a prophet's signup to each of their courses
+TRANSACTION_ACCOUNT_DELAY_DAYS = 3.0
+AVAILABILITY_NOTICE_DAYS = (1, 14)  # windows are published this many days ahead
+BOOKING_LEAD_DAYS = 5.0  # mean days between making a booking and its start
+PAYOUT_DAYS = (1, 14)  # days after a completed booking until it is paid out
+REVIEW_DELAY_DAYS = 2.0
+REPORT_RESOLUTION_DAYS = 3.0
+BOOKING_PERIOD_DAYS = 30  # --min/--max-bookings count per this many days of membership
+
+class Timeline:
+    """Clock of a dataset whose history starts `days` days before `now`; `seed` is the master seed"""
+
+    def __init__(self, now, days, rng=random, seed=None):
+        self.now = now
+        self.days = days
+        self.start = now - timedelta(days=days)
+        self.rng = rng
+        # An empty key is plain unkeyed BLAKE2b
+        self.signup_key = b"" if seed is None else str(seed).encode()
+
+    def signup(self, index):
+        """When the account with this global index signed up"""
+        digest = hashlib.blake2b(f"signup:{index}".encode(), digest_size=8, key=self.signup_key).digest()
+        fraction = int.from_bytes(digest, "big") / 2 ** 64
+        if fraction < FOUNDING_SHARE:
+            return self.start + timedelta(days=min(LAUNCH_DAYS, self.days) * fraction / FOUNDING_SHARE)
+        return self.start + timedelta(days=self.days * (fraction - FOUNDING_SHARE) / (1 - FOUNDING_SHARE))
+
+    def signups(self, first_index, count):
+        """Signup times of `count` accounts from first_index on"""
+        return (self.signup(first_index + i) for i in range(count))
+
+    def day(self, moment):
+        """Day offset of a moment from today"""
+        return (moment.date() - self.now.date()).days
+
+    def clamp(self, moment, earliest):
+        return max(min(moment, self.now), earliest)
+
+    def after(self, moment, mean_days):
+        """An exponentially distributed delay after `moment`, but not after now"""
+        return min(moment + timedelta(days=self.rng.expovariate(1 / mean_days)), self.now)
+
+    def edited(self, created):
+        """updated_at of a row created at `created`"""
+        if self.rng.random() >= EDIT_PROBABILITY:
+            return created
+        return created + (self.now - created) * self.rng.random()
+
+    def published(self, date_start, earliest):
+        """When an availability window starting at `date_start` was published"""
+        return self.clamp(date_start - timedelta(days=self.rng.uniform(*AVAILABILITY_NOTICE_DAYS)), earliest)
+
+    def booked(self, start, earliest):
+        """When a booking starting at `start` was made"""
+        return self.clamp(start - timedelta(days=self.rng.expovariate(1 / BOOKING_LEAD_DAYS)), earliest)
+
+    def bookings(self, count, since):
+        """Bookings of a customer who books `count` times per period and signed up at `since`"""
+        periods = max((self.now - since).days, 0) / BOOKING_PERIOD_DAYS
+        return max(count, round(count * periods))
+
+    def paid_out(self, end):
+        """When a completed booking ending at `end` is paid out, or None if that is still to come"""
+        payout = end + timedelta(days=self.rng.uniform(*PAYOUT_DAYS))
+        return payout if payout <= self.now else None
+
+    def reviewed(self, end):
+        """When a booking ending at `end` was reviewed, or None if that is still to come"""
+        review = end + timedelta(days=self.rng.expovariate(1 / REVIEW_DELAY_DAYS))
+        return review if review <= self.now else None
+
+    def reported(self, since):
+        return since + (self.now - since) * self.rng.random()
+
+    def resolved(self, reported):
+        """When an assigned report was resolved, or None if it is still open"""
+        resolution = reported + timedelta(days=self.rng.expovariate(1 / REPORT_RESOLUTION_DAYS))
+        return resolution if resolution <= self.now else None
@@ -0,0 +1,84 @@
+"""Collision-free IDs and unique values for mock data, built from counters.
+
+Every namespace (usually a table) has its own counter. A counter value is
+turned into a 16-hex-char ID by a keyed 64-bit Feistel permutation, which is a
+bijection, so distinct counters can never produce the same ID. Uniqueness is
+guaranteed by construction: no sets of used values, no retries, and the same
+seed always yields the same IDs.
+
+Sharded runs give each shard its own ``space``; counter values are
+``space * SPACE_SIZE + n`` so shards never overlap either.
+"""
+import hashlib
+import random
+from collections import defaultdict
+
+SPACE_SIZE = 10 ** 9
+MAX_SPACES = 1000
+ACCOUNT_NUMBER_DIGITS = 12
+
+MASK32 = 0xFFFFFFFF
+FEISTEL_ROUNDS = 4
+
+def _round(value, key):
+    """Feistel round function: a 32-bit multiply/xorshift mix of value and key"""
+    x = (value ^ key) & MASK32
+    x = ((x ^ (x >> 16)) * 0x45D9F3B) & MASK32
+    x = ((x ^ (x >> 16)) * 0x45D9F3B) & MASK32
+    return x ^ (x >> 16)
+
+def feistel64(value, keys):
+    """Keyed bijection on 64-bit integers"""
+    left, right = value >> 32, value & MASK32
+    for key in keys:
+        left, right = right, left ^ _round(right, key)
+    return (left << 32) | right
+
+class IdEngine:
+    """Counter-based generator for IDs and other unique values"""
+
+    def __init__(self, seed=None, space=0):
+        if not 0 <= space < MAX_SPACES:
+            raise ValueError(f"space must be between 0 and {MAX_SPACES - 1}")
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.space = space
+        self.counters = defaultdict(int)
+        self._keys = {}
+
+        # Affine permutation of [0, 10^12): the multiplier is coprime with 10
+        rng = random.Random(f"{self.seed}:account_number")
+        modulus = 10 ** ACCOUNT_NUMBER_DIGITS
+        self._account_number_key = (rng.randrange(1, modulus // 10) * 10 + rng.choice([1, 3, 7, 9]), rng.randrange(modulus))
+
+    def namespace_keys(self, namespace):
+        """Round keys of the Feistel permutation for a namespace"""
+        keys = self._keys.get(namespace)
+        if keys is None:
+            digest = hashlib.sha256(f"{self.seed}:{namespace}".encode()).digest()
+            keys = [int.from_bytes(digest[i * 4:i * 4 + 4], "big") for i in range(FEISTEL_ROUNDS)]
+            self._keys[namespace] = keys
+        return keys
+
+    def sequence(self, namespace):
+        """Next counter value for a namespace, unique across all spaces"""
+        return self.reserve(namespace, 1)
+
+    def reserve(self, namespace, count):
+        """Reserve `count` consecutive counter values, returning the first one"""
+        n = self.counters[namespace]
+        if n + count > SPACE_SIZE:
+            raise OverflowError(f"More than {SPACE_SIZE} values requested for {namespace}")
+        self.counters[namespace] = n + count
+        return self.space * SPACE_SIZE + n
+
+    def id_for(self, namespace, value):
+        """16-hex-char ID for a counter value"""
+        return f"{feistel64(value, self.namespace_keys(namespace)):016x}"
+
+    def next_id(self, namespace):
+        return self.id_for(namespace, self.sequence(namespace))
+
+    def account_number(self, value):
+        """12-digit bank account number for a counter value, unique per value"""
+        multiplier, offset = self._account_number_key
+        return f"{(value * multiplier + offset) % 10 ** ACCOUNT_NUMBER_DIGITS:0{ACCOUNT_NUMBER_DIGITS}d}"
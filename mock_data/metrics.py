@@ -0,0 +1,202 @@
+"""Per-stage instrumentation of mock data generation.
+
+A stage is one save_csv / save_blocks call: a table, plus the tables derived
+from it, generated and written in one streaming pass. Every stage records its
+wall and CPU time, how much of it was spent inside the row generator (the
+rest is writing, including building derived rows), rows and bytes per table
+from the writers' own counters, named event counts the generators report
+through Metrics.count (such as bookings skipped for want of a free window),
+and the process's peak RSS when it ended.
+
+Profiling is opt-in, since it slows generation down considerably:
+
+- ``cpu`` runs every stage under cProfile, dumps ``<stage>.prof`` files for
+  pstats / snakeviz and keeps the top functions by own time in the report;
+- ``memory`` traces allocations with tracemalloc and keeps each stage's
+  traced peak and the source lines whose allocations it grew the most.
+"""
+import cProfile
+import json
+import os
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+PROFILE_MODES = ["cpu", "memory", "all"]
+HOT_SPOTS = 15
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _function_name(function):
+    filename, line, name = function
+    return f"{os.path.basename(filename)}:{line}({name})" if line else name
+
+def cpu_hot_spots(profile, limit=HOT_SPOTS):
+    """Functions with the most own time in a cProfile profile"""
+    stats = pstats.Stats(profile).stats
+    top = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+    return [
+        {"function": _function_name(function), "calls": calls, "tottime_s": round(tottime, 4), "cumtime_s": round(cumtime, 4)}
+        for function, (_, calls, tottime, cumtime, _) in top
+    ]
+
+def memory_hot_spots(before, after, limit=HOT_SPOTS):
+    """Source lines whose live allocations grew the most between two tracemalloc snapshots"""
+    return [
+        {"line": f"{os.path.basename(diff.traceback[0].filename)}:{diff.traceback[0].lineno}",
+         "size_kb": round(diff.size_diff / 1024, 1), "count": diff.count_diff}
+        for diff in after.compare_to(before, "lineno")[:limit] if diff.size_diff > 0
+    ]
+
+class Stage:
+    """Measurements of one stage, filled in while it runs"""
+
+    def __init__(self, name, shard=None):
+        self.name = name
+        self.shard = shard
+        self.generate_s = 0.0
+        self.rows = {}
+        self.bytes = {}
+        self.counts = {}
+        self.extra = {}
+
+    def timed(self, rows):
+        """Pass rows (or column blocks) through, adding the time spent producing them to generate_s"""
+        clock = time.perf_counter
+        spent = 0.0
+        iterator = iter(rows)
+        try:
+            while True:
+                start = clock()
+                try:
+                    row = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    spent += clock() - start
+                yield row
+        finally:
+            self.generate_s += spent
+
+    def written(self, *writers):
+        """Take row and byte counts from closed writers"""
+        for writer in writers:
+            self.rows[writer.filename] = writer.count
+            self.bytes[writer.filename] = sum(chunk["bytes"] for chunk in writer.chunks)
+
+class Metrics:
+    """Stage measurements of one process, with optional profiling"""
+
+    def __init__(self, profile=None, profile_dir=None, shard=None):
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.shard = shard
+        self.stages = []
+        self.started = time.perf_counter()
+        self._running = None
+        if self.profile in ("memory", "all") and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        stage = Stage(name, self.shard)
+        outer, self._running = self._running, stage
+        profiler = cProfile.Profile() if self.profile in ("cpu", "all") else None
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield stage
+        finally:
+            if profiler:
+                profiler.disable()
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            self._running = outer
+            if tracing:
+                stage.extra["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+                stage.extra["memory_hot_spots"] = memory_hot_spots(before, tracemalloc.take_snapshot())
+            if profiler:
+                stage.extra["cpu_hot_spots"] = cpu_hot_spots(profiler)
+                if self.profile_dir:
+                    os.makedirs(self.profile_dir, exist_ok=True)
+                    label = name if self.shard is None else f"{self.shard}-{name}"
+                    profiler.dump_stats(os.path.join(self.profile_dir, f"{label}.prof"))
+            self.stages.append(self._entry(stage, wall, cpu))
+
+    def count(self, name, amount=1):
+        """Add to a named event counter of the running stage; outside a stage (bare generators, as benchmark.py runs them) it is dropped"""
+        if self._running is None:
+            return
+        counts = self._running.counts
+        counts[name] = counts.get(name, 0) + amount
+
+    @staticmethod
+    def _entry(stage, wall, cpu):
+        rows = sum(stage.rows.values())
+        size = sum(stage.bytes.values())
+        return {
+            "stage": stage.name,
+            "shard": stage.shard,
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "generate_s": round(stage.generate_s, 4),
+            "write_s": round(max(wall - stage.generate_s, 0.0), 4),
+            "rows": stage.rows,
+            "bytes": stage.bytes,
+            "counts": stage.counts,
+            "rows_per_s": round(rows / wall, 1) if wall else None,
+            "mb_per_s": round(size / (1024 * 1024) / wall, 2) if wall else None,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            **stage.extra,
+        }
+
+    def report(self, **options):
+        """The whole run as a JSON-serialisable dict; `options` describe the run"""
+        rows, size, counts = {}, {}, {}
+        for entry in self.stages:
+            for table, count in entry["rows"].items():
+                rows[table] = rows.get(table, 0) + count
+            for table, count in entry["bytes"].items():
+                size[table] = size.get(table, 0) + count
+            for name, count in entry["counts"].items():
+                counts[name] = counts.get(name, 0) + count
+        wall = time.perf_counter() - self.started
+        return {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            **options,
+            "wall_s": round(wall, 3),
+            "rows": sum(rows.values()),
+            "bytes": sum(size.values()),
+            "rows_per_s": round(sum(rows.values()) / wall, 1) if wall else None,
+            "peak_rss_mb": round(max([peak_rss_mb()] + [s["peak_rss_mb"] for s in self.stages]), 1),
+            "tables": {table: {"rows": rows[table], "bytes": size[table]} for table in sorted(rows)},
+            "counts": dict(sorted(counts.items())),
+            "stages": self.stages,
+        }
+
+def write_report(path, report):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    return path
+
+def print_stages(stages):
+    """One line per stage: time split, rows/sec, throughput and event counts"""
+    for entry in stages:
+        label = entry["stage"] if entry["shard"] is None else f"{entry['stage']} [shard {entry['shard']}]"
+        counts = "".join(f", {count} {name.replace('_', ' ')}" for name, count in entry["counts"].items())
+        print(f"  - {label}: {entry['wall_s']:.3f}s (generate {entry['generate_s']:.3f}s, write {entry['write_s']:.3f}s), "
+              f"{sum(entry['rows'].values())} rows, {entry['rows_per_s'] or 0:,.0f} rows/s, "
+              f"{entry['mb_per_s'] or 0:.1f} MB/s, peak RSS {entry['peak_rss_mb']:.1f} MB{counts}")
@@ -1,26 +1,160 @@
 from collections import defaultdict
-import csv
+import argparse
+import hashlib
+import importlib.util
+import io
 import random
+import shutil
 import string
-import uuid
+import sys
 from datetime import datetime, timedelta, timezone, time
 from decimal import Decimal
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
 import os
 
+from availability import AvailabilityCalendar, SLOTS_PER_DAY, slot_time
+from dataset_cache import DEFAULT_MAX_GB, LINK_MODES, DatasetCache, dataset_key
+from dataset_state import hex_id, key, load_manifest, read_state
+from history import COURSE_DELAY_DAYS, TRANSACTION_ACCOUNT_DELAY_DAYS, Timeline
+from ids import IdEngine, MAX_SPACES
+from metrics import PROFILE_MODES, Metrics, print_stages, write_report
+from oracle import Oracle, load_oracle, write_oracle
+from passwords import DEFAULT_CACHE as PASSWORD_CACHE, DEFAULT_POOL, MODES as PASSWORD_MODES, PasswordHashes, default_cost
+from pg_copy import CopyTableWriter, write_load_script
+from popularity import HOUR_PROFILES, activity_counts, course_picker, hour_profile
+from scheduler import Stage, critical_path, run_parallel, run_sequential
+from traces import TraceGenerator, write_traces
+from writers import (
+    COMPRESSION_SUFFIXES, BackgroundWriter, ChecksumFile, CsvTableWriter, ParquetTableWriter, PartitionedWriter,
+    compressed, partition_dir, write_manifest,
+)
+
 # Output directory setup
 output_dir = "./csv_output"
-os.makedirs(output_dir, exist_ok=True)
+
+# Output backends selectable with --format
+OUTPUT_FORMATS = {
+    "csv": CsvTableWriter,
+    "copy": CopyTableWriter,
+    "parquet": ParquetTableWriter,
+}
+output_format = "csv"
+
+# Rolling chunk size (--chunk-rows, None for one file per table) and
+# compression (--compression) of the output files
+chunk_rows = None
+compression = None
+
+# Split tables into monthly partitions (--partition month), by created_at
+# unless PARTITION_COLUMNS names another column
+PARTITIONS = ["month"]
+partition = None
+PARTITION_COLUMNS = {
+    "bookings": "start_datetime",
+    "prophet_availabilities": "date",
+    "booking_status_updates": "updated_at",
+}
+
+# Table name -> the files written for it, with row counts and checksums, in
+# load order; becomes manifest.json
+written_chunks = {}
+
+# Per-stage timings, counts and optional profiles of this process (see
+# metrics.py), written to METRICS_FILE with the dataset
+metrics = Metrics()
+METRICS_FILE = "metrics.json"
+PROFILE_DIR = "profiles"
+
+# API request trace for load tests written next to the dataset (--trace-sessions)
+TRACE_FILE = "traces.ndjson"
+
+# Write every table on a writer thread of its own (--scheduler dag)
+background_writers = False
+
+# Expected aggregates of the rows written so far (oracle.json)
+oracle = Oracle()
+
+# Real bcrypt password_hash values (--password-hashes, see passwords.py), None
+# for random text
+passwords = None
+
+# Callable filename -> writer that replaces the file writers, e.g. a
+# pg_load.PostgresSink that COPYs every table into a database
+sink = None
+
+# Generation engine selectable with --engine: row-by-row generators below, or
+# the column-wise NumPy engine in vectorized.py
+ENGINES = ["python", "numpy"]
+engine = "python"
+
+# How generate_dataset's stages run (--scheduler): one after another, or as a
+# dependency graph in a process pool (scheduler.py)
+SCHEDULERS = ["sequential", "dag"]
+
+# Default scale - the small dataset committed in csv_output is generated at it with
+# `python3 mock.py --seed 42 --now 2026-01-01T00:00:00+00:00`; regenerate it when the output changes
+DEFAULT_SCALE = {
+    "customers": 8,
+    "prophets": 5,
+    "admins": 2,
+    "availability_days": 10,
+    "min_bookings_per_customer": 1,
+    "max_bookings_per_customer": 2,
+    # Popularity skew (see popularity.py): Zipf exponents, 0 for uniform
+    "prophet_skew": 0.0,
+    "course_skew": 0.0,
+    "customer_skew": 0.0,
+    "booking_hours": "uniform",
+    # Days of history before now (history.py), 0 for everything created now
+    "history_days": 0,
+}
 
 # ENUMS - EXACTLY MATCHING PRISMA SCHEMA
 SEX = ['MALE', 'FEMALE', 'LGBTQ_PLUS', 'UNDEFINED']
 HOROSCOPE_SECTORS = ['LOVE', 'WORK', 'STUDY', 'MONEY', 'LUCK', 'FAMILY']
 BOOKING_STATUSES = ['SCHEDULED', 'COMPLETED', 'FAILED']
-TRANSACTION_STATUSES = ['PROCESSING', 'COMPLETED', 'FAILED']
+TRANSACTION_STATUSES = ['PENDING_PAYOUT', 'PAID_OUT']
 REPORT_TYPES = ['COURSE_ISSUE', 'PROPHET_ISSUE', 'PAYMENT_ISSUE', 'WEBSITE_ISSUE', 'OTHER']
 REPORT_STATUSES = ['DISCARD', 'DONE']
 ZODIAC_SIGNS = ['ARIES', 'TAURUS', 'GEMINI', 'CANCER', 'LEO', 'VIRGO', 'LIBRA', 'SCORPIO', 'SAGITTARIUS', 'CAPRICORN', 'AQUARIUS', 'PISCES']
 BANKS = ['BBL', 'KTB', 'KBANK', 'SCB', 'BAY', 'TTB', 'CIMB', 'UOB', 'GSB', 'BAAC']
 ROLES = ['PROPHET', 'CUSTOMER', 'ADMIN']
+COURSE_DURATIONS = [30, 45, 60, 90]
+
+# Value pools shared by the row-by-row and the vectorised (--engine numpy) generators
+HOROSCOPE_METHOD_NAMES = [
+    "Tarot Reading", "Astrology Chart", "Palm Reading", "Crystal Ball", 
+    "Numerology", "Dream Analysis", "Rune Casting", "Tea Leaf Reading",
+    "Pendulum Divination", "Aura Reading"
+]
+COURSE_LEVELS = ['Basic', 'Advanced', 'Premium', 'Deluxe']
+AVAILABILITY_WINDOW_SLOTS = (4, 16)  # 1-4 hours of 15-minute slots
+REVIEW_DESCRIPTIONS = [
+    "Amazing reading! Very insightful and accurate.",
+    "Great experience, highly recommend this prophet.",
+    "Professional service and detailed explanations.",
+    "Wonderful session, helped me understand many things.",
+    "Excellent guidance and spiritual insight.",
+    ""  # Empty string instead of None for CSV compatibility
+]
+REPORT_TOPICS = [
+    "Booking Issue", "Payment Problem", "Technical Error",
+    "Service Quality", "Prophet Behavior", "Website Bug"
+]
+REPORT_DESCRIPTIONS = [
+    "Had trouble with the booking system.",
+    "Payment was processed but booking wasn't confirmed.",
+    "Prophet was late for the session.",
+    "Website crashed during payment.",
+    "Received poor quality service.",
+    "Technical issues during the session."
+]
+REVIEW_PROBABILITY = 0.8  # of a completed booking
+REVIEW_DESCRIPTION_PROBABILITY = 0.7
+REPORT_PROBABILITY = 0.3  # per customer
+REPORT_ASSIGNED_PROBABILITY = 0.7
+BOOKING_COMPLETION_PROBABILITY = 0.8  # of a scheduled booking once it has ended (--advance-days)
 
 # Names for consistent generation
 FIRST_NAMES = ["John", "Jane", "Alice", "Bob", "Charlie", "Emma", "David", "Sarah", 
@@ -28,217 +162,284 @@ FIRST_NAMES = ["John", "Jane", "Alice", "Bob", "Charlie", "Emma", "David", "Sara
 LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", 
               "Davis", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson"]
 
-def short_id():
-    """Generate a 16-character UUID"""
-    return str(uuid.uuid4()).replace('-', '')[:16]
+# Counter-based ID engine, replaced in main() once the seed and shard are known
+ids = IdEngine()
 
-def random_email(used_emails=None, base_username=""):
-    """Generate a unique email address"""
-    if used_emails is None:
-        used_emails = set()
-    
-    # Use base_username if provided for more uniqueness
-    if base_username:
-        base = base_username.lower()
-    else:
-        base = ''.join(random.choices(string.ascii_lowercase, k=6))
-    
-    attempts = 0
-    while attempts < 100:
-        suffix = ''.join(random.choices(string.digits, k=4))
-        domain_part = ''.join(random.choices(string.ascii_lowercase, k=5))
-        email = f"{base}{suffix}@{domain_part}.com"
-        
-        if email not in used_emails:
-            used_emails.add(email)
-            return email
-        attempts += 1
-    
-    # Fallback with timestamp if all attempts fail
-    timestamp = str(int(datetime.now().timestamp() * 1000000))
-    return f"user{timestamp}@example.com"
+def short_id(namespace):
+    """Generate a unique 16-character ID for a table"""
+    return ids.next_id(namespace)
+
+def random_email(username):
+    """Generate an email address, unique because the username it starts with is unique"""
+    suffix = ''.join(random.choices(string.digits, k=4))
+    domain_part = ''.join(random.choices(string.ascii_lowercase, k=5))
+    return f"{username.lower()}{suffix}@{domain_part}.com"
 
 def random_name():
     return random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
 
-def save_csv(filename, data):
-    """Save data to a CSV file"""
-    if not data:
-        print(f"Warning: No data to save for {filename}")
-        return
-    
-    filepath = os.path.join(output_dir, f"{filename}.csv")
-    with open(filepath, "w", newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=data[0].keys())
-        writer.writeheader()
-        writer.writerows(data)
-    
-    print(f"Saved {len(data)} records to {filepath}")
+def open_writer(filename):
+    """Writer for a table in the current output format, directory, chunking and partitioning, or from the sink when one is set"""
+    if sink is not None:
+        writer = sink(filename)
+    elif partition is not None:
+        writer = PartitionedWriter(
+            filename, output_dir, PARTITION_COLUMNS.get(filename, "created_at"),
+            lambda directory: OUTPUT_FORMATS[output_format](filename, directory, chunk_rows=chunk_rows, compression=compression),
+        )
+    else:
+        writer = OUTPUT_FORMATS[output_format](filename, output_dir, chunk_rows=chunk_rows, compression=compression)
+    return BackgroundWriter(writer) if background_writers else writer
+
+def record_chunks(writer):
+    """Add the files of a closed writer to written_chunks for the manifest"""
+    written_chunks.setdefault(writer.filename, []).extend(writer.chunks)
+
+def abort_writers(writers, exc):
+    """Leave writers as a failed with block would, so none of them commits a partial table"""
+    for writer in writers:
+        writer.__exit__(*exc)
+
+def save_csv(filename, rows, derived=()):
+    """Stream rows into a file in the current output format and return how many were written.
+
+    ``derived`` is a list of ``(filename, fn)`` pairs for child tables that are
+    built from each parent row as it passes, e.g. transactions from bookings,
+    so the parent table never has to be held in memory.
+    """
+    with metrics.stage(filename) as stage:
+        writers = [(open_writer(child), fn, oracle.observer(child)) for child, fn in derived]
+        observe = oracle.observer(filename)
+        try:
+            with open_writer(filename) as writer:
+                for row in stage.timed(rows):
+                    writer.write(row)
+                    if observe is not None:
+                        observe(row)
+                    for child_writer, fn, observe_child in writers:
+                        for child_row in fn([row]):
+                            child_writer.write(child_row)
+                            if observe_child is not None:
+                                observe_child(child_row)
+        except BaseException:
+            # Child tables only close once their parent has, e.g. after its COPY committed
+            abort_writers([w for w, _, _ in writers], sys.exc_info())
+            raise
+        for child_writer, _, _ in writers:
+            child_writer.close()
+        stage.written(writer, *(w for w, _, _ in writers))
+    record_chunks(writer)
+    for child_writer, _, _ in writers:
+        record_chunks(child_writer)
+    return {filename: writer.count, **{w.filename: w.count for w, _, _ in writers}}
 
+def save_blocks(blocks, filenames):
+    """Write (filename, {column: values}) blocks from one generator into their tables.
+
+    Used by the column-wise engine, which emits several related tables (e.g.
+    bookings, transactions and reviews) from one pass. Returns row counts for
+    every table in filenames.
+    """
+    with metrics.stage(filenames[0]) as stage:
+        writers = {filename: open_writer(filename) for filename in filenames}
+        try:
+            for filename, columns in stage.timed(blocks):
+                writers[filename].write_columns(columns)
+                oracle.observe_block(filename, columns)
+        except BaseException:
+            abort_writers(writers.values(), sys.exc_info())
+            raise
+        for writer in writers.values():
+            writer.close()
+        stage.written(*writers.values())
+    for writer in writers.values():
+        record_chunks(writer)
+    return {filename: writer.count for filename, writer in writers.items()}
+
+def keep_keys(rows, keep):
+    """Pass rows through unchanged, calling keep(row) to record the compact keys child tables need"""
+    for row in rows:
+        keep(row)
+        yield row
+
+# Reference time for every generated timestamp, overridable with --now
 now = datetime.now(timezone.utc)
 
-def generate_accounts():
-    accounts = []
-    used_emails = set()
-    used_usernames = set()
+# Clock of the history before now with --history-days, None when everything is created now
+timeline = None
 
-    for i, role in enumerate(["CUSTOMER"] * 8 + ["PROPHET"] * 5 + ["ADMIN"] * 2):
-        base_username = f"{role.lower()}{i}"
-        email = random_email(used_emails, base_username)
-        
-        # Generate unique username
-        username = base_username
-        counter = 1
-        while username in used_usernames:
-            username = f"{base_username}_{counter}"
-            counter += 1
-        
-        used_usernames.add(username)
-        used_emails.add(email)
-        
-        accounts.append({
-            "id": short_id(),
+def timeline_for(scale, seed):
+    """Timeline of a run with this scale and master seed; every process of the run must pass the same seed"""
+    return Timeline(now, scale["history_days"], seed=seed) if scale["history_days"] else None
+
+def edited(created):
+    """updated_at of a row created at `created`"""
+    return created if timeline is None else timeline.edited(created)
+
+def signups(context, role, count):
+    """Signup times of the `count` accounts of a role in a stage's context, or None without a history"""
+    if timeline is None:
+        return None
+    first = {name: start for name, start, _ in account_ranges(context["scale"], context["first_index"])}
+    return timeline.signups(first[role], count)
+
+def usernames(scale):
+    """Usernames of all accounts of a dataset, as generate_accounts numbers them"""
+    return (f"{role.lower()}{i}" for role, start, count in account_ranges(scale) for i in range(start, start + count))
+
+def prepare_passwords(scale, workers=None):
+    """Hash the passwords of every account of the dataset that the hash cache does not have yet"""
+    with metrics.stage("password_hashes"):
+        computed = passwords.prepare(usernames(scale), workers)
+    print(f"Hashed {computed} new {passwords.mode} passwords at bcrypt cost {passwords.cost} into {passwords.cache.path}")
+
+def account_ranges(scale, first_index=None):
+    """(role, first account index, count) for each role, numbering customers, then prophets, then admins"""
+    if first_index is None:
+        first_index = {
+            "CUSTOMER": 0,
+            "PROPHET": scale["customers"],
+            "ADMIN": scale["customers"] + scale["prophets"],
+        }
+    return [
+        ("CUSTOMER", first_index["CUSTOMER"], scale["customers"]),
+        ("PROPHET", first_index["PROPHET"], scale["prophets"]),
+        ("ADMIN", first_index["ADMIN"], scale["admins"]),
+    ]
+
+def generate_accounts(ranges):
+    indexed_roles = chain.from_iterable(
+        ((start + i, role) for i in range(count)) for role, start, count in ranges
+    )
+    hashes = None if passwords is None else passwords.hashes(
+        (start + i, f"{role.lower()}{start + i}") for role, start, count in ranges for i in range(count)
+    )
+
+    for i, role in indexed_roles:
+        # role + global account index is unique by construction
+        username = f"{role.lower()}{i}"
+        email = random_email(username)
+        created = now if timeline is None else timeline.signup(i)
+
+        yield {
+            "id": short_id("account"),
             "email": email,
             "username": username,
-            "password_hash": ''.join(random.choices(string.hexdigits.lower(), k=60)),
+            "password_hash": ''.join(random.choices(string.hexdigits.lower(), k=60)) if hashes is None
+                             else next(hashes),
             "role": role,
-            "created_at": now.isoformat(),
-            "updated_at": now.isoformat()
-        })
-
-    return accounts
+            "created_at": created.isoformat(),
+            "updated_at": edited(created).isoformat()
+        }
 
 def generate_horoscope_methods():
-    method_names = [
-        "Tarot Reading", "Astrology Chart", "Palm Reading", "Crystal Ball", 
-        "Numerology", "Dream Analysis", "Rune Casting", "Tea Leaf Reading",
-        "Pendulum Divination", "Aura Reading"
-    ]
-
     return [
         {
             "id": i + 1,  # Explicitly set auto-increment ID
             "slug": name.lower().replace(' ', '_').replace('-', '_'),
             "name": name
-        } for i, name in enumerate(method_names)
+        } for i, name in enumerate(HOROSCOPE_METHOD_NAMES)
     ]
 
-def generate_user_details(accounts):
-    user_details = []
-    for acc in accounts:
+def generate_user_details(account_ids, signups=None):
+    for account_id, created in zip(account_ids, signups or repeat(now)):
         first, last = random_name()
-        user_details.append({
-            "account_id": acc["id"],
+        yield {
+            "account_id": account_id,
             "name": first,
             "lastname": last,
-            "profile_url": f"https://example.com/profile/{short_id()}.jpg",
+            "profile_url": f"https://example.com/profile/{short_id('profile')}.jpg",
             "phone_number": f"+66{random.randint(100000000, 999999999)}",
             "gender": random.choice(SEX),
-            "created_at": now.isoformat(),
-            "updated_at": now.isoformat()
-        })
-    return user_details
+            "created_at": created.isoformat(),
+            "updated_at": edited(created).isoformat()
+        }
 
-def generate_customers(customer_accounts):
-    customers = []
-    for acc in customer_accounts:
+def generate_customers(customer_account_ids, signups=None):
+    for account_id, created in zip(customer_account_ids, signups or repeat(now)):
         birth_date = datetime(random.randint(1950, 2005), random.randint(1, 12), random.randint(1, 28))
-        birth_time = datetime.combine(datetime.today(), time(random.randint(0, 23), random.randint(0, 59)))
+        birth_time = time(random.randint(0, 23), random.randint(0, 59))
         
-        customers.append({
-            "id": short_id(),
-            "account_id": acc["id"],
+        yield {
+            "id": short_id("customer"),
+            "account_id": account_id,
             "birth_date": birth_date.date().isoformat(),
-            "birth_time": birth_time.time().strftime("%H:%M:%S"),
+            "birth_time": birth_time.strftime("%H:%M:%S"),
             "zodiac_sign": random.choice(ZODIAC_SIGNS),
-            "created_at": now.isoformat(),
-            "updated_at": now.isoformat(),
+            "created_at": created.isoformat(),
+            "updated_at": edited(created).isoformat(),
             "is_public": random.choice([True, False]),
-        })
-    return customers
-
-def generate_prophets(prophet_accounts):
-    prophets = []
-    for acc in prophet_accounts:
-        prophets.append({
-            "id": short_id(),
-            "account_id": acc["id"],
+        }
+
+def generate_prophets(prophet_account_ids, signups=None):
+    for account_id, created in zip(prophet_account_ids, signups or repeat(now)):
+        yield {
+            "id": short_id("prophet"),
+            "account_id": account_id,
             "line_id": ''.join(random.choices(string.ascii_lowercase + string.digits, k=20)),
-            "created_at": now.isoformat(),
-            "updated_at": now.isoformat()
-        })
-    return prophets
+            "created_at": created.isoformat(),
+            "updated_at": edited(created).isoformat()
+        }
 
-def generate_prophet_methods(prophets, horoscope_methods):
-    prophet_methods = []
-    for prophet in prophets:
+def generate_prophet_methods(prophet_ids, horoscope_methods):
+    for prophet_id in prophet_ids:
         num_methods = random.randint(1, 3)
         selected_methods = random.sample(horoscope_methods, min(num_methods, len(horoscope_methods)))
         
         # No explicit ID for this table, as it uses a composite primary key
-        prophet_methods.extend([
-            {
-                "prophet_id": prophet["id"],
+        for method in selected_methods:
+            yield {
+                "prophet_id": prophet_id,
                 "method_id": method["id"]
-            } for method in selected_methods
-        ])
-    
-    return prophet_methods
+            }
 
-def generate_prophet_availabilities(prophets):
-    prophet_availabilities = []
-    
-    for prophet in prophets:
-        # Track used dates and slots for this prophet
-        used_dates = set()
-        
-        # Generate availabilities for next 10 days
-        for day_offset in range(0, 10, random.randint(1, 2)):
-            date = datetime.now().date() + timedelta(days=day_offset)
-            
-            # Skip if this date has already been used for this prophet
-            if date in used_dates:
-                continue
-            
-            # Randomly decide number of slots (1-2)
-            num_slots = random.randint(1, 2)
-            
-            # Sort slots to ensure no overlap
-            possible_slots = [(h, m) for h in range(7, 23) for m in [0, 15, 30, 45]]
-            random.shuffle(possible_slots)
-            
-            # Track used slots for this date
-            used_slots = set()
-            
-            for hour, minute in possible_slots:
-                if len(used_slots) >= num_slots:
-                    break
-                
-                start_time = time(hour, minute)
-                
-                # Ensure no overlap with existing slots
-                if any((s[0] == start_time.hour and s[1] == start_time.minute) for s in used_slots):
-                    continue
-                
-                # Add this slot
-                prophet_availabilities.append({
-                    "prophet_id": prophet["id"],
-                    "date": date.isoformat(),
-                    "start_time": start_time.strftime("%H:%M:%S"),
-                    "created_at": now.isoformat()
-                })
-                
-                used_slots.add((start_time.hour, start_time.minute))
+def generate_prophet_availabilities(prophet_ids, calendar, days=DEFAULT_SCALE["availability_days"], first_day=0,
+                                    signups=None):
+    """Yield availability slots and register them in the booking calendar.
+
+    Each available day gets one or two windows of 1-4 hours, one in the
+    morning half and/or one in the evening half of the day, so the windows
+    never overlap and longer courses still fit inside them. With an hour
+    profile on the calendar, windows are placed around its busy hours. Days
+    are offsets from today; incremental runs start after the days that
+    already exist. With ``signups`` of the prophets (a history) each prophet
+    starts the day after signing up, and windows are published ahead of time.
+    """
+    today = now.date()
+    half_day = SLOTS_PER_DAY // 2
+
+    for prophet_id, since in zip(prophet_ids, signups or repeat(None)):
+        start_day = first_day if since is None else max(first_day, timeline.day(since) + 1)
+        # Generate availabilities for `days` days from first_day on
+        for day_offset in range(start_day, first_day + days, random.randint(1, 2)):
+            date = (today + timedelta(days=day_offset)).isoformat()
             
-            # Mark this date as used
-            used_dates.add(date)
+            # Randomly decide number of windows (1-2)
+            for half in random.sample([0, half_day], random.randint(1, 2)):
+                length = random.randint(*AVAILABILITY_WINDOW_SLOTS)
+                if calendar.hours is None:
+                    start_slot = half + random.randint(0, half_day - length)
+                else:
+                    start_slot = calendar.hours.window_start(half, length)
+                calendar.open(prophet_id, day_offset, start_slot, length)
+                created = now
+                if since is not None:
+                    window_start = datetime.combine(today + timedelta(days=day_offset), slot_time(start_slot), timezone.utc)
+                    created = timeline.published(window_start, since)
 
-    return prophet_availabilities
+                for slot in range(start_slot, start_slot + length):
+                    yield {
+                        "prophet_id": prophet_id,
+                        "date": date,
+                        "start_time": slot_time(slot).strftime("%H:%M:%S"),
+                        "created_at": created.isoformat()
+                    }
 
-def generate_courses(prophets, horoscope_methods):
-    courses = []
-    for prophet in prophets:
-        prophet_method_ids = [pm["method_id"] for pm in generate_prophet_methods([prophet], horoscope_methods)]
+def generate_courses(prophet_ids, horoscope_methods, signups=None):
+    method_names = {m["id"]: m["name"] for m in horoscope_methods}
+
+    for prophet_id, since in zip(prophet_ids, signups or repeat(None)):
+        prophet_method_ids = [pm["method_id"] for pm in generate_prophet_methods([prophet_id], horoscope_methods)]
         
         if not prophet_method_ids:
             method = random.choice(horoscope_methods)
@@ -247,277 +448,961 @@ def generate_courses(prophets, horoscope_methods):
         num_courses = random.randint(1, 2)
         for _ in range(num_courses):
             method_id = random.choice(prophet_method_ids)
-            method_name = next(m["name"] for m in horoscope_methods if m["id"] == method_id)
+            created = now if since is None else timeline.after(since, COURSE_DELAY_DAYS)
             
-            courses.append({
-                "id": short_id(),
-                "prophet_id": prophet["id"],
-                "course_name": f"{random.choice(['Basic', 'Advanced', 'Premium', 'Deluxe'])} {method_name} Session",
+            yield {
+                "id": short_id("course"),
+                "prophet_id": prophet_id,
+                "course_name": f"{random.choice(COURSE_LEVELS)} {method_names[method_id]} Session",
                 "horoscope_method_id": method_id,
+                "horoscope_method": method_names[method_id],
                 "horoscope_sector": random.choice(HOROSCOPE_SECTORS),
-                "duration_min": random.choice([30, 45, 60, 90]),
+                "duration_min": random.choice(COURSE_DURATIONS),
                 "price": f"{random.uniform(300, 2000):.2f}",
                 "is_active": random.choice([True, True, True, False]),
-                "created_at": now.isoformat(),
-                "updated_at": now.isoformat()
-            })
+                "created_at": created.isoformat(),
+                "updated_at": edited(created).isoformat()
+            }
 
-    return courses
+def generate_bookings(customer_ids, active_courses, calendar, scale=DEFAULT_SCALE, statuses=BOOKING_STATUSES,
+                      signups=None, course_since=None):
+    """Yield bookings for each customer.
 
-def generate_bookings(customers, active_courses, prophet_availabilities):
-    bookings = []
-    used_booking_slots = set()
-    
-    print(f"Debug: Starting booking generation with {len(customers)} customers, {len(active_courses)} active courses, {len(prophet_availabilities)} availabilities")
+    ``active_courses`` is a list of ``(course_id, prophet_id, duration_min)``
+    tuples. Each booking takes a free window from the prophet's availability
+    calendar, so bookings never overlap; when the chosen prophet has no window
+    left for the course the booking is skipped. Statuses are drawn from
+    ``statuses``. Courses and the number of bookings per customer follow the
+    popularity skew in ``scale``.
+
+    With a history, ``signups`` of the customers and ``course_since`` (course
+    ID -> created) place every booking after both; the bookings per customer
+    count per history.BOOKING_PERIOD_DAYS of membership, and the status
+    follows from whether the booking has ended.
+    """
+    today = datetime.combine(now.date(), time())
+    skipped = 0
+
+    if not active_courses:
+        return
+
+    pick_course = course_picker(active_courses, scale["prophet_skew"], scale["course_skew"])
+    bookings_per_customer = activity_counts(
+        len(customer_ids), scale["min_bookings_per_customer"], scale["max_bookings_per_customer"], scale["customer_skew"]
+    )
     
-    for customer in customers:
-        num_bookings = random.randint(1, 2)  # Guarantee at least 1 booking per customer
-        
+    for customer_id, num_bookings, since in zip(customer_ids, bookings_per_customer, signups or repeat(None)):
+        if since is not None:
+            num_bookings = timeline.bookings(num_bookings, since)
         for _ in range(num_bookings):
-            if not active_courses:
-                break
-                
-            attempts = 0
-            booking_created = False
-            while attempts < 10 and not booking_created:
-                attempts += 1
-                
-                course = random.choice(active_courses)
-                prophet_id = course["prophet_id"]
-                course_duration = int(course["duration_min"])
-                
-                # Find prophet availabilities for this prophet
-                prophet_availabilities_list = [
-                    slot for slot in prophet_availabilities 
-                    if slot["prophet_id"] == prophet_id
-                ]
-                
-                if not prophet_availabilities_list:
-                    continue
-                
-                # Pick a random availability slot
-                slot = random.choice(prophet_availabilities_list)
-                slot_key = (prophet_id, slot["date"], slot["start_time"])
-                
-                # Check if this slot is already used
-                if slot_key in used_booking_slots:
-                    continue
-                
-                # Create booking from this slot
-                slot_date = datetime.strptime(slot["date"], "%Y-%m-%d").date()
-                slot_start_time = datetime.strptime(slot["start_time"], "%H:%M:%S").time()
-                
-                start_datetime = datetime.combine(slot_date, slot_start_time)
-                end_datetime = start_datetime + timedelta(minutes=course_duration)
-                
-                # Mark this slot as used
-                used_booking_slots.add(slot_key)
-                
-                bookings.append({
-                    "id": short_id(),
-                    "customer_id": customer["id"],
-                    "course_id": course["id"],
-                    "prophet_id": prophet_id,
-                    "start_datetime": start_datetime.isoformat(),
-                    "end_datetime": end_datetime.isoformat(),
-                    "status": random.choice(BOOKING_STATUSES),
-                    "created_at": now.isoformat()
-                })
-                
-                booking_created = True
-                break
-    
-    print(f"Debug: Generated {len(bookings)} bookings")
-    return bookings
+            course_id, prophet_id, course_duration = pick_course()
+            if since is None:
+                window = calendar.book(prophet_id, course_duration)
+            else:
+                earliest = max(since, course_since[course_id])
+                window = calendar.book(prophet_id, course_duration, timeline.day(earliest) + 1)
+            if window is None:
+                skipped += 1
+                continue
+
+            day_offset, start_slot = window
+            start_datetime = datetime.combine(today + timedelta(days=day_offset), slot_time(start_slot))
+            end_datetime = start_datetime + timedelta(minutes=course_duration)
+            if since is None:
+                created, status = now, random.choice(statuses)
+            else:
+                created = timeline.booked(start_datetime.replace(tzinfo=timezone.utc), earliest)
+                status = ended_booking_status() if end_datetime.replace(tzinfo=timezone.utc) <= now else "SCHEDULED"
 
-def generate_transactions(bookings):
-    transactions = []
+            yield {
+                "id": short_id("booking"),
+                "customer_id": customer_id,
+                "course_id": course_id,
+                "prophet_id": prophet_id,
+                "start_datetime": start_datetime.isoformat(),
+                "end_datetime": end_datetime.isoformat(),
+                "status": status,
+                "created_at": created.isoformat()
+            }
+
+    if skipped:
+        metrics.count("skipped_bookings", skipped)
+
+def ended_booking_status():
+    return "COMPLETED" if random.random() < BOOKING_COMPLETION_PROBABILITY else "FAILED"
+
+def booking_end(booking):
+    return datetime.fromisoformat(booking["end_datetime"]).replace(tzinfo=timezone.utc)
+
+def generate_transactions(bookings, course_prices):
     for booking in bookings:
-        transactions.append({
-            "id": short_id(),
+        # Only completed bookings can already have been paid out to the prophet
+        completed = booking["status"] == "COMPLETED"
+        if timeline is None:
+            created = paid_out = now
+            status = random.choice(TRANSACTION_STATUSES) if completed else "PENDING_PAYOUT"
+        else:
+            # With a history, once their payout date has passed
+            created = datetime.fromisoformat(booking["created_at"])
+            paid_out = timeline.paid_out(booking_end(booking)) if completed else None
+            status = "PENDING_PAYOUT" if paid_out is None else "PAID_OUT"
+        yield {
+            "id": short_id("transaction"),
             "booking_id": booking["id"],
-            "status": random.choice(TRANSACTION_STATUSES),
-            "created_at": now.isoformat(),
-            "updated_at": now.isoformat()
-        })
+            "status": status,
+            "amount": course_prices[booking["course_id"]],
+            "created_at": created.isoformat(),
+            "updated_at": (paid_out or created).isoformat()
+        }
 
-    return transactions
+def generate_booking_status_updates(scheduled_bookings):
+    """Yield status changes for SCHEDULED bookings that have ended by `now`.
 
-def generate_transaction_accounts(prophets):
-    transaction_accounts = []
-    used_account_combinations = set()
+    ``scheduled_bookings`` is the dataset_state.ScheduledBookings that read_state
+    reads back, booking key -> (customer key, end timestamp, prophet key, course key).
+    """
+    until = now.timestamp()
+    for booking_key, (_, end, _, _) in scheduled_bookings.items():
+        if end <= until:
+            yield {
+                "id": hex_id(booking_key),
+                "status": "COMPLETED" if random.random() < BOOKING_COMPLETION_PROBABILITY else "FAILED",
+                "updated_at": now.isoformat()
+            }
 
-    for prophet in prophets:
-        num_accounts = 1  # One account per prophet for simplicity
-        
-        for _ in range(num_accounts):
-            attempts = 0
-            while attempts < 20:
-                first, last = random_name()
-                bank = random.choice(BANKS)
-                account_number = ''.join(random.choices(string.digits, k=random.randint(10, 12)))
-                
-                combo_key = (prophet["id"], bank, account_number)
-                
-                if combo_key not in used_account_combinations:
-                    used_account_combinations.add(combo_key)
-                    
-                    transaction_accounts.append({
-                        "id": short_id(),
-                        "prophet_id": prophet["id"],
-                        "account_name": f"{first} {last}",
-                        "account_number": account_number,
-                        "bank": bank,
-                        "created_at": now.isoformat(),
-                        "updated_at": now.isoformat()
-                    })
-                    break
-                attempts += 1
-
-    return transaction_accounts
-
-def generate_reviews(completed_bookings):
-    reviews = []
-    for booking in completed_bookings:
-        if random.random() < 0.8:
-            reviews.append({
-                "id": short_id(),
+def generate_transaction_accounts(prophet_ids, signups=None):
+    for prophet_id, since in zip(prophet_ids, signups or repeat(None)):
+        # Account numbers come from the same counter as the ID, so they are
+        # unique across all prophets and banks, not just per prophet
+        first, last = random_name()
+        sequence = ids.sequence("transaction_account")
+        created = now if since is None else timeline.after(since, TRANSACTION_ACCOUNT_DELAY_DAYS)
+        yield {
+            "id": ids.id_for("transaction_account", sequence),
+            "prophet_id": prophet_id,
+            "account_name": f"{first} {last}",
+            "account_number": ids.account_number(sequence),
+            "bank": random.choice(BANKS),
+            "created_at": created.isoformat(),
+            "updated_at": edited(created).isoformat()
+        }
+
+def generate_reviews(bookings):
+    for booking in bookings:
+        # Reviews only exist for completed bookings
+        if booking["status"] != "COMPLETED":
+            continue
+        if random.random() < REVIEW_PROBABILITY:
+            # With a history, reviews come some time after the booking ended, if that time has come
+            created = now if timeline is None else timeline.reviewed(booking_end(booking))
+            if created is None:
+                continue
+            yield {
+                "id": short_id("review"),
                 "customer_id": booking["customer_id"],
                 "booking_id": booking["id"],
                 "score": random.randint(3, 5),
-                "description": random.choice([
-                    "Amazing reading! Very insightful and accurate.",
-                    "Great experience, highly recommend this prophet.",
-                    "Professional service and detailed explanations.",
-                    "Wonderful session, helped me understand many things.",
-                    "Excellent guidance and spiritual insight.",
-                    ""  # Empty string instead of None for CSV compatibility
-                ]) if random.random() < 0.7 else "",
-                "created_at": now.isoformat(),
-                "updated_at": now.isoformat()
-            })
-
-    return reviews
-
-def generate_reports(customers, admins):
-    reports = []
-    for customer in customers:
-        if random.random() < 0.3:  # 30% chance instead of 20%
-            num_reports = 1  # Just one report per customer
-            for _ in range(num_reports):
-                admin = random.choice(admins) if random.random() < 0.7 and admins else None
-                
-                reports.append({
-                    "id": short_id(),
-                    "customer_id": customer["id"],
-                    "admin_id": admin["id"] if admin else "",  # Empty string instead of None
-                    "report_type": random.choice(REPORT_TYPES),
-                    "topic": random.choice([
-                        "Booking Issue", "Payment Problem", "Technical Error",
-                        "Service Quality", "Prophet Behavior", "Website Bug"
-                    ]),
-                    "description": random.choice([
-                        "Had trouble with the booking system.",
-                        "Payment was processed but booking wasn't confirmed.",
-                        "Prophet was late for the session.",
-                        "Website crashed during payment.",
-                        "Received poor quality service.",
-                        "Technical issues during the session."
-                    ]),
-                    "report_status": random.choice(REPORT_STATUSES) if admin else "PENDING",
-                    "created_at": now.isoformat(),
-                    "updated_at": now.isoformat()
-                })
-
-    return reports
-
-def main():
-    # Generate base data
-    accounts = generate_accounts()
-    save_csv("accounts", accounts)
-
-    # Generate horoscope methods first (for referencing)
-    horoscope_methods = generate_horoscope_methods()
-    save_csv("horoscope_methods", horoscope_methods)
+                "description": random.choice(REVIEW_DESCRIPTIONS) if random.random() < REVIEW_DESCRIPTION_PROBABILITY else "",
+                "created_at": created.isoformat(),
+                "updated_at": created.isoformat()
+            }
+
+def generate_reports(customer_ids, admin_ids, signups=None):
+    for customer_id, since in zip(customer_ids, signups or repeat(None)):
+        if random.random() < REPORT_PROBABILITY:
+            # Just one report per customer
+            admin_id = random.choice(admin_ids) if random.random() < REPORT_ASSIGNED_PROBABILITY and admin_ids else None
+            # With a history, filed after signup; an assigned report is open until it is resolved
+            created = resolved = now
+            if since is not None:
+                created = timeline.reported(since)
+                resolved = timeline.resolved(created) if admin_id else None
+            
+            yield {
+                "id": short_id("report"),
+                "customer_id": customer_id,
+                "admin_id": admin_id or "",  # Empty string instead of None
+                "report_type": random.choice(REPORT_TYPES),
+                "topic": random.choice(REPORT_TOPICS),
+                "description": random.choice(REPORT_DESCRIPTIONS),
+                "report_status": random.choice(REPORT_STATUSES) if admin_id and resolved else "PENDING",
+                "created_at": created.isoformat(),
+                "updated_at": (resolved or created).isoformat()
+            }
+
+def shard_seed(master_seed, shard):
+    """Deterministic seed for one shard's RNG stream, derived from the master seed"""
+    digest = hashlib.sha256(f"{master_seed}:{shard}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+def stage_seed(seed, stage):
+    """Seed of one stage's RNG stream; both schedulers use it, so they write the same rows"""
+    return None if seed is None else shard_seed(seed, f"stage:{stage}")
+
+def split_evenly(total, parts):
+    """Split total into `parts` counts that differ by at most one"""
+    return [total // parts + (i < total % parts) for i in range(parts)]
+
+def shard_dir(base_dir, shard):
+    return os.path.join(base_dir, "shards", f"shard-{shard}")
+
+def generate_dataset(scale, first_index=None, admin_ids=None, seed=None):
+    """Generate every table except horoscope_methods into output_dir.
 
+    Only compact keys of parent tables are kept in memory, every table is
+    streamed row by row into its CSV file. Each stage draws from the RNG
+    stream stage_seed(seed, stage), as under --scheduler dag, so a seeded run
+    writes the same rows with either scheduler. ``admin_ids`` lets a shard
+    assign reports to admins generated elsewhere. Returns the row counts per table
+    plus the summary numbers printed by main().
+    """
+    if engine == "numpy":
+        # Imported lazily so NumPy is only needed for --engine numpy
+        import vectorized
+        # Seeded from the random module so seeded and sharded runs stay reproducible
+        return vectorized.generate_dataset(
+            scale, ids, now, save_blocks, seed=random.getrandbits(64),
+            ranges=account_ranges(scale, first_index), admin_ids=admin_ids, passwords=passwords, metrics=metrics,
+        )
+
+    context = {"scale": scale, "first_index": first_index, "admin_ids": admin_ids}
+    outputs, counts = run_sequential(DATASET_STAGES, context, lambda stage: random.seed(stage_seed(seed, stage.name)))
+    return counts, dataset_summary(outputs), outputs["accounts"]["ADMIN"]
+
+# Stages of generate_dataset: each streams its tables to output_dir and
+# returns the compact keys its dependents need (see scheduler.py)
+
+def _accounts_stage(context, inputs):
+    account_ids = defaultdict(list)
+    counts = save_csv("accounts", keep_keys(
+        generate_accounts(account_ranges(context["scale"], context["first_index"])),
+        lambda a: account_ids[a["role"]].append(a["id"])
+    ))
+    return counts, {role: account_ids[role] for role in ROLES}
+
+def _user_details_stage(context, inputs):
     # User Details with explicit auto-increment ID
-    user_details = generate_user_details(accounts)
-    save_csv("user_details", user_details)
+    account_ids = inputs["accounts"]
+    roles = ("CUSTOMER", "PROPHET", "ADMIN")
+    created = None
+    if timeline is not None:
+        created = chain.from_iterable(signups(context, role, len(account_ids[role])) for role in roles)
+    return save_csv("user_details", generate_user_details(
+        chain.from_iterable(account_ids[role] for role in roles), created
+    )), None
 
+def _customers_stage(context, inputs):
     # Customers (only from CUSTOMER accounts)
-    customer_accounts = [a for a in accounts if a["role"] == "CUSTOMER"]
-    customers = generate_customers(customer_accounts)
-    save_csv("customers", customers)
+    customer_ids = []
+    account_ids = inputs["accounts"]["CUSTOMER"]
+    counts = save_csv("customers", keep_keys(
+        generate_customers(account_ids, signups(context, "CUSTOMER", len(account_ids))),
+        lambda c: customer_ids.append(c["id"])
+    ))
+    return counts, customer_ids
 
+def _prophets_stage(context, inputs):
     # Prophets (only from PROPHET accounts)
-    prophet_accounts = [a for a in accounts if a["role"] == "PROPHET"]
-    prophets = generate_prophets(prophet_accounts)
-    save_csv("prophets", prophets)
+    prophet_ids = []
+    account_ids = inputs["accounts"]["PROPHET"]
+    counts = save_csv("prophets", keep_keys(
+        generate_prophets(account_ids, signups(context, "PROPHET", len(account_ids))),
+        lambda p: prophet_ids.append(p["id"])
+    ))
+    return counts, prophet_ids
 
-    # Admins (only from ADMIN accounts)
-    admins = [a for a in accounts if a["role"] == "ADMIN"]
+def _prophet_methods_stage(context, inputs):
+    return save_csv("prophet_methods", generate_prophet_methods(inputs["prophets"], generate_horoscope_methods())), None
 
-    # Prophet Methods
-    prophet_methods = generate_prophet_methods(prophets, horoscope_methods)
-    save_csv("prophet_methods", prophet_methods)
+def _prophet_availabilities_stage(context, inputs):
+    # Prophet Availabilities with explicit auto-increment ID, indexed into
+    # the calendar bookings are taken from; with a history, from its first day on
+    scale = context["scale"]
+    calendar = AvailabilityCalendar(COURSE_DURATIONS, hours=hour_profile(scale["booking_hours"]))
+    history_days = 0 if timeline is None else timeline.days
+    counts = save_csv("prophet_availabilities", generate_prophet_availabilities(
+        inputs["prophets"], calendar, history_days + scale["availability_days"], -history_days,
+        signups(context, "PROPHET", len(inputs["prophets"])),
+    ))
+    return counts, calendar
 
-    # Prophet Availabilities with explicit auto-increment ID
-    prophet_availabilities = generate_prophet_availabilities(prophets)
-    save_csv("prophet_availabilities", prophet_availabilities)
+def _courses_stage(context, inputs):
+    # Courses - only active ones are kept for booking generation, with their
+    # price for the booking transactions and, with a history, their creation
+    active_courses = []
+    course_prices = {}
+    course_since = {}
+    def keep_active_course(course):
+        if course["is_active"]:
+            active_courses.append((course["id"], course["prophet_id"], course["duration_min"]))
+            course_prices[course["id"]] = course["price"]
+            if timeline is not None:
+                course_since[course["id"]] = datetime.fromisoformat(course["created_at"])
 
-    # Courses
-    courses = generate_courses(prophets, horoscope_methods)
-    save_csv("courses", courses)
+    counts = save_csv("courses", keep_keys(
+        generate_courses(inputs["prophets"], generate_horoscope_methods(), signups(context, "PROPHET", len(inputs["prophets"]))),
+        keep_active_course
+    ))
+    return counts, (active_courses, course_prices, course_since)
 
-    # Active courses for booking generation
-    active_courses = [c for c in courses if c["is_active"]]
+def _bookings_stage(context, inputs):
+    # Bookings, with their transactions and reviews (only for completed
+    # bookings) derived from each booking as it is written
+    active_courses, course_prices, course_since = inputs["courses"]
+    completed_bookings = 0
+    def count_completed(booking):
+        nonlocal completed_bookings
+        completed_bookings += booking["status"] == "COMPLETED"
 
-    # Bookings
-    bookings = generate_bookings(customers, active_courses, prophet_availabilities)
-    save_csv("bookings", bookings)
+    counts = save_csv(
+        "bookings",
+        keep_keys(generate_bookings(
+            inputs["customers"], active_courses, inputs["prophet_availabilities"], context["scale"],
+            signups=signups(context, "CUSTOMER", len(inputs["customers"])), course_since=course_since,
+        ), count_completed),
+        derived=[
+            ("transactions", lambda bookings: generate_transactions(bookings, course_prices)),
+            ("reviews", generate_reviews),
+        ],
+    )
+    return counts, completed_bookings
 
-    # Transactions
-    transactions = generate_transactions(bookings)
-    save_csv("transactions", transactions)
+def _transaction_accounts_stage(context, inputs):
+    return save_csv("transaction_accounts", generate_transaction_accounts(
+        inputs["prophets"], signups(context, "PROPHET", len(inputs["prophets"]))
+    )), None
 
-    # Transaction Accounts
-    transaction_accounts = generate_transaction_accounts(prophets)
-    save_csv("transaction_accounts", transaction_accounts)
+def _reports_stage(context, inputs):
+    # A shard assigns reports to the admins generated in the admins shard
+    admin_ids = context["admin_ids"]
+    if admin_ids is None:
+        admin_ids = inputs["accounts"]["ADMIN"]
+    return save_csv("reports", generate_reports(
+        inputs["customers"], admin_ids, signups(context, "CUSTOMER", len(inputs["customers"]))
+    )), None
 
-    # Reviews (only for completed bookings)
-    completed_bookings = [b for b in bookings if b["status"] == "COMPLETED"]
-    reviews = generate_reviews(completed_bookings)
-    save_csv("reviews", reviews)
+# In the order the sequential run generates them, which keeps seeded output stable
+DATASET_STAGES = [
+    Stage("accounts", (), _accounts_stage),
+    Stage("user_details", ("accounts",), _user_details_stage),
+    Stage("customers", ("accounts",), _customers_stage),
+    Stage("prophets", ("accounts",), _prophets_stage),
+    Stage("prophet_methods", ("prophets",), _prophet_methods_stage),
+    Stage("prophet_availabilities", ("prophets",), _prophet_availabilities_stage),
+    Stage("courses", ("prophets",), _courses_stage),
+    Stage("bookings", ("customers", "prophet_availabilities", "courses"), _bookings_stage),
+    Stage("transaction_accounts", ("prophets",), _transaction_accounts_stage),
+    Stage("reports", ("accounts", "customers"), _reports_stage),
+]
+STAGES_BY_NAME = {stage.name: stage for stage in DATASET_STAGES}
 
-    # Reports
-    reports = generate_reports(customers, admins)
-    save_csv("reports", reports)
+def dataset_summary(outputs):
+    """Summary numbers printed by main() from the stage outputs"""
+    return {
+        "customers": len(outputs["customers"]),
+        "prophets": len(outputs["prophets"]),
+        "admins": len(outputs["accounts"]["ADMIN"]),
+        "active_courses": len(outputs["courses"][0]),
+        "completed_bookings": outputs["bookings"],
+    }
 
-    print("\n✅ Complete mock CSV files generated successfully in csv_output directory!")
-    print("\nGenerated Tables:")
+def _run_stage(job):
+    """Process pool entry point of --scheduler dag: run one stage with its own RNG stream"""
+    global now, timeline, output_dir, output_format, chunk_rows, compression, partition, ids, metrics, oracle, background_writers, sink, passwords
+    random.seed(stage_seed(job["seed"], job["stage"]))
+    # Every ID namespace belongs to one stage, so sharing the ID space is safe
+    ids = IdEngine(job["id_seed"])
+    now = job["now"]
+    timeline = timeline_for(job["context"]["scale"], job["seed"])
+    output_dir = job["output_dir"]
+    output_format = job["output_format"]
+    chunk_rows = job["chunk_rows"]
+    compression = job["compression"]
+    partition = job["partition"]
+    passwords = job["passwords"]
+    sink = job["sink"]
+    background_writers = True
+    written_chunks.clear()
+    metrics = Metrics(job["profile"], job["profile_dir"])
+    oracle = Oracle()
+    counts, output = STAGES_BY_NAME[job["stage"]].run(job["context"], job["inputs"])
+    return output, counts, written_chunks, metrics.stages, oracle
+
+def generate_parallel(scale, seed, workers=None, sink=None):
+    """Generate the dataset with --scheduler dag: DATASET_STAGES in a process pool, as their needs finish.
+
+    Every stage gets its own RNG stream, stage_seed(seed, name), so the output
+    depends on the seed only, not on which stages happened to run together,
+    and is the same as the sequential run's. Rows go to the files, or to `sink` when given, through
+    BackgroundWriter threads.
+    Returns the row counts, the summary and the critical path of the run.
+    """
+    job = {
+        "seed": seed,
+        "id_seed": ids.seed,
+        "now": now,
+        "output_dir": output_dir,
+        "output_format": output_format,
+        "chunk_rows": chunk_rows,
+        "compression": compression,
+        "partition": partition,
+        "passwords": passwords,
+        "sink": sink,
+        "profile": metrics.profile,
+        "profile_dir": metrics.profile_dir,
+        "context": {"scale": scale, "first_index": None, "admin_ids": None},
+    }
+    results = run_parallel(
+        DATASET_STAGES, lambda stage, inputs: {**job, "stage": stage.name, "inputs": inputs}, _run_stage, workers
+    )
+
+    # Merged in stage order, so the manifest does not depend on completion order
+    counts, outputs, durations = {}, {}, {}
+    for stage in DATASET_STAGES:
+        outputs[stage.name], stage_counts, stage_chunks, stage_metrics, stage_oracle = results[stage.name]
+        counts.update(stage_counts)
+        oracle.merge(stage_oracle)
+        for name, entries in stage_chunks.items():
+            written_chunks.setdefault(name, []).extend(entries)
+        metrics.stages.extend(stage_metrics)
+        durations[stage.name] = sum(entry["wall_s"] for entry in stage_metrics)
+    return counts, dataset_summary(outputs), critical_path(DATASET_STAGES, durations)
+
+def _generate_shard(job):
+    """Process pool entry point: generate one shard with its own RNG stream"""
+    global now, timeline, output_dir, output_format, chunk_rows, compression, partition, passwords, engine, ids, metrics, oracle
+    random.seed(job["seed"])
+    # ID space 0 belongs to the admins shard
+    ids = IdEngine(job["id_seed"], space=job["shard"] + 1)
+    now = job["now"]
+    # The shard's own seed is derived; signups follow the master seed, which is the ID seed
+    timeline = timeline_for(job["scale"], job["id_seed"])
+    output_dir = shard_dir(job["base_dir"], job["shard"])
+    output_format = job["output_format"]
+    chunk_rows = job["chunk_rows"]
+    compression = job["compression"]
+    partition = job["partition"]
+    passwords = job["passwords"]
+    engine = job["engine"]
+    written_chunks.clear()
+    metrics = Metrics(job["profile"], job["profile_dir"], shard=job["shard"])
+    oracle = Oracle()
+    counts, summary, _ = generate_dataset(job["scale"], job["first_index"], job["admin_ids"], job["seed"])
+    return counts, summary, written_chunks, metrics.stages, oracle
+
+def generate_sharded(scale, seed, num_shards, workers=None):
+    """Split customers and prophets into shards and generate them in a process pool.
+
+    Admin accounts are generated first in their own "admins" shard so every
+    shard can assign reports to them. Customers only book courses of prophets
+    in their own shard. Each shard writes complete CSV files under
+    ``shards/shard-<n>`` seeded with shard_seed(seed, n), so the output only
+    depends on the seed and the shard count, not on scheduling.
+    """
+    global output_dir, ids
+    base_dir = output_dir
+
+    random.seed(shard_seed(seed, "admins"))
+    ids = IdEngine(seed, space=0)
+    output_dir = shard_dir(base_dir, "admins")
+    admin_scale = {**scale, "customers": 0, "prophets": 0}
+    admin_first_index = {"CUSTOMER": 0, "PROPHET": 0, "ADMIN": scale["customers"] + scale["prophets"]}
+    metrics.shard = "admins"
+    counts, summary, admin_ids = generate_dataset(admin_scale, admin_first_index, seed=shard_seed(seed, "admins"))
+    metrics.shard = None
+    output_dir = base_dir
+
+    customer_counts = split_evenly(scale["customers"], num_shards)
+    prophet_counts = split_evenly(scale["prophets"], num_shards)
+    jobs = []
+    first_customer = 0
+    first_prophet = scale["customers"]
+    for shard in range(num_shards):
+        shard_scale = {**scale, "customers": customer_counts[shard], "prophets": prophet_counts[shard], "admins": 0}
+        first_index = {"CUSTOMER": first_customer, "PROPHET": first_prophet, "ADMIN": 0}
+        jobs.append({
+            "shard": shard,
+            "seed": shard_seed(seed, shard),
+            "id_seed": seed,
+            "now": now,
+            "base_dir": base_dir,
+            "output_format": output_format,
+            "chunk_rows": chunk_rows,
+            "compression": compression,
+            "partition": partition,
+            "passwords": passwords,
+            "engine": engine,
+            "scale": shard_scale,
+            "first_index": first_index,
+            "admin_ids": admin_ids,
+            "profile": metrics.profile,
+            "profile_dir": metrics.profile_dir,
+        })
+        first_customer += customer_counts[shard]
+        first_prophet += prophet_counts[shard]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() returns results in shard order regardless of completion order
+        for shard_counts, shard_summary, shard_chunks, shard_stages, shard_oracle in pool.map(_generate_shard, jobs):
+            metrics.stages.extend(shard_stages)
+            oracle.merge(shard_oracle)
+            for name, entries in shard_chunks.items():
+                written_chunks.setdefault(name, []).extend(entries)
+            for name, value in shard_counts.items():
+                counts[name] = counts.get(name, 0) + value
+            for name, value in shard_summary.items():
+                summary[name] += value
+
+    return counts, summary
+
+def merge_shards(table_names):
+    """Combine the per-shard files of the sharded tables into output_dir, then drop the parts.
+
+    Single uncompressed text files are concatenated, in shard order, into one
+    file per table. Chunked, compressed and Parquet parts are moved instead and
+    numbered across shards, so every table becomes one chunk sequence. With
+    --partition the same happens per month, into its partition directory.
+    """
+    writer_class = OUTPUT_FORMATS[output_format]
+    suffix = writer_class.suffix(compression)
+    concatenate = writer_class.concatenable and not chunk_rows and compression is None
+    for name in table_names:
+        entries = written_chunks.get(name)
+        if not entries:
+            continue
+        stem = writer_class.base_name(name)
+        months = {}
+        for entry in entries:
+            months.setdefault(entry.get("partition"), []).append(entry)
+        merged = []
+        for month in sorted(months, key=lambda m: (m is not None, m or "")):
+            parts = months[month]
+            directory = output_dir if month is None else partition_dir(output_dir, name, month)
+            os.makedirs(directory, exist_ok=True)
+            if concatenate:
+                path = os.path.join(directory, stem + suffix)
+                with ChecksumFile(path) as out:
+                    for i, entry in enumerate(parts):
+                        with open(entry["path"], "rb") as f:
+                            if writer_class.has_header:
+                                header = f.readline()
+                                if i == 0:
+                                    out.write(header)
+                            shutil.copyfileobj(f, out)
+                parts = [{"path": path, "rows": sum(e["rows"] for e in parts), "bytes": out.size, "sha256": out.hexdigest()}]
+                if month is not None:
+                    parts[0]["partition"] = month
+            else:
+                for i, entry in enumerate(parts):
+                    path = os.path.join(directory, f"{stem}.part-{i:05d}{suffix}")
+                    os.replace(entry["path"], path)
+                    entry["path"] = path
+            merged.extend(parts)
+        entries[:] = merged
+    shutil.rmtree(os.path.join(output_dir, "shards"))
 
-    # Show statistics
+def advance_dataset(days, scale):
+    """Append the next `days` days to the dataset in output_dir without rewriting it.
+
+    The bookings and availability follow the scale recorded in the manifest;
+    `scale` only stands in for datasets from before manifests recorded one.
+    Reads back only compact keys (dataset_state.read_state), moves the clock
+    forward and writes the new rows as a delta under ``deltas/<date>``, with
+    its own manifest, in the dataset's format: SCHEDULED bookings that have
+    ended become COMPLETED or FAILED (booking_status_updates, plus reviews),
+    prophets get availability up to availability_days ahead again, and
+    customers book into it. The top-level manifest lists the delta's chunks
+    too, so the next increment picks them up.
+    """
+    global now, ids, output_dir, chunk_rows, compression, oracle
+    base_dir = output_dir
+    state = read_state(base_dir)
+    manifest = state.manifest
+    if manifest["id_spaces"] >= MAX_SPACES:
+        raise OverflowError(f"{base_dir} has no ID space left for another increment")
+    scale = manifest.get("scale", scale)
+
+    now = datetime.fromisoformat(manifest["now"]) + timedelta(days=days)
+    if manifest["seed"] is not None:
+        random.seed(shard_seed(manifest["seed"], f"advance:{now.isoformat()}"))
+    # Every increment draws its IDs from a space of its own
+    ids = IdEngine(manifest["id_seed"], space=manifest["id_spaces"])
+    chunk_rows = manifest["chunk_rows"]
+    compression = manifest["compression"]
+    output_dir = os.path.join(base_dir, "deltas", now.date().isoformat())
+    written_chunks.clear()
+    counts = {}
+
+    # Earlier bookings first: completed ones may be reviewed
+    scheduled = state.scheduled_bookings
+
+    def booking_context(booking_id):
+        _, _, prophet_key, course_key = scheduled[key(booking_id)]
+        return hex_id(prophet_key), hex_id(course_key), state.course_prices.get(hex_id(course_key))
+
+    # Datasets from before oracle.json get none: it would only cover the increment
+    continued = load_oracle(base_dir, booking_context)
+    oracle = continued or Oracle(booking_context)
+    counts.update(save_csv("booking_status_updates", generate_booking_status_updates(scheduled), derived=[
+        ("reviews", lambda updates: generate_reviews(
+            {"id": u["id"], "customer_id": hex_id(scheduled[key(u["id"])][0]), "status": u["status"]} for u in updates
+        )),
+    ]))
+
+    # Only days after the last available one are new, so the new bookings
+    # cannot overlap any earlier booking
+    calendar = AvailabilityCalendar(COURSE_DURATIONS, hours=hour_profile(scale["booking_hours"]))
+    first_day = 0
+    if state.last_available_date is not None:
+        first_day = max((state.last_available_date - now.date()).days + 1, 0)
+    counts.update(save_csv("prophet_availabilities", generate_prophet_availabilities(
+        state.prophet_ids, calendar, max(scale["availability_days"] - first_day, 0), first_day
+    )))
+
+    counts.update(save_csv(
+        "bookings",
+        generate_bookings(state.customer_ids, state.active_courses, calendar, scale, statuses=["SCHEDULED"]),
+        derived=[("transactions", lambda bookings: generate_transactions(bookings, state.course_prices))],
+    ))
+
+    options = {"format": manifest["format"], "compression": compression, "chunk_rows": chunk_rows}
+    write_manifest(output_dir, written_chunks, **options, now=now.isoformat())
+
+    tables = {name: [{**entry, "path": os.path.join(base_dir, entry["path"])} for entry in table["chunks"]]
+              for name, table in manifest["tables"].items()}
+    for name, entries in written_chunks.items():
+        tables.setdefault(name, []).extend(entries)
+    write_manifest(
+        base_dir, tables, **options, seed=manifest["seed"], id_seed=manifest["id_seed"], passwords=manifest.get("passwords"), scale=scale,
+        id_spaces=manifest["id_spaces"] + 1, now=now.isoformat(),
+        increments=manifest.get("increments", []) + [{"days": days, "path": os.path.relpath(output_dir, base_dir)}],
+    )
+    if continued is not None:
+        print(f"Updated oracle in {write_oracle(base_dir, oracle, seed=manifest['seed'], now=now.isoformat())}")
+    return counts
+
+def save_traces(directory, sessions):
+    """Write TRACE_FILE with `sessions` API sessions against the csv dataset in directory (see traces.py)"""
+    manifest = load_manifest(directory)
+    if manifest["format"] != "csv":
+        raise ValueError(f"Request traces need a csv dataset, {directory} is {manifest['format']}")
+    # Own RNG stream, so traces do not change the dataset and follow its clock
+    rng = random.Random(None if manifest["seed"] is None else shard_seed(manifest["seed"], f"traces:{manifest['now']}"))
+    generator = TraceGenerator(directory, manifest, sessions, rng)
+
+    path = os.path.join(directory, TRACE_FILE + COMPRESSION_SUFFIXES[manifest["compression"]])
+    with ChecksumFile(path) as raw, compressed(raw, manifest["compression"]) as stream:
+        text = io.TextIOWrapper(stream, encoding="utf-8")
+        counts = write_traces(text, generator.requests(sessions))
+        text.flush()
+        text.detach()
+    print(f"Saved {sum(counts.values())} requests of {sessions} sessions to {path}")
+    for op in sorted(counts):
+        print(f"  - {op}: {counts[op]}")
+    return counts
+
+def print_table_stats():
+    """Print row counts per table from the writers' counts instead of re-reading the files"""
     total_records = 0
-    for filename in sorted(os.listdir(output_dir)):
-        if filename.endswith('.csv'):
-            with open(os.path.join(output_dir, filename), 'r', encoding='utf-8') as f:
-                line_count = sum(1 for _ in f) - 1
-            print(f"  - {filename}: {line_count} records")
-            total_records += line_count
+    for name in sorted(written_chunks):
+        entries = written_chunks[name]
+        if not entries:
+            continue
+        line_count = sum(entry["rows"] for entry in entries)
+        files = os.path.basename(entries[0]["path"]) if len(entries) == 1 else f"{len(entries)} files"
+        print(f"  - {name} ({files}): {line_count} records")
+        total_records += line_count
 
     print(f"\nTotal records generated: {total_records}")
 
+def add_scale_arguments(parser):
+    """Options for the size, shape, seed and clock of a generated dataset, shared with pg_load.py"""
+    parser.add_argument("--customers", type=int, default=DEFAULT_SCALE["customers"], help="Number of CUSTOMER accounts")
+    parser.add_argument("--prophets", type=int, default=DEFAULT_SCALE["prophets"], help="Number of PROPHET accounts")
+    parser.add_argument("--admins", type=int, default=DEFAULT_SCALE["admins"], help="Number of ADMIN accounts")
+    parser.add_argument("--availability-days", type=int, default=DEFAULT_SCALE["availability_days"], help="Days of prophet availability to generate")
+    parser.add_argument("--min-bookings", type=int, default=DEFAULT_SCALE["min_bookings_per_customer"], help="Minimum bookings per customer")
+    parser.add_argument("--max-bookings", type=int, default=DEFAULT_SCALE["max_bookings_per_customer"], help="Maximum bookings per customer")
+    parser.add_argument("--prophet-skew", type=float, default=DEFAULT_SCALE["prophet_skew"],
+                        help="Zipf exponent of prophet popularity for bookings (0 = uniform, ~1 = a few hot prophets)")
+    parser.add_argument("--course-skew", type=float, default=DEFAULT_SCALE["course_skew"],
+                        help="Zipf exponent of course popularity within each prophet's share of bookings")
+    parser.add_argument("--customer-skew", type=float, default=DEFAULT_SCALE["customer_skew"],
+                        help="Zipf exponent of bookings per customer; keeps the mean of --min/--max-bookings")
+    parser.add_argument("--booking-hours", choices=sorted(HOUR_PROFILES), default=DEFAULT_SCALE["booking_hours"],
+                        help="Hour-of-day profile booking start times are drawn from")
+    parser.add_argument("--history-days", type=int, default=DEFAULT_SCALE["history_days"],
+                        help="Generate this many days of history before now: signups, bookings, payouts, reviews and "
+                             "reports spread over time, with --min/--max-bookings per 30 days of membership (--engine python)")
+    parser.add_argument("--password-hashes", choices=PASSWORD_MODES, default="random",
+                        help="random text; or real bcrypt hashes of known passwords: pooled gives every account "
+                             "'password123' (from a pool of salted hashes), per-account '<username>-password123' (requires bcrypt)")
+    parser.add_argument("--password-pool", type=int, default=DEFAULT_POOL, help="Distinct hashes of --password-hashes pooled")
+    parser.add_argument("--bcrypt-cost", type=int,
+                        help="bcrypt cost of the password hashes (default: $SALT_ROUND or 10, as src/config/hash.config.ts)")
+    parser.add_argument("--password-cache", default=PASSWORD_CACHE,
+                        help="SQLite file of the bcrypt hashes computed so far, reused by every run")
+    parser.add_argument("--seed", type=int, help="Master seed; makes the output reproducible")
+    parser.add_argument("--now", type=datetime.fromisoformat,
+                        help="Reference UTC time for generated timestamps (default: current time, or today's midnight when --seed is set)")
+
+def check_scale_arguments(parser, args):
+    if args.min_bookings > args.max_bookings:
+        parser.error("--min-bookings must not exceed --max-bookings")
+    if min(args.prophet_skew, args.course_skew, args.customer_skew) < 0:
+        parser.error("skew exponents must not be negative")
+    if args.history_days < 0:
+        parser.error("--history-days must not be negative")
+    if args.password_hashes != "random":
+        if importlib.util.find_spec("bcrypt") is None:
+            parser.error("--password-hashes requires bcrypt (pip install bcrypt)")
+        if args.bcrypt_cost is None:
+            try:
+                args.bcrypt_cost = default_cost()
+            except ValueError as error:
+                parser.error(str(error))
+        if not 4 <= args.bcrypt_cost <= 31:
+            parser.error("--bcrypt-cost must be between 4 and 31")
+        if args.password_pool < 1:
+            parser.error("--password-pool must be positive")
+
+def passwords_from_args(args):
+    if args.password_hashes == "random":
+        return None
+    return PasswordHashes(args.password_hashes, args.bcrypt_cost, args.password_pool, args.password_cache)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate mock CSV data for the DooDoung backend")
+    parser.add_argument("--output-dir", default=output_dir, help="Directory to write CSV files into")
+    parser.add_argument("--format", choices=sorted(OUTPUT_FORMATS), default=output_format,
+                        help="csv for prisma/seed.ts, copy for PostgreSQL COPY files plus a load.sql script, or parquet (requires pyarrow)")
+    parser.add_argument("--chunk-rows", type=int, help="Split every table into rolling chunk files of this many rows")
+    parser.add_argument("--compression", choices=["none", *(c for c in COMPRESSION_SUFFIXES if c)], default="none",
+                        help="Compress csv/copy files, or the column codec for parquet (zstd requires zstandard for csv/copy)")
+    parser.add_argument("--engine", choices=ENGINES, default=engine,
+                        help="python generates row by row; numpy generates column-wise blocks (requires numpy)")
+    parser.add_argument("--partition", choices=PARTITIONS,
+                        help="Write every table as one directory per month, <table>/month=YYYY-MM/, by created_at "
+                             "(bookings by start, availability by date)")
+    add_scale_arguments(parser)
+    parser.add_argument("--scheduler", choices=SCHEDULERS, default="sequential",
+                        help="dag runs independent tables at the same time in a process pool, with background "
+                             "writer threads (its seeded output differs from sequential's)")
+    parser.add_argument("--shards", type=int, default=0, help="Generate in this many shards using a process pool (requires --seed)")
+    parser.add_argument("--workers", type=int, help="Process pool size for --shards or --scheduler dag (default: CPU count)")
+    parser.add_argument("--keep-shards", action="store_true", help="Keep per-shard CSV parts under shards/ instead of merging them")
+    parser.add_argument("--advance-days", type=int,
+                        help="Advance the clock of the existing CSV dataset in --output-dir by this many days and "
+                             "write only the new rows under deltas/ (format, chunking, scale and seed come from its manifest)")
+    parser.add_argument("--profile", choices=PROFILE_MODES,
+                        help=f"Profile every stage with cProfile (cpu), tracemalloc (memory) or both; hot spots go into "
+                             f"{METRICS_FILE}, cProfile dumps into {PROFILE_DIR}/")
+    parser.add_argument("--trace-sessions", type=int,
+                        help=f"Also write {TRACE_FILE}: this many API sessions (logins, course searches, availability "
+                             "lookups, bookings of free slots) against the csv dataset, for replay.py")
+    parser.add_argument("--trace-only", action="store_true",
+                        help="Only write the --trace-sessions trace for the existing dataset in --output-dir")
+    parser.add_argument("--cache-dir", default=os.environ.get("MOCK_DATA_CACHE"),
+                        help="Reuse seeded datasets generated before with the same options, schema and code from this cache (default: $MOCK_DATA_CACHE)")
+    parser.add_argument("--cache-max-gb", type=float, default=DEFAULT_MAX_GB,
+                        help="Evict least recently used cached datasets beyond this total size")
+    parser.add_argument("--cache-link", choices=LINK_MODES, default="copy",
+                        help="How chunks go into the cache and back into --output-dir: copied, or hard-linked (falling back to "
+                             "symlinks across file systems, and making the output read-only) or symlinked to the cached files")
+    parser.add_argument("--cache-verify", action="store_true",
+                        help="Check the SHA-256 of every cached file before reusing it, not only its size and modification time")
+    args = parser.parse_args(argv)
+    check_scale_arguments(parser, args)
+    if args.shards and args.seed is None:
+        parser.error("--shards requires --seed")
+    if args.shards >= MAX_SPACES:
+        parser.error(f"--shards must be below {MAX_SPACES}")
+    if args.scheduler == "dag" and (args.shards or args.engine != "python" or args.advance_days is not None):
+        parser.error("--scheduler dag only runs unsharded with --engine python, and not with --advance-days")
+    if args.engine == "numpy" and importlib.util.find_spec("numpy") is None:
+        parser.error("--engine numpy requires numpy (pip install numpy)")
+    if args.advance_days is not None:
+        if args.advance_days < 1:
+            parser.error("--advance-days must be positive")
+        if args.shards or args.engine != "python":
+            parser.error("--advance-days only runs unsharded with --engine python")
+        if args.history_days or args.partition:
+            parser.error("--history-days and --partition are for generating; --advance-days keeps the dataset's layout")
+        changed = [name for name, value in scale_from_args(args).items() if value != DEFAULT_SCALE[name]]
+        if changed:
+            parser.error(f"--advance-days takes the scale from the dataset's manifest, drop the scale options ({', '.join(changed)})")
+    if args.history_days and args.engine != "python":
+        parser.error("--history-days requires --engine python")
+    if args.trace_sessions is not None:
+        if args.trace_sessions < 1:
+            parser.error("--trace-sessions must be positive")
+        if args.format != "csv" and not (args.trace_only or args.advance_days):
+            parser.error("--trace-sessions needs --format csv")
+    elif args.trace_only:
+        parser.error("--trace-only requires --trace-sessions")
+    if args.chunk_rows is not None and args.chunk_rows < 1:
+        parser.error("--chunk-rows must be positive")
+    if args.cache_max_gb <= 0:
+        parser.error("--cache-max-gb must be positive")
+    if args.format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        parser.error("--format parquet requires pyarrow (pip install pyarrow)")
+    if args.compression == "zstd" and args.format != "parquet" and importlib.util.find_spec("zstandard") is None:
+        parser.error("--compression zstd requires zstandard (pip install zstandard)")
+    return args
+
+def clock_from_args(args):
+    """Reference time of a run: --now, or today's midnight for seeded runs, which must not depend on the wall clock"""
+    if args.now is not None:
+        return args.now if args.now.tzinfo else args.now.replace(tzinfo=timezone.utc)
+    if args.seed is not None:
+        return datetime.combine(now.date(), time(), timezone.utc)
+    return now
+
+def dataset_params(args, scale):
+    """What the generated rows depend on besides the schema and the code: the dataset cache key"""
+    return {
+        "scale": scale, "seed": args.seed, "now": now.isoformat(), "format": output_format, "compression": compression,
+        "chunk_rows": chunk_rows, "partition": partition, "engine": engine, "scheduler": args.scheduler,
+        "shards": args.shards, "passwords": None if passwords is None else [passwords.mode, passwords.cost, passwords.pool],
+    }
+
+def scale_from_args(args):
+    return {
+        "customers": args.customers,
+        "prophets": args.prophets,
+        "admins": args.admins,
+        "availability_days": args.availability_days,
+        "min_bookings_per_customer": args.min_bookings,
+        "max_bookings_per_customer": args.max_bookings,
+        "prophet_skew": args.prophet_skew,
+        "course_skew": args.course_skew,
+        "customer_skew": args.customer_skew,
+        "booking_hours": args.booking_hours,
+        "history_days": args.history_days,
+    }
+
+def save_metrics(**options):
+    """Write METRICS_FILE for this run into output_dir and print the stage timings"""
+    path = write_report(os.path.join(output_dir, METRICS_FILE), metrics.report(**options))
+    print("\nStage Timings:")
+    print_stages(metrics.stages)
+    print(f"\nSaved metrics to {path}")
+
+def main(argv=None):
+    global output_dir, output_format, chunk_rows, compression, partition, passwords, engine, now, timeline, ids, metrics
+    args = parse_args(argv)
+    metrics = Metrics(args.profile, os.path.join(os.path.abspath(args.output_dir), PROFILE_DIR))
+    output_dir = args.output_dir
+    output_format = args.format
+    chunk_rows = args.chunk_rows
+    compression = None if args.compression == "none" else args.compression
+    partition = args.partition
+    passwords = passwords_from_args(args)
+    engine = args.engine
+    scale = scale_from_args(args)
+
+    now = clock_from_args(args)
+    timeline = timeline_for(scale, args.seed)
+
+    if args.trace_only:
+        save_traces(output_dir, args.trace_sessions)
+        return
+
+    if args.advance_days:
+        counts = advance_dataset(args.advance_days, scale)
+        print(f"\n✅ Advanced {args.output_dir} to {now.isoformat()}, new rows in {output_dir}")
+        print("\nAppended Tables:")
+        print_table_stats()
+        print(f"\nIncrement Summary:")
+        print(f"  - Status updates: {counts['booking_status_updates']}")
+        print(f"  - New bookings: {counts['bookings']}")
+        print(f"  - New reviews: {counts['reviews']}")
+        save_metrics(mode="advance", days=args.advance_days, profile=args.profile)
+        if args.trace_sessions:
+            print()
+            save_traces(args.output_dir, args.trace_sessions)
+        return
+
+    cache = None
+    if args.cache_dir and not args.keep_shards:
+        if args.seed is None:
+            print("Not using the dataset cache: only runs with --seed are reproducible")
+        else:
+            cache = DatasetCache(args.cache_dir, int(args.cache_max_gb * 1024 ** 3))
+            params = dataset_params(args, scale)
+            cache_key = dataset_key(params)
+            if cache.restore(cache_key, output_dir, args.cache_link, args.cache_verify):
+                rows = sum(table["rows"] for table in load_manifest(output_dir)["tables"].values())
+                print(f"\n✅ Reused cached dataset {cache_key[:12]} ({rows} records) in {output_dir}")
+                if args.trace_sessions:
+                    print()
+                    save_traces(output_dir, args.trace_sessions)
+                return
+
+    if passwords is not None:
+        prepare_passwords(scale, args.workers)
+
+    # Horoscope methods are static reference data shared by every shard
+    counts = save_csv("horoscope_methods", generate_horoscope_methods())
+
+    if args.shards:
+        shard_counts, summary = generate_sharded(scale, args.seed, args.shards, args.workers)
+        counts.update(shard_counts)
+        if args.keep_shards:
+            print(f"\n✅ Shard CSV parts kept under {os.path.join(output_dir, 'shards')}")
+        else:
+            with metrics.stage("merge_shards"):
+                merge_shards(shard_counts)
+    elif args.scheduler == "dag":
+        ids = IdEngine(args.seed)
+        dataset_counts, summary, (critical_s, critical_stages) = generate_parallel(scale, args.seed, args.workers)
+        counts.update(dataset_counts)
+        print(f"\nCritical path: {' -> '.join(critical_stages)} ({critical_s:.2f}s)")
+    else:
+        if args.seed is not None:
+            random.seed(args.seed)
+        ids = IdEngine(args.seed)
+        dataset_counts, summary, _ = generate_dataset(scale, seed=args.seed)
+        counts.update(dataset_counts)
+
+    if output_format == "copy":
+        write_load_script(output_dir, written_chunks, compression)
+    write_manifest(
+        output_dir, written_chunks, format=output_format, compression=compression, chunk_rows=chunk_rows,
+        # What --advance-days needs to continue the dataset
+        seed=args.seed, id_seed=ids.seed, id_spaces=args.shards + 1, now=now.isoformat(), passwords=args.password_hashes,
+        scale=scale,
+    )
+    print(f"Saved oracle to {write_oracle(output_dir, oracle, seed=args.seed, now=now.isoformat())}")
+    if cache is not None:
+        cache.store(cache_key, output_dir, params, args.cache_link)
+        print(f"Cached dataset as {cache_key[:12]} in {args.cache_dir}")
+
+    print(f"\n✅ Complete mock {output_format.upper()} files generated successfully in {output_dir}!")
+    print("\nGenerated Tables:")
+
+    print_table_stats()
+
     # Show relationship summary
     print(f"\nRelationship Summary:")
-    print(f"  - Accounts: {len(accounts)}")
-    print(f"    - Customers: {len(customers)}")
-    print(f"    - Prophets: {len(prophets)}")
-    print(f"    - Admins: {len(admins)}")
-    print(f"  - Active Courses: {len(active_courses)}")
-    print(f"  - Bookings: {len(bookings)}")
-    print(f"    - Completed: {len([b for b in bookings if b['status'] == 'COMPLETED'])}")
-    print(f"  - Reviews: {len(reviews)}")
-    print(f"  - Reports: {len(reports)}")
+    print(f"  - Accounts: {counts['accounts']}")
+    print(f"    - Customers: {summary['customers']}")
+    print(f"    - Prophets: {summary['prophets']}")
+    print(f"    - Admins: {summary['admins']}")
+    print(f"  - Active Courses: {summary['active_courses']}")
+    print(f"  - Bookings: {counts['bookings']}")
+    print(f"    - Completed: {summary['completed_bookings']}")
+    print(f"  - Reviews: {counts['reviews']}")
+    print(f"  - Reports: {counts['reports']}")
+
+    save_metrics(
+        mode="generate", engine=engine, format=output_format, compression=compression, chunk_rows=chunk_rows,
+        partition=partition, scheduler=args.scheduler, shards=args.shards, workers=args.workers, seed=args.seed, profile=args.profile, scale=scale,
+    )
+
+    if args.trace_sessions:
+        print()
+        save_traces(output_dir, args.trace_sessions)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,223 @@
+"""Expected aggregates of a generated dataset, accumulated while it is written.
+
+Load tests compare what the API returns against ``oracle.json``:
+
+- ``bookings_by_status``, overall and per prophet;
+- review count, score total and average score per prophet and per course;
+- completed-booking revenue per prophet, split by payout status of the
+  booking's transaction;
+- ``reports_by_status`` and the open (PENDING) reports per assigned admin,
+  with unassigned ones under "unassigned".
+
+Rows are observed as save_csv / save_blocks stream them, so nothing is read
+twice. Transactions and reviews are generated right after their booking
+(row by row, or block after block), so the oracle only remembers the
+bookings it saw last to attribute them to a prophet and course. Only
+prophets and courses that occur have entries; anything missing is zero.
+Oracles of shards and stages generated in other processes are merged, and
+--advance-days continues from the oracle.json it finds.
+"""
+import json
+import os
+from collections import Counter
+from decimal import Decimal
+
+ORACLE_FILE = "oracle.json"
+UNASSIGNED = "unassigned"
+OPEN_REPORT_STATUS = "PENDING"
+COMPLETED = "COMPLETED"
+CENTS = Decimal("0.01")
+
+def _add(counts, name, amount=1):
+    counts[name] = counts.get(name, 0) + amount
+
+class Oracle:
+    """Streaming accumulators of the expected aggregates.
+
+    ``booking_lookup(booking_id) -> (prophet_id, course_id, amount)`` is
+    needed for booking_status_updates, whose rows only carry the booking ID.
+    """
+
+    def __init__(self, booking_lookup=None):
+        self.booking_lookup = booking_lookup
+        self.bookings_by_status = {}
+        self.reports_by_status = {}
+        self.open_reports = {}  # admin ID or UNASSIGNED -> open reports
+        self.prophets = {}  # prophet ID -> {"bookings": {status: n}, "reviews": [n, total], "revenue": {payout status: Decimal}}
+        self.courses = {}  # course ID -> [reviews, score total]
+        # booking ID -> (prophet ID, course ID, status) of the bookings observed last
+        self._recent = {}
+
+    def __getstate__(self):
+        return {**self.__dict__, "booking_lookup": None, "_recent": {}}
+
+    def _prophet(self, prophet_id):
+        entry = self.prophets.get(prophet_id)
+        if entry is None:
+            entry = self.prophets[prophet_id] = {"bookings": {}, "reviews": [0, 0], "revenue": {}}
+        return entry
+
+    def observer(self, table):
+        """Function to call with every row of `table`, or None when the table has no aggregates"""
+        return {
+            "bookings": self._booking,
+            "transactions": self._transaction,
+            "reviews": self._review,
+            "reports": self._report,
+            "booking_status_updates": self._status_update,
+        }.get(table)
+
+    def observe_block(self, table, columns):
+        """Observe a column block of the NumPy engine, a column at a time"""
+        if self.observer(table) is None:
+            return
+        c = {name: column.tolist() if hasattr(column, "tolist") else column for name, column in columns.items()}
+        if table == "bookings":
+            # The transactions and reviews blocks that follow belong to this block
+            self._recent = dict(zip(c["id"], zip(c["prophet_id"], c["course_id"], c["status"])))
+            for (prophet_id, status), count in Counter(zip(c["prophet_id"], c["status"])).items():
+                _add(self.bookings_by_status, status, count)
+                _add(self._prophet(prophet_id)["bookings"], status, count)
+        elif table == "reports":
+            for status, count in Counter(c["report_status"]).items():
+                _add(self.reports_by_status, status, count)
+            open_reports = Counter(admin_id or UNASSIGNED for admin_id, status in zip(c["admin_id"], c["report_status"])
+                                   if status == OPEN_REPORT_STATUS)
+            for admin_id, count in open_reports.items():
+                _add(self.open_reports, admin_id, count)
+        elif table == "transactions":
+            recent = self._recent
+            paid = Counter(
+                (recent[booking_id][0], status, amount)
+                for booking_id, status, amount in zip(c["booking_id"], c["status"], c["amount"])
+                if booking_id in recent and recent[booking_id][2] == COMPLETED
+            )
+            for (prophet_id, status, amount), count in paid.items():
+                _add(self._prophet(prophet_id)["revenue"], status, Decimal(str(amount)) * count)
+        elif table == "reviews":
+            for booking_id, score in zip(c["booking_id"], c["score"]):
+                self._review({"booking_id": booking_id, "score": score})
+        else:
+            observe = self.observer(table)
+            names = list(c)
+            for values in zip(*c.values()):
+                observe(dict(zip(names, values)))
+
+    def _booking(self, row):
+        self._recent.clear()
+        status = row["status"]
+        self._recent[row["id"]] = (row["prophet_id"], row["course_id"], status)
+        _add(self.bookings_by_status, status)
+        _add(self._prophet(row["prophet_id"])["bookings"], status)
+
+    def _transaction(self, row):
+        booking = self._recent.get(row["booking_id"])
+        if booking is not None and booking[2] == COMPLETED:
+            _add(self._prophet(booking[0])["revenue"], row["status"], Decimal(str(row["amount"])))
+
+    def _review(self, row):
+        booking = self._recent.get(row["booking_id"])
+        if booking is None:
+            return
+        score = int(row["score"])
+        reviews = self._prophet(booking[0])["reviews"]
+        reviews[0] += 1
+        reviews[1] += score
+        course = self.courses.setdefault(booking[1], [0, 0])
+        course[0] += 1
+        course[1] += score
+
+    def _report(self, row):
+        status = row["report_status"]
+        _add(self.reports_by_status, status)
+        if status == OPEN_REPORT_STATUS:
+            _add(self.open_reports, row["admin_id"] or UNASSIGNED)
+
+    def _status_update(self, row):
+        """A SCHEDULED booking moved on; its transaction was created PENDING_PAYOUT and stays so"""
+        prophet_id, course_id, amount = self.booking_lookup(row["id"])
+        status = row["status"]
+        self._recent.clear()
+        self._recent[row["id"]] = (prophet_id, course_id, status)
+        entry = self._prophet(prophet_id)
+        for counts in (self.bookings_by_status, entry["bookings"]):
+            _add(counts, "SCHEDULED", -1)
+            _add(counts, status)
+        if status == COMPLETED and amount is not None:
+            _add(entry["revenue"], "PENDING_PAYOUT", Decimal(str(amount)))
+
+    def merge(self, other):
+        """Add the aggregates of an oracle of other rows of the same dataset"""
+        for name, count in other.bookings_by_status.items():
+            _add(self.bookings_by_status, name, count)
+        for name, count in other.reports_by_status.items():
+            _add(self.reports_by_status, name, count)
+        for name, count in other.open_reports.items():
+            _add(self.open_reports, name, count)
+        for prophet_id, theirs in other.prophets.items():
+            entry = self._prophet(prophet_id)
+            for name, count in theirs["bookings"].items():
+                _add(entry["bookings"], name, count)
+            entry["reviews"][0] += theirs["reviews"][0]
+            entry["reviews"][1] += theirs["reviews"][1]
+            for name, amount in theirs["revenue"].items():
+                _add(entry["revenue"], name, amount)
+        for course_id, (count, total) in other.courses.items():
+            course = self.courses.setdefault(course_id, [0, 0])
+            course[0] += count
+            course[1] += total
+
+    @staticmethod
+    def _scores(count, total):
+        return {"reviews": count, "score_total": total, "average_score": round(total / count, 4) if count else None}
+
+    def as_dict(self, **options):
+        prophets = {}
+        for prophet_id in sorted(self.prophets):
+            entry = self.prophets[prophet_id]
+            revenue = entry["revenue"]
+            prophets[prophet_id] = {
+                "bookings_by_status": dict(sorted(entry["bookings"].items())),
+                **self._scores(*entry["reviews"]),
+                "completed_revenue": str(sum(revenue.values(), Decimal(0)).quantize(CENTS)),
+                "revenue_by_payout_status": {name: str(amount.quantize(CENTS)) for name, amount in sorted(revenue.items())},
+            }
+        return {
+            **options,
+            "bookings_by_status": dict(sorted(self.bookings_by_status.items())),
+            "reports_by_status": dict(sorted(self.reports_by_status.items())),
+            "open_reports_per_admin": dict(sorted(self.open_reports.items())),
+            "prophets": prophets,
+            "courses": {course_id: self._scores(*self.courses[course_id]) for course_id in sorted(self.courses)},
+        }
+
+    @classmethod
+    def from_dict(cls, data, booking_lookup=None):
+        """Continue from a written oracle"""
+        oracle = cls(booking_lookup)
+        oracle.bookings_by_status = dict(data["bookings_by_status"])
+        oracle.reports_by_status = dict(data["reports_by_status"])
+        oracle.open_reports = dict(data["open_reports_per_admin"])
+        for prophet_id, entry in data["prophets"].items():
+            oracle.prophets[prophet_id] = {
+                "bookings": dict(entry["bookings_by_status"]),
+                "reviews": [entry["reviews"], entry["score_total"]],
+                "revenue": {name: Decimal(amount) for name, amount in entry["revenue_by_payout_status"].items()},
+            }
+        oracle.courses = {course_id: [entry["reviews"], entry["score_total"]] for course_id, entry in data["courses"].items()}
+        return oracle
+
+def load_oracle(directory, booking_lookup=None):
+    """The oracle written with the dataset in `directory`, or None for datasets from before oracles"""
+    path = os.path.join(directory, ORACLE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return Oracle.from_dict(json.load(f), booking_lookup)
+
+def write_oracle(directory, oracle, **options):
+    path = os.path.join(directory, ORACLE_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(oracle.as_dict(**options), f, indent=2)
+        f.write("\n")
+    return path
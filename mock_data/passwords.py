@@ -0,0 +1,194 @@
+"""Real bcrypt password hashes for generated accounts (--password-hashes).
+
+The backend checks logins with bcrypt.compare (src/common/utils/hash.service.ts),
+so an account only accepts a password its password_hash is a bcrypt hash
+of. The plaintexts are known, to traces.py as to load tests:
+
+- pooled: every account's password is PASSWORD. Its hash is one of a pool of
+  --password-pool hashes of PASSWORD with different salts, account i taking
+  pool[i % size]: cheap, and hashes still differ between most accounts.
+- per-account: account ``<username>`` has the password
+  ``<username>-<PASSWORD>`` and a hash of its own.
+
+bcrypt is slow on purpose (~50-100 ms a hash at cost 10), so the hashes a
+run needs are computed in a process pool before generation starts and kept
+in an SQLite file keyed by (plaintext, cost, pool index). Reruns, and other
+datasets with the same accounts, only look them up. Salts are derived from
+that key instead of drawn at random, so every machine computes the same
+hash and seeded datasets are reproducible with or without a warm cache.
+"""
+import base64
+import hashlib
+import os
+import sqlite3
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+PASSWORD = "password123"
+MODES = ["random", "pooled", "per-account"]
+# The backend's cost without $SALT_ROUND, as in src/config/hash.config.ts
+DEFAULT_COST = 10
+DEFAULT_POOL = 100
+DEFAULT_CACHE = os.path.join(os.environ.get("MOCK_DATA_CACHE") or os.path.expanduser("~/.cache/mock_data"), "bcrypt.sqlite")
+# Keys per cache query, and hashes per process pool task and per commit
+LOOKUP_BATCH = 500
+HASH_BATCH = 64
+# Tasks queued per worker process while hashing, which bounds the keys held in memory
+TASKS_PER_WORKER = 2
+
+# bcrypt's base64 uses the standard bit order with its own alphabet
+_BCRYPT_BASE64 = bytes.maketrans(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/",
+    b"./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789",
+)
+
+def default_cost():
+    """bcrypt cost the backend uses: $SALT_ROUND, else DEFAULT_COST; ValueError when it is not a number"""
+    value = os.environ.get("SALT_ROUND")
+    if value is None:
+        return DEFAULT_COST
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"SALT_ROUND must be an integer, not {value!r}") from None
+
+def account_password(username, mode):
+    """Plaintext password of an account; random hashes match no password, PASSWORD is tried anyway"""
+    if mode == "per-account":
+        return f"{username}-{PASSWORD}"
+    return PASSWORD
+
+def bcrypt_salt(plaintext, cost, n):
+    """Salt of the n-th hash of plaintext at cost, derived from them"""
+    digest = hashlib.sha256(f"{cost}:{n}:{plaintext}".encode()).digest()[:16]
+    return b"$2b$%02d$" % cost + base64.b64encode(digest).rstrip(b"=").translate(_BCRYPT_BASE64)
+
+def _hash_batch(keys):
+    # Imported lazily so bcrypt is only needed when hashes are missing
+    import bcrypt
+    return [(plaintext, cost, n, bcrypt.hashpw(plaintext.encode(), bcrypt_salt(plaintext, cost, n)).decode())
+            for plaintext, cost, n in keys]
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+class HashCache:
+    """(plaintext, cost, pool index) -> bcrypt hash, in an SQLite file shared by all runs"""
+
+    def __init__(self, path=DEFAULT_CACHE):
+        self.path = path
+        self._db = None
+
+    def __getstate__(self):
+        # Every process opens its own connection
+        return {"path": self.path, "_db": None}
+
+    @property
+    def db(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=60)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS hashes (plaintext TEXT, cost INTEGER, n INTEGER, hash TEXT NOT NULL, "
+                "PRIMARY KEY (plaintext, cost, n)) WITHOUT ROWID"
+            )
+        return self._db
+
+    def get(self, plaintext, cost, n=0):
+        row = self.db.execute("SELECT hash FROM hashes WHERE plaintext = ? AND cost = ? AND n = ?",
+                              (plaintext, cost, n)).fetchone()
+        if row is None:
+            raise LookupError(f"No cached bcrypt hash {n} of {plaintext!r} at cost {cost}")
+        return row[0]
+
+    def get_many(self, plaintexts, cost, n=0):
+        """{plaintext: hash} of the n-th hashes of plaintexts at cost, queried LOOKUP_BATCH at a time"""
+        found = {}
+        for batch in batched(plaintexts, LOOKUP_BATCH):
+            found.update(self.db.execute(
+                f"SELECT plaintext, hash FROM hashes WHERE cost = ? AND n = ? AND plaintext IN ({','.join('?' * len(batch))})",
+                (cost, n, *batch),
+            ))
+            for plaintext in batch:
+                if plaintext not in found:
+                    raise LookupError(f"No cached bcrypt hash {n} of {plaintext!r} at cost {cost}")
+        return found
+
+    def missing(self, keys):
+        """The keys that have no hash yet"""
+        for batch in batched(keys, LOOKUP_BATCH):
+            found = set()
+            for cost in {key[1] for key in batch}:
+                plaintexts = sorted({key[0] for key in batch if key[1] == cost})
+                found.update((plaintext, cost, n) for plaintext, n in self.db.execute(
+                    f"SELECT plaintext, n FROM hashes WHERE cost = ? AND plaintext IN ({','.join('?' * len(plaintexts))})",
+                    (cost, *plaintexts),
+                ))
+            yield from (key for key in batch if key not in found)
+
+    def fill(self, keys, workers=None):
+        """Hash the keys that are missing in a process pool; returns how many were computed.
+
+        Missing keys are read as the pool needs them, at most TASKS_PER_WORKER
+        batches per worker ahead, and every finished batch is committed, so an
+        interrupted run keeps what it hashed.
+        """
+        batches = batched(self.missing(keys), HASH_BATCH)
+        first = next(batches, None)
+        if first is None:
+            return 0
+        workers = workers or os.cpu_count() or 1
+        computed = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for batch in chain([first], batches):
+                pending.append(pool.submit(_hash_batch, batch))
+                if len(pending) >= workers * TASKS_PER_WORKER:
+                    computed += self._store(pending.popleft().result())
+            while pending:
+                computed += self._store(pending.popleft().result())
+        return computed
+
+    def _store(self, hashes):
+        self.db.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?)", hashes)
+        self.db.commit()
+        return len(hashes)
+
+class PasswordHashes:
+    """The password_hash values of a run: plaintext mode, bcrypt cost, pool size and their cache"""
+
+    def __init__(self, mode, cost=None, pool=DEFAULT_POOL, cache_path=DEFAULT_CACHE):
+        self.mode = mode
+        self.cost = default_cost() if cost is None else cost
+        self.pool = pool
+        self.cache = HashCache(cache_path)
+        self._pooled = None
+
+    def keys(self, usernames):
+        """Cache keys of the hashes of these accounts"""
+        if self.mode == "pooled":
+            return [(PASSWORD, self.cost, n) for n in range(self.pool)]
+        return ((account_password(username, self.mode), self.cost, 0) for username in usernames)
+
+    def prepare(self, usernames, workers=None):
+        """Make sure the cache holds the hashes of these accounts; returns how many had to be computed"""
+        return self.cache.fill(self.keys(usernames), workers)
+
+    def hashes_for(self, accounts):
+        """password_hash of each (global index, username) in accounts, with one cache query per LOOKUP_BATCH"""
+        accounts = list(accounts)
+        if self.mode == "pooled":
+            if self._pooled is None:
+                self._pooled = [self.cache.get(PASSWORD, self.cost, n) for n in range(self.pool)]
+            return [self._pooled[index % self.pool] for index, _ in accounts]
+        plaintexts = [account_password(username, self.mode) for _, username in accounts]
+        found = self.cache.get_many(plaintexts, self.cost)
+        return [found[plaintext] for plaintext in plaintexts]
+
+    def hashes(self, accounts):
+        """hashes_for a stream of accounts, looked up LOOKUP_BATCH accounts ahead of the caller"""
+        for batch in batched(accounts, LOOKUP_BATCH):
+            yield from self.hashes_for(batch)
@@ -0,0 +1,130 @@
+"""PostgreSQL COPY text-format output for generated mock tables.
+
+Rows are written with the real table and column names from
+prisma/schema.prisma and enum values are converted to their database labels
+(e.g. SCHEDULED -> scheduled), so the files load with ``\\copy`` without going
+through Prisma. Columns a generator does not produce are filled from the
+schema: NULL for optional columns, the @default literal, or the row's
+created_at for @default(now()) / @updatedAt. Auto-increment IDs are left to
+their sequences.
+"""
+import io
+import os
+
+from prisma_schema import dependency_order, model_for, schema
+from writers import TableWriter
+
+NULL = r"\N"
+LOAD_SCRIPT = "load.sql"
+
+def copy_columns(model):
+    """Fields written to COPY files, in schema order"""
+    return [field for field in model.fields if field.default != "autoincrement()"]
+
+def escape(value):
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def _format(field, value):
+    enum_labels = schema().enums.get(field.type)
+    if enum_labels is not None:
+        return enum_labels[value]
+    if field.type == "Boolean":
+        return "t" if str(value).lower() in ("true", "t", "1") else "f"
+    return escape(str(value))
+
+def copy_value(model, field, row):
+    """COPY text for one column of a generated row"""
+    value = row.get(field.column)
+    if value is None or (value == "" and field.optional):
+        if field.optional:
+            return NULL
+        if field.default == "now()" or field.is_updated_at:
+            value = row["created_at"]
+        elif field.default is not None and not str(field.default).endswith(")"):
+            value = field.default
+        else:
+            raise ValueError(f"Generated {model.table} row has no value for required column {field.column}")
+    return _format(field, value)
+
+def copy_line(model, columns, row):
+    """One generated row as a COPY text line"""
+    return "\t".join(copy_value(model, field, row) for field in columns) + "\n"
+
+# Shell command \copy ... FROM PROGRAM uses to read a compressed COPY file
+DECOMPRESS_COMMANDS = {"gzip": "gzip -dc", "zstd": "zstd -dc"}
+
+class CopyTableWriter(TableWriter):
+    """Write rows as PostgreSQL COPY text files named after the database table.
+
+    Generated tables without a table in the schema (horoscope_methods,
+    prophet_methods) are skipped.
+    """
+
+    extension = ".copy"
+
+    def __init__(self, filename, directory, **options):
+        self.model = model_for(filename)
+        super().__init__(filename, directory, **options)
+
+    @classmethod
+    def base_name(cls, filename):
+        model = model_for(filename)
+        return model.table if model else filename
+
+    def _open(self, stream, first):
+        self._columns = copy_columns(self.model)
+        self._text = io.TextIOWrapper(stream, encoding="utf-8", newline="\n")
+
+    def _write(self, row):
+        self._text.write(copy_line(self.model, self._columns, row))
+
+    def _close(self):
+        self._text.flush()
+        self._text.detach()
+
+    def write(self, row):
+        if self.model is not None:
+            super().write(row)
+
+    def write_columns(self, columns):
+        if self.model is not None:
+            super().write_columns(columns)
+
+    def close(self):
+        if self.model is None:
+            print(f"Skipping {self.filename}: no matching table in prisma/schema.prisma")
+            return
+        super().close()
+
+def write_load_script(directory, chunks, compression=None):
+    """Write a psql script that \\copy-loads every COPY chunk in foreign-key dependency order.
+
+    ``chunks`` maps generated table name -> its ``writer.chunks`` entries.
+    Compressed chunks are read through ``FROM PROGRAM`` with gzip/zstd.
+    """
+    lines = [
+        "-- Load generated mock data: cd into this directory and run",
+        "--   psql \"$DATABASE_URL\" -f load.sql",
+        "\\set ON_ERROR_STOP on",
+        "BEGIN;",
+    ]
+    files = {model_for(name).table: entries for name, entries in chunks.items() if model_for(name) and entries}
+    loaded = []
+    for model_name in dependency_order(schema()):
+        model = schema().models[model_name]
+        if model.table not in files:
+            continue
+        columns = ", ".join(f'"{field.column}"' for field in copy_columns(model))
+        for entry in files[model.table]:
+            path = os.path.relpath(entry["path"], directory)
+            source = f"PROGRAM '{DECOMPRESS_COMMANDS[compression]} {path}'" if compression else f"'{path}'"
+            lines.append(f"\\copy \"{model.table}\" ({columns}) FROM {source}")
+        loaded.append(model.table)
+    lines.append("COMMIT;")
+    lines.extend(f'ANALYZE "{table}";' for table in loaded)
+
+    script_path = os.path.join(directory, LOAD_SCRIPT)
+    with open(script_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    print(f"Saved load script for {len(loaded)} tables to {script_path}")
+    return script_path
@@ -0,0 +1,379 @@
+"""Generate the mock dataset straight into PostgreSQL with COPY.
+
+Instead of writing files for prisma/seed.ts to insert row by row, every
+generated table is streamed into its database table with ``COPY ... FROM
+STDIN`` as the rows come out of the generator. Stages run in a process pool
+as with ``mock.py --scheduler dag``, so independent tables load at the same
+time and every table loads after the tables its foreign keys point to. The
+rows are the same ones ``mock.py --scheduler dag`` writes for the same seed
+and options.
+
+Each table is one COPY in one transaction on a connection from a pool of
+--connections per worker process. Tables derived from another table as it
+passes (transactions and reviews from bookings) are spooled to a temporary
+file and copied once their parent has committed, unless constraints are
+deferred and --connections leaves room for all of them at once. With
+--defer-constraints the primary keys, unique constraints, indexes and foreign
+keys of the loaded tables are dropped first and recreated after the load,
+indexes in parallel; ANALYZE runs on every table at the end.
+
+To try it against a throwaway database:
+
+    docker run --rm -d -e POSTGRES_PASSWORD=pg -p 5432:5432 postgres:16
+    export DATABASE_URL=postgresql://postgres:pg@localhost:5432/postgres
+    npx prisma migrate deploy
+    python3 pg_load.py --customers 100000 --seed 42 --defer-constraints --truncate
+
+Requires psycopg 3 (``pip install 'psycopg[binary]'``).
+"""
+import argparse
+import importlib.util
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+import mock
+from metrics import Metrics
+from pg_copy import copy_columns, copy_line, model_for
+from prisma_schema import GENERATED_TABLE_MODELS
+
+DEFAULT_CONNECTIONS = 4
+COPY_BATCH_ROWS = 1_000
+COPY_READ_BYTES = 1 << 20
+# Spooled rows stay in memory up to this size, then go to a temporary file
+SPOOL_MEMORY_BYTES = 64 << 20
+# Most COPYs a worker process has open at once: bookings with the
+# transactions and reviews derived from it
+CONCURRENT_COPIES = 3
+
+# Primary keys, unique constraints and foreign keys on or pointing at the given tables
+CONSTRAINTS_SQL = """
+SELECT c.conrelid::regclass::text, c.conname, c.contype, pg_get_constraintdef(c.oid)
+FROM pg_constraint c
+WHERE c.contype IN ('p', 'u', 'f')
+  AND (c.conrelid = ANY(%(tables)s::regclass[]) OR c.confrelid = ANY(%(tables)s::regclass[]))
+ORDER BY c.conrelid::regclass::text, c.conname
+"""
+
+# Indexes of the given tables that do not back a constraint (Prisma's @@unique
+# and @@index both become plain CREATE [UNIQUE] INDEX)
+INDEXES_SQL = """
+SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+FROM pg_index i
+WHERE i.indrelid = ANY(%(tables)s::regclass[])
+  AND NOT EXISTS (
+    SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid AND c.contype IN ('p', 'u', 'x')
+  )
+ORDER BY 1
+"""
+
+def quoted(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def copy_statement(model, columns):
+    return f"COPY {quoted(model.table)} ({', '.join(quoted(field.column) for field in columns)}) FROM STDIN"
+
+class ConnectionPool:
+    """Up to `size` psycopg connections, opened on first use and shared between threads"""
+
+    def __init__(self, url, size=DEFAULT_CONNECTIONS):
+        self.url = url
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """A connection for one transaction: committed when the block succeeds, rolled back and dropped when it fails"""
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                import psycopg
+                connection = psycopg.connect(self.url)
+            try:
+                yield connection
+                connection.commit()
+            except BaseException:
+                connection.close()
+                raise
+            self._idle.put(connection)
+
+    def execute(self, statement, params=None):
+        """Run one statement in its own transaction; returns its rows, if it has any"""
+        with self.connection() as connection:
+            cursor = connection.execute(statement, params)
+            return cursor.fetchall() if cursor.description else None
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+# Pools of this process by (pid, url, size); keyed by pid so a forked worker
+# never reuses the sockets of the process it was forked from
+_pools = {}
+_pools_lock = threading.Lock()
+
+def pool_for(url, size):
+    key = (os.getpid(), url, size)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(url, size)
+        return _pools[key]
+
+# Models with a COPY open in this process that has not committed yet
+_loading = set()
+_loading_lock = threading.Lock()
+
+class PostgresSink:
+    """Opens a PostgresTableWriter for a generated table; set as mock.sink.
+
+    Holds only the connection settings, so it pickles into the stage jobs of
+    the process pool and every worker process opens connections of its own.
+    """
+
+    def __init__(self, url, connections=DEFAULT_CONNECTIONS, spool=True):
+        self.url = url
+        self.connections = connections
+        self.spool = spool
+
+    @property
+    def pool(self):
+        return pool_for(self.url, self.connections)
+
+    def must_wait(self, model):
+        """Whether rows of `model` reference a table whose COPY in this process has not committed yet"""
+        with _loading_lock:
+            return self.spool and any(r.target in _loading for r in model.relations if r.target != model.name)
+
+    def __call__(self, filename):
+        return PostgresTableWriter(self, filename)
+
+class PostgresTableWriter:
+    """COPY one generated table into its database table as the rows arrive.
+
+    Has the interface of a TableWriter (write, write_columns, close, count,
+    chunks), so the generators and BackgroundWriter use it unchanged. Its one
+    ``chunks`` entry records the rows and COPY bytes of the table and how long
+    the COPY took. Generated tables without a model are skipped.
+    """
+
+    def __init__(self, sink, filename):
+        self.sink = sink
+        self.filename = filename
+        self.model = model_for(filename)
+        self.count = 0
+        self.chunks = []
+        self._stack = None
+        self._copy = None
+        self._spool = None
+        self._lines = []
+        self._bytes = 0
+        if self.model is not None:
+            with _loading_lock:
+                _loading.add(self.model.name)
+
+    def _begin(self):
+        self._columns = copy_columns(self.model)
+        self._stack = ExitStack()
+        if self.sink.must_wait(self.model):
+            self._spool = self._stack.enter_context(tempfile.SpooledTemporaryFile(SPOOL_MEMORY_BYTES))
+        else:
+            self._start_copy()
+
+    def _start_copy(self):
+        self._started = time.perf_counter()
+        connection = self._stack.enter_context(self.sink.pool.connection())
+        cursor = self._stack.enter_context(connection.cursor())
+        self._copy = self._stack.enter_context(cursor.copy(copy_statement(self.model, self._columns)))
+
+    def _flush(self):
+        if self._lines:
+            data = "".join(self._lines).encode("utf-8")
+            (self._copy if self._spool is None else self._spool).write(data)
+            self._bytes += len(data)
+            self._lines = []
+
+    def write(self, row):
+        if self.model is None:
+            return
+        if self._stack is None:
+            self._begin()
+        self._lines.append(copy_line(self.model, self._columns, row))
+        self.count += 1
+        if len(self._lines) == COPY_BATCH_ROWS:
+            self._flush()
+
+    def write_columns(self, columns):
+        names = list(columns)
+        for values in zip(*columns.values()):
+            self.write(dict(zip(names, values)))
+
+    def _finish(self):
+        with _loading_lock:
+            _loading.discard(self.model.name)
+
+    def close(self):
+        if self.model is None:
+            print(f"Skipping {self.filename}: no matching table in prisma/schema.prisma")
+            return
+        if self._stack is None:
+            self._finish()
+            print(f"Warning: No data to load into {self.model.table}")
+            return
+        try:
+            # Leaving the stack ends the COPY, commits and returns the connection
+            with self._stack:
+                self._flush()
+                if self._spool is not None:
+                    self._spool.seek(0)
+                    self._start_copy()
+                    while data := self._spool.read(COPY_READ_BYTES):
+                        self._copy.write(data)
+        finally:
+            self._stack = None
+            self._finish()
+        seconds = time.perf_counter() - self._started
+        self.chunks.append({"path": self.model.table, "rows": self.count, "bytes": self._bytes, "sha256": None,
+                            "seconds": round(seconds, 3)})
+        print(f"Copied {self.count} records into {self.model.table} ({self.count / seconds:,.0f} rows/s)")
+
+    def abort(self, *exc):
+        """Roll the COPY back instead of committing what was written so far"""
+        if self._stack is not None:
+            try:
+                self._stack.__exit__(*exc)
+            finally:
+                self._stack = None
+        if self.model is not None:
+            self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self.abort(*exc)
+
+def loaded_tables():
+    return [quoted(model_for(name).table) for name in GENERATED_TABLE_MODELS]
+
+def drop_constraints(pool, tables):
+    """Drop the keys, indexes and foreign keys of `tables`; returns what restore_constraints needs"""
+    constraints = pool.execute(CONSTRAINTS_SQL, {"tables": tables})
+    indexes = pool.execute(INDEXES_SQL, {"tables": tables})
+    # Foreign keys first, since they depend on the keys they reference
+    ordered = sorted(constraints, key=lambda constraint: constraint[2] != "f")
+    with pool.connection() as connection:
+        for table, name, _, _ in ordered:
+            connection.execute(f"ALTER TABLE {table} DROP CONSTRAINT {quoted(name)}")
+        for index, _ in indexes:
+            connection.execute(f"DROP INDEX {index}")
+    print(f"Dropped {len(constraints)} constraints and {len(indexes)} indexes until the load is done")
+    return constraints, indexes
+
+def restore_constraints(pool, dropped, workers):
+    """Recreate dropped keys and indexes in parallel, then the foreign keys that need them"""
+    constraints, indexes = dropped
+    keys = [f"ALTER TABLE {table} ADD CONSTRAINT {quoted(name)} {definition}"
+            for table, name, kind, definition in constraints if kind != "f"]
+    foreign_keys = [f"ALTER TABLE {table} ADD CONSTRAINT {quoted(name)} {definition}"
+                    for table, name, kind, definition in constraints if kind == "f"]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(pool.execute, keys + [definition for _, definition in indexes]))
+        list(executor.map(pool.execute, foreign_keys))
+    print(f"Recreated {len(constraints)} constraints and {len(indexes)} indexes in {time.perf_counter() - start:.1f}s")
+
+def analyze(pool, tables, workers):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(pool.execute, [f"ANALYZE {table}" for table in tables]))
+    print(f"Analyzed {len(tables)} tables in {time.perf_counter() - start:.1f}s")
+
+def print_load_stats(chunks):
+    """Rows, rows/sec and MB/sec per table from the writers' chunk entries"""
+    total = 0
+    for entries in chunks.values():
+        for entry in entries:
+            seconds = entry["seconds"] or float("inf")
+            print(f"  - {entry['path']}: {entry['rows']} records in {entry['seconds']:.2f}s, "
+                  f"{entry['rows'] / seconds:,.0f} rows/s, {entry['bytes'] / (1024 * 1024) / seconds:.1f} MB/s")
+            total += entry["rows"]
+    print(f"\nTotal records loaded: {total}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the mock dataset directly into PostgreSQL with COPY")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"),
+                        help="PostgreSQL connection URL (default: $DATABASE_URL)")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS,
+                        help="Connection pool size of every worker process")
+    parser.add_argument("--workers", type=int, help="Process pool size (default: CPU count)")
+    parser.add_argument("--defer-constraints", action="store_true",
+                        help="Drop keys, indexes and foreign keys of the loaded tables during the load and recreate them after")
+    parser.add_argument("--truncate", action="store_true", help="Empty the loaded tables (and what references them) first")
+    parser.add_argument("--no-analyze", action="store_true", help="Skip ANALYZE after the load")
+    mock.add_scale_arguments(parser)
+    args = parser.parse_args(argv)
+    if importlib.util.find_spec("psycopg") is None:
+        parser.error("pg_load.py requires psycopg (pip install 'psycopg[binary]')")
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+    if args.connections < 1:
+        parser.error("--connections must be positive")
+    mock.check_scale_arguments(parser, args)
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    mock.now = mock.clock_from_args(args)
+    mock.ids = mock.IdEngine(args.seed)
+    mock.metrics = Metrics()
+    mock.passwords = mock.passwords_from_args(args)
+    scale = mock.scale_from_args(args)
+    if mock.passwords is not None:
+        # Before touching the database: hashing may take a while
+        mock.prepare_passwords(scale, args.workers)
+    # Unspooled derived tables hold a connection each while their parent copies
+    spool = not args.defer_constraints or args.connections < CONCURRENT_COPIES
+    if args.defer_constraints and spool:
+        print(f"Spooling derived tables: --connections {args.connections} is below the {CONCURRENT_COPIES} "
+              "COPYs the bookings stage would have open at once")
+    sink = PostgresSink(args.database_url, args.connections, spool=spool)
+    pool = sink.pool
+    tables = loaded_tables()
+
+    if args.truncate:
+        pool.execute(f"TRUNCATE {', '.join(tables)} CASCADE")
+        print(f"Truncated {len(tables)} tables")
+    dropped = drop_constraints(pool, tables) if args.defer_constraints else None
+    # Idle connections of this process must not be inherited by the workers
+    pool.close()
+
+    start = time.perf_counter()
+    try:
+        _, _, (critical_s, critical_stages) = mock.generate_parallel(scale, args.seed, args.workers, sink=sink)
+    finally:
+        if dropped is not None:
+            restore_constraints(pool, dropped, args.connections)
+    elapsed = time.perf_counter() - start
+    if not args.no_analyze:
+        analyze(pool, tables, args.connections)
+    pool.close()
+
+    rows = sum(entry["rows"] for entries in mock.written_chunks.values() for entry in entries)
+    print(f"\n✅ Loaded {rows} records in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    print(f"Critical path: {' -> '.join(critical_stages)} ({critical_s:.2f}s)")
+    print("\nLoaded Tables:")
+    print_load_stats(mock.written_chunks)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Skewed popularity model for mock bookings.
+
+Real traffic is not uniform: a few prophets and courses take most of the
+bookings, a few customers book far more than the rest and most sessions fall
+in the evening. Popularity here follows a Zipf law: the item of rank r gets
+weight 1 / r**exponent, ranks being a random permutation so hotness does not
+follow generation order. An exponent of 0 is uniform. Weighted choices are
+drawn from alias tables (Vose's method) in O(1) per draw.
+"""
+import random
+
+from availability import DAY_END_HOUR, DAY_START_HOUR, SLOT_MINUTES, SLOTS_PER_DAY
+
+# Relative booking demand per hour of the day, from DAY_START_HOUR to DAY_END_HOUR
+HOUR_PROFILES = {
+    "uniform": [1] * (DAY_END_HOUR - DAY_START_HOUR),
+    # 07:00 ... 22:00, peaking after work
+    "evening": [1, 1, 1, 1, 2, 2, 1, 1, 1, 2, 3, 5, 6, 6, 4, 2],
+    # Lunch break and after work
+    "bimodal": [1, 1, 2, 3, 5, 5, 3, 2, 2, 3, 4, 5, 5, 4, 2, 1],
+}
+
+class AliasTable:
+    """Draw indices with probability proportional to `weights` in O(1) per draw"""
+
+    def __init__(self, weights):
+        n = len(weights)
+        if not n:
+            raise ValueError("AliasTable needs at least one weight")
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.prob[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+        # Whatever is left over is 1 up to rounding error
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self, rng=random):
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+def zipf_weights(n, exponent):
+    """Zipf weights of ranks 1..n, normalised to sum to 1"""
+    weights = [1.0 / (rank ** exponent) for rank in range(1, n + 1)]
+    total = sum(weights)
+    return [w / total for w in weights]
+
+def ranked_weights(n, exponent, rng=random):
+    """Zipf weights handed out to n items in random rank order"""
+    weights = zipf_weights(n, exponent)
+    rng.shuffle(weights)
+    return weights
+
+def slot_weights(profile):
+    """Weight of every availability slot of the day under an HOUR_PROFILES profile"""
+    slots_per_hour = 60 // SLOT_MINUTES
+    return [weight for weight in HOUR_PROFILES[profile] for _ in range(slots_per_hour)]
+
+class HourProfile:
+    """Demand over the slots of the day under one of HOUR_PROFILES.
+
+    Prophets place their availability windows around busy slots and bookings
+    start as close as possible to a busy slot, so both sides follow the
+    profile.
+    """
+
+    def __init__(self, name):
+        self.weights = slot_weights(name)
+        half_day = SLOTS_PER_DAY // 2
+        self.slots = AliasTable(self.weights)
+        self.halves = [AliasTable(self.weights[:half_day]), AliasTable(self.weights[half_day:])]
+
+    def booking_slot(self, rng=random):
+        """Slot a booking would ideally start at"""
+        return self.slots.sample(rng)
+
+    def window_start(self, half, length, rng=random):
+        """Start of a `length`-slot window in the half of the day beginning at slot `half`, covering a busy slot"""
+        half_day = SLOTS_PER_DAY // 2
+        busy = half + self.halves[half // half_day].sample(rng)
+        return min(max(busy - rng.randrange(length), half), half + half_day - length)
+
+def hour_profile(name):
+    """HourProfile for a profile name, None for uniform hours"""
+    return None if name == "uniform" else HourProfile(name)
+
+def course_weights(courses, prophet_exponent, course_exponent, rng=random):
+    """Booking weight of each (course_id, prophet_id, ...) tuple.
+
+    Prophets get Zipf popularity with prophet_exponent, and each prophet's
+    share is split over its own courses by their Zipf popularity with
+    course_exponent.
+    """
+    prophets = list(dict.fromkeys(course[1] for course in courses))
+    prophet_weight = dict(zip(prophets, ranked_weights(len(prophets), prophet_exponent, rng)))
+    weights = ranked_weights(len(courses), course_exponent, rng)
+    prophet_total = {}
+    for course, weight in zip(courses, weights):
+        prophet_total[course[1]] = prophet_total.get(course[1], 0.0) + weight
+    return [prophet_weight[course[1]] * weight / prophet_total[course[1]] for course, weight in zip(courses, weights)]
+
+def course_picker(courses, prophet_exponent=0.0, course_exponent=0.0, rng=random):
+    """Function drawing one of `courses` per call, uniformly or by course_weights"""
+    if not prophet_exponent and not course_exponent:
+        return lambda: rng.choice(courses)
+    table = AliasTable(course_weights(courses, prophet_exponent, course_exponent, rng))
+    return lambda: courses[table.sample(rng)]
+
+def activity_counts(n, low, high, exponent=0.0, rng=random):
+    """Yield how many bookings each of n customers makes.
+
+    Uniform between low and high without skew. With an exponent the mean
+    stays (low + high) / 2, but each customer's expected count follows their
+    Zipf weight, rounded stochastically.
+    """
+    if not exponent:
+        for _ in range(n):
+            yield rng.randint(low, high)
+        return
+    total = n * (low + high) / 2
+    for weight in ranked_weights(n, exponent, rng):
+        expected = weight * total
+        whole = int(expected)
+        yield whole + (rng.random() < expected - whole)
@@ -0,0 +1,175 @@
+"""Minimal reader for prisma/schema.prisma.
+
+Only understands what the mock data tools need: models with their table and
+column names (@@map / @map), scalar types, native @db types such as
+VarChar lengths or Decimal precision, defaults,
+unique constraints, relations and enums with their database labels.
+"""
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "prisma", "schema.prisma")
+
+# Generated mock table (CSV file name) -> Prisma model it is loaded into.
+# horoscope_methods and prophet_methods have no table any more.
+GENERATED_TABLE_MODELS = {
+    "accounts": "Account",
+    "user_details": "UserDetail",
+    "customers": "Customer",
+    "prophets": "Prophet",
+    "prophet_availabilities": "ProphetAvailability",
+    "courses": "Course",
+    "bookings": "Booking",
+    "transactions": "Transaction",
+    "transaction_accounts": "TransactionAccount",
+    "reviews": "Review",
+    "reports": "Report",
+}
+
+SCALAR_TYPES = {"String", "Int", "BigInt", "Float", "Decimal", "Boolean", "DateTime", "Json", "Bytes"}
+
+# native_type is the @db attribute as (name, integer arguments), e.g. ("Decimal", (7, 2)), or None
+Field = namedtuple("Field", "name column type optional is_list default is_id is_unique is_updated_at varchar_length native_type")
+Relation = namedtuple("Relation", "name target fields references")
+Model = namedtuple("Model", "name table fields relations unique_constraints")
+Schema = namedtuple("Schema", "models enums")
+
+_BLOCK_RE = re.compile(r"^(model|enum)\s+(\w+)\s*\{(.*?)^\}", re.S | re.M)
+_FIELD_RE = re.compile(r"^(\w+)\s+(\w+)(\[\])?(\?)?\s*(.*)$")
+# Attribute arguments may contain one level of nested parentheses, e.g. @default(now())
+_ARGS = r"\(((?:[^()]|\([^()]*\))*)\)"
+
+def _attribute(text, name):
+    """Argument string of @name(...) in text, "" for a bare @name, None when absent"""
+    match = re.search(rf"@{re.escape(name)}(?:{_ARGS})?(?![\w.])", text)
+    if not match:
+        return None
+    return match.group(1) or ""
+
+def _names(text):
+    return re.findall(r"\w+", text)
+
+def _parse_default(raw):
+    """Python value of a @default(...) argument; function defaults stay strings like 'now()'"""
+    if raw is None:
+        return None
+    raw = raw.strip()
+    if raw.startswith('"'):
+        return raw.strip('"')
+    if raw in ("true", "false"):
+        return raw == "true"
+    return raw
+
+def _parse_model(name, body, model_names):
+    table = name
+    fields = []
+    relations = []
+    unique_constraints = []
+
+    for line in body.splitlines():
+        line = line.split("//")[0].strip()
+        if not line:
+            continue
+        if line.startswith("@@"):
+            mapped = _attribute(line, "@map")
+            if mapped is not None:
+                table = mapped.strip('"')
+            unique = _attribute(line, "@unique")
+            if unique is not None:
+                unique_constraints.append(tuple(_names(unique.split("]")[0])))
+            continue
+
+        match = _FIELD_RE.match(line)
+        if not match:
+            continue
+        field_name, field_type, is_list, optional, attributes = match.groups()
+
+        if field_type in model_names:
+            relation = _attribute(attributes, "relation")
+            if relation and "fields:" in relation:
+                fields_part = re.search(r"fields:\s*\[([^\]]*)\]", relation).group(1)
+                references_part = re.search(r"references:\s*\[([^\]]*)\]", relation).group(1)
+                relations.append(Relation(field_name, field_type, tuple(_names(fields_part)), tuple(_names(references_part))))
+            continue
+
+        mapped = _attribute(attributes, "map")
+        varchar = re.search(r"@db\.VarChar\((\d+)\)", attributes)
+        native = re.search(r"@db\.(\w+)(?:\(([^)]*)\))?", attributes)
+        fields.append(Field(
+            name=field_name,
+            column=mapped.strip('"') if mapped else field_name,
+            type=field_type,
+            optional=bool(optional),
+            is_list=bool(is_list),
+            default=_parse_default(_attribute(attributes, "default")),
+            is_id=_attribute(attributes, "id") is not None,
+            is_unique=_attribute(attributes, "unique") is not None,
+            is_updated_at=_attribute(attributes, "updatedAt") is not None,
+            varchar_length=int(varchar.group(1)) if varchar else None,
+            native_type=(native.group(1), tuple(int(arg) for arg in _names(native.group(2) or ""))) if native else None,
+        ))
+
+    # Single-column @unique / @id fields are unique constraints too
+    unique_constraints = [(f.name,) for f in fields if f.is_id or f.is_unique] + unique_constraints
+    return Model(name, table, fields, relations, unique_constraints)
+
+def _parse_enum(body):
+    """VALUE -> database label (the @map name, or the value itself)"""
+    labels = {}
+    for line in body.splitlines():
+        line = line.split("//")[0].strip()
+        if not line or line.startswith("@@"):
+            continue
+        value = line.split()[0]
+        mapped = _attribute(line, "map")
+        labels[value] = mapped.strip('"') if mapped else value
+    return labels
+
+def load_schema(path=SCHEMA_PATH):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+
+    blocks = _BLOCK_RE.findall(text)
+    model_names = {name for kind, name, _ in blocks if kind == "model"}
+    models = {}
+    enums = {}
+    for kind, name, body in blocks:
+        if kind == "model":
+            models[name] = _parse_model(name, body, model_names)
+        else:
+            enums[name] = _parse_enum(body)
+    return Schema(models, enums)
+
+@lru_cache(maxsize=None)
+def schema():
+    """prisma/schema.prisma, parsed once per process"""
+    return load_schema()
+
+def model_for(filename):
+    """Prisma model a generated table is loaded into, None for tables without one"""
+    model_name = GENERATED_TABLE_MODELS.get(filename)
+    return schema().models[model_name] if model_name else None
+
+def field_by_name(model):
+    return {field.name: field for field in model.fields}
+
+def dependency_order(schema):
+    """Model names ordered so every model comes after the models its foreign keys reference"""
+    ordered = []
+    visiting = set()
+
+    def visit(name):
+        if name in ordered or name in visiting:
+            return
+        visiting.add(name)
+        for relation in schema.models[name].relations:
+            if relation.target != name:
+                visit(relation.target)
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in schema.models:
+        visit(name)
+    return ordered
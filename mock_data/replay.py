@@ -0,0 +1,303 @@
+"""Replay an API request trace from mock.py --trace-sessions against a running backend.
+
+Requests are sent open-loop on the trace's own schedule (scaled by --speed)
+or at a fixed --rate, so a slow backend builds up a queue instead of slowing
+the load down. The requests of one session run in order, each after the
+previous one finished, carrying the token its login returned. Connections are
+kept alive in a pool of --connections HTTP/1.1 connections; the time spent
+waiting for one counts towards a request's latency.
+
+Latencies go into a log-bucketed histogram per operation, reported as
+percentiles at the end:
+
+    python3 replay.py csv_output/traces.ndjson --base-url http://localhost:8000 --rate 200
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlencode, urlsplit
+
+from dataset_state import open_text
+
+DEFAULT_BASE_URL = "http://localhost:8000"
+DEFAULT_CONNECTIONS = 32
+REQUEST_TIMEOUT = 30.0
+MAX_IN_FLIGHT = 10_000
+PERCENTILES = [50, 90, 99, 99.9]
+
+class LatencyHistogram:
+    """Latency counts in buckets `precision` apart on a log scale, from 1 µs up"""
+
+    def __init__(self, precision=0.02):
+        self.base = math.log1p(precision)
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        micros = max(seconds * 1e6, 1.0)
+        self.buckets[int(math.log(micros) / self.base)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-th percentile, in seconds"""
+        rank = math.ceil(self.count * p / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(math.exp((bucket + 1) * self.base) / 1e6, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else None,
+            "max_ms": round(self.max * 1000, 3),
+            **{f"p{p}_ms": round(self.percentile(p) * 1000, 3) for p in PERCENTILES if self.count},
+        }
+
+class HttpError(Exception):
+    pass
+
+class ConnectionPool:
+    """Up to `size` keep-alive HTTP/1.1 connections to one host"""
+
+    def __init__(self, base_url, size=DEFAULT_CONNECTIONS, timeout=REQUEST_TIMEOUT):
+        url = urlsplit(base_url)
+        if url.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL {base_url!r}")
+        self.ssl = url.scheme == "https"
+        self.host = url.hostname
+        self.port = url.port or (443 if self.ssl else 80)
+        self.prefix = url.path.rstrip("/")
+        self.timeout = timeout
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def _connect(self):
+        self.opened += 1
+        return await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+
+    async def request(self, method, path, headers=None, body=None):
+        """Send one request; returns (status, response body)"""
+        async with self._slots:
+            for attempt in range(2):
+                reused = bool(self._idle)
+                connection = self._idle.pop() if reused else await self._connect()
+                try:
+                    status, data, keep_alive = await asyncio.wait_for(
+                        self._exchange(connection, method, path, headers or {}, body), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError, HttpError) as error:
+                    connection[1].close()
+                    # A kept-alive connection the server already closed: retry once on a new one
+                    if reused and attempt == 0 and not isinstance(error, HttpError):
+                        continue
+                    raise
+                except BaseException:
+                    connection[1].close()
+                    raise
+                if keep_alive:
+                    self._idle.append(connection)
+                else:
+                    connection[1].close()
+                return status, data
+
+    async def _exchange(self, connection, method, path, headers, body):
+        reader, writer = connection
+        lines = [f"{method} {self.prefix}{path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before the response")
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+            raise HttpError(f"Malformed status line {status_line!r}")
+        response_headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            data = bytearray()
+            while size := int((await reader.readline()).split(b";")[0], 16):
+                data += await reader.readexactly(size)
+                await reader.readexactly(2)
+            while await reader.readline() not in (b"\r\n", b"\n", b""):
+                pass
+            data = bytes(data)
+        elif "content-length" in response_headers:
+            data = await reader.readexactly(int(response_headers["content-length"]))
+        else:
+            return int(parts[1]), await reader.read(), False
+        keep_alive = response_headers.get("connection", "").lower() != "close"
+        return int(parts[1]), data, keep_alive
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+class Stats:
+    """Latency histogram and status counts per operation"""
+
+    def __init__(self):
+        self.latency = {}
+        self.statuses = {}
+        self.started = time.perf_counter()
+
+    def record(self, op, status, seconds=None):
+        self.statuses.setdefault(op, Counter())[str(status)] += 1
+        if seconds is not None:
+            self.latency.setdefault(op, LatencyHistogram()).record(seconds)
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.started
+        ops = {}
+        for op in sorted(self.statuses):
+            histogram = self.latency.get(op, LatencyHistogram())
+            ops[op] = {
+                "requests": sum(self.statuses[op].values()),
+                "per_s": round(histogram.count / elapsed, 2) if elapsed else None,
+                "statuses": dict(self.statuses[op]),
+                **histogram.as_dict(),
+            }
+        return {"elapsed_s": round(elapsed, 3), "ops": ops}
+
+def access_token(data):
+    """accessToken of a login response, whether wrapped in {"data": ...} or not"""
+    try:
+        payload = json.loads(data)
+    except ValueError:
+        return None
+    if isinstance(payload, dict) and isinstance(payload.get("data"), dict):
+        payload = payload["data"]
+    return payload.get("accessToken") if isinstance(payload, dict) else None
+
+async def send(pool, stats, tokens, record):
+    op = record["op"]
+    headers = {"Accept": "application/json"}
+    if record.get("auth"):
+        token = tokens.get(record["session"])
+        if token is None:
+            # The session's login failed, so there is no user to act as
+            stats.record(op, "skipped")
+            return
+        headers["Authorization"] = f"Bearer {token}"
+    body = None
+    if "body" in record:
+        body = json.dumps(record["body"]).encode()
+        headers["Content-Type"] = "application/json"
+    path = record["path"]
+    if record.get("query"):
+        path += "?" + urlencode(record["query"])
+
+    start = time.perf_counter()
+    try:
+        status, data = await pool.request(record["method"], path, headers, body)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HttpError) as error:
+        stats.record(op, type(error).__name__, time.perf_counter() - start)
+        return
+    stats.record(op, status, time.perf_counter() - start)
+    if op == "login" and status < 300:
+        token = access_token(data)
+        if token:
+            tokens[record["session"]] = token
+
+async def run_session_request(previous, pool, stats, tokens, record):
+    if previous is not None:
+        await previous
+    await send(pool, stats, tokens, record)
+    if record.get("last"):
+        tokens.pop(record["session"], None)
+
+def read_trace(path, limit=None):
+    with open_text(path) as f:
+        for i, line in enumerate(f):
+            if limit is not None and i >= limit:
+                return
+            if line.strip():
+                yield json.loads(line)
+
+async def replay(path, base_url, connections, rate=None, speed=1.0, limit=None, progress=None):
+    """Replay the trace at `path`; returns the Stats"""
+    loop = asyncio.get_running_loop()
+    pool = ConnectionPool(base_url, connections)
+    stats = Stats()
+    tokens = {}
+    last_request = {}  # session -> task of its latest request
+    in_flight = set()
+    start = loop.time()
+    try:
+        for i, record in enumerate(read_trace(path, limit)):
+            due = start + (i / rate if rate else record["t"] / speed)
+            if due > loop.time():
+                await asyncio.sleep(due - loop.time())
+            while len(in_flight) >= MAX_IN_FLIGHT:
+                await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+
+            session = record["session"]
+            task = asyncio.create_task(run_session_request(last_request.get(session), pool, stats, tokens, record))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            if record.get("last"):
+                last_request.pop(session, None)
+            else:
+                last_request[session] = task
+            if progress and (i + 1) % progress == 0:
+                print(f"  {i + 1} requests sent, {len(in_flight)} in flight, {pool.opened} connections opened")
+        if in_flight:
+            await asyncio.wait(in_flight)
+    finally:
+        pool.close()
+    return stats
+
+def print_stats(stats):
+    report = stats.as_dict()
+    print(f"\nReplayed in {report['elapsed_s']:.1f}s")
+    print(f"  {'op':<18} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}  statuses")
+    for op, entry in report["ops"].items():
+        latencies = [entry.get(key) for key in ("p50_ms", "p90_ms", "p99_ms", "max_ms")]
+        columns = " ".join(f"{value:>9.1f}" if value is not None else f"{'-':>9}" for value in latencies)
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(entry["statuses"].items()))
+        print(f"  {op:<18} {entry['requests']:>9} {entry['per_s'] or 0:>8.1f} {columns}  {statuses}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a mock API request trace against a running backend")
+    parser.add_argument("trace", help="NDJSON trace written by mock.py --trace-sessions (optionally .gz/.zst)")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="Backend URL the trace paths are relative to")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS, help="Size of the keep-alive connection pool")
+    parser.add_argument("--rate", type=float, help="Send requests at this fixed rate per second instead of on the trace's schedule")
+    parser.add_argument("--speed", type=float, default=1.0, help="Play the trace's schedule this many times faster")
+    parser.add_argument("--limit", type=int, help="Only replay the first N requests")
+    parser.add_argument("--progress", type=int, default=10_000, help="Print progress every N requests (0 for none)")
+    parser.add_argument("--json", help="Also write the latency report to this JSON file")
+    args = parser.parse_args(argv)
+    if args.connections < 1:
+        parser.error("--connections must be positive")
+    if (args.rate is not None and args.rate <= 0) or args.speed <= 0:
+        parser.error("--rate and --speed must be positive")
+
+    print(f"Replaying {args.trace} against {args.base_url}")
+    stats = asyncio.run(replay(args.trace, args.base_url, args.connections, args.rate, args.speed, args.limit, args.progress))
+    print_stats(stats)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(stats.as_dict(), f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Dependency-graph scheduling of dataset generation stages.
+
+A stage generates one table, or a table plus the tables derived from it,
+from the compact outputs of the stages it ``needs``: courses need prophet
+IDs, bookings need customers, courses and the availability calendar, and so
+on. The stages form a DAG. run_sequential runs them one after another in
+one process; run_parallel starts every stage in a process pool as soon as
+everything it needs has finished, so independent tables (user_details,
+customers and prophets only need accounts) are generated at the same time
+and a build takes about as long as its longest dependency chain.
+"""
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# run(context, inputs) -> (row counts, output); inputs maps each need to its output
+Stage = namedtuple("Stage", "name needs run")
+
+def topological_order(stages):
+    """Stages ordered so every stage comes after its needs, keeping the given order where it already is one"""
+    by_name = {stage.name: stage for stage in stages}
+    ordered = []
+    visiting = set()
+
+    def visit(stage):
+        if stage in ordered:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Stage {stage.name} depends on itself")
+        visiting.add(stage.name)
+        for need in stage.needs:
+            if need not in by_name:
+                raise ValueError(f"Stage {stage.name} needs unknown stage {need}")
+            visit(by_name[need])
+        visiting.discard(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+def run_sequential(stages, context, before=None):
+    """Run every stage in this process; returns ({stage: output}, row counts).
+
+    ``before(stage)`` is called as each stage starts, e.g. to seed its RNG stream.
+    """
+    outputs, counts = {}, {}
+    for stage in topological_order(stages):
+        if before is not None:
+            before(stage)
+        stage_counts, outputs[stage.name] = stage.run(context, {need: outputs[need] for need in stage.needs})
+        counts.update(stage_counts)
+    return outputs, counts
+
+def run_parallel(stages, make_job, worker, workers=None):
+    """Run stages in a process pool as soon as their needs are done.
+
+    ``make_job(stage, inputs)`` builds the picklable argument of
+    ``worker(job)``, a module-level function whose result starts with the
+    stage's output. Returns {stage name: worker result}.
+    """
+    waiting = topological_order(stages)
+    results = {}
+    running = {}  # future -> stage name
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while waiting or running:
+            ready = [stage for stage in waiting if all(need in results for need in stage.needs)]
+            for stage in ready:
+                waiting.remove(stage)
+                inputs = {need: results[need][0] for need in stage.needs}
+                running[pool.submit(worker, make_job(stage, inputs))] = stage.name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+def critical_path(stages, durations):
+    """Longest chain of needs by summed duration: (seconds, [stage names])"""
+    longest = {}
+    for stage in topological_order(stages):
+        before = max((longest[need] for need in stage.needs), key=lambda entry: entry[0], default=(0.0, []))
+        longest[stage.name] = (before[0] + durations.get(stage.name, 0.0), before[1] + [stage.name])
+    return max(longest.values(), key=lambda entry: entry[0], default=(0.0, []))
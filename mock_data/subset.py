@@ -0,0 +1,231 @@
+"""Extract a small, foreign-key consistent slice of a generated CSV dataset.
+
+Customers and/or prophets are sampled, by fraction or from a list of IDs,
+and everything the sample needs comes with them:
+
+- bookings between a sampled customer and a sampled prophet (a side that is
+  not sampled matches any), with their transactions, reviews and status
+  updates;
+- the customers and prophets of those bookings, with their accounts and
+  user details;
+- every course, availability, transaction account and method of the kept
+  prophets, and every report of the kept customers;
+- all admin accounts, which reports point at, and the horoscope methods.
+
+Sampling by fraction hashes each ID with --seed instead of drawing random
+numbers, so a 10% subset is part of the 20% subset of the same seed. Every
+table is read once, in the order that makes its keys known before they are
+needed: bookings, customers, prophets, accounts, then the rest. Only the kept
+IDs are held in memory, as sorted arrays of 64-bit keys.
+
+    python3 subset.py csv_output subset_output --customers-fraction 0.01
+    python3 subset.py csv_output subset_output --prophet-ids prophets.txt
+"""
+import argparse
+import hashlib
+import os
+import sys
+from array import array
+from bisect import bisect_left
+
+from dataset_state import chunk_paths, key, load_manifest, read_rows
+from validate import sort_keys
+from writers import COMPRESSION_SUFFIXES, CsvTableWriter, MANIFEST, write_manifest
+
+# Tables copied whole: reference data every subset needs
+REFERENCE_TABLES = ["horoscope_methods"]
+# Tables kept by their prophet_id
+PROPHET_TABLES = ["courses", "prophet_availabilities", "transaction_accounts", "prophet_methods"]
+# Table -> its booking ID column
+BOOKING_TABLES = {"transactions": "booking_id", "reviews": "booking_id", "booking_status_updates": "id"}
+
+def sampled(hex_id, fraction, seed):
+    """Whether an ID falls into the fraction sampled with seed; stable as the fraction grows"""
+    digest = hashlib.blake2b(f"{seed}:{hex_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") < fraction * (1 << 64)
+
+class KeySet:
+    """Set of 16-hex-char IDs: keys are appended while a table streams, then frozen for lookups"""
+
+    def __init__(self, ids=()):
+        self.keys = array("Q", map(key, ids))
+
+    def add(self, hex_id):
+        self.keys.append(key(hex_id))
+
+    def freeze(self):
+        self.keys = sort_keys(self.keys)
+        return self
+
+    def __contains__(self, hex_id):
+        k = key(hex_id)
+        i = bisect_left(self.keys, k)
+        return i < len(self.keys) and self.keys[i] == k
+
+class Selection:
+    """The sampled side of the bookings: by ID list, by fraction, or everything when neither is given"""
+
+    def __init__(self, ids=None, fraction=None, seed=0):
+        self.ids = KeySet(ids).freeze() if ids is not None else None
+        self.fraction = fraction
+        self.seed = seed
+
+    @property
+    def given(self):
+        return self.ids is not None or self.fraction is not None
+
+    def __contains__(self, hex_id):
+        if self.ids is not None:
+            return hex_id in self.ids
+        if self.fraction is not None:
+            return sampled(hex_id, self.fraction, self.seed)
+        return True
+
+def read_ids(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+class Subsetter:
+    """Writes the subset of the dataset in `source` selected by customers and prophets to `target`"""
+
+    def __init__(self, source, target, customers, prophets, chunk_rows=None, compression=None):
+        self.source = source
+        self.target = target
+        self.manifest = load_manifest(source) if os.path.exists(os.path.join(source, MANIFEST)) else None
+        if self.manifest is not None and self.manifest["format"] != "csv":
+            raise ValueError(f"Subsets need a csv dataset, {source} is {self.manifest['format']}")
+        self.customers = customers
+        self.prophets = prophets
+        self.chunk_rows = chunk_rows
+        self.compression = compression
+        self.written = {}
+        self.totals = {}
+
+    def rows(self, table):
+        total = 0
+        for row in read_rows(self.source, self.manifest, table):
+            total += 1
+            yield row
+        self.totals[table] = self.totals.get(table, 0) + total
+
+    def save(self, table, rows):
+        if not chunk_paths(self.source, self.manifest, table):
+            return 0
+        with CsvTableWriter(table, self.target, chunk_rows=self.chunk_rows, compression=self.compression) as writer:
+            for row in rows:
+                writer.write(row)
+        self.written[table] = writer.chunks
+        return writer.count
+
+    def run(self):
+        booking_ids = KeySet()
+        booked_customers = KeySet()
+        booked_prophets = KeySet()
+
+        def keep_booking(row):
+            if row["customer_id"] in self.customers and row["prophet_id"] in self.prophets:
+                booking_ids.add(row["id"])
+                booked_customers.add(row["customer_id"])
+                booked_prophets.add(row["prophet_id"])
+                return True
+            return False
+
+        self.save("bookings", filter(keep_booking, self.rows("bookings")))
+        booking_ids.freeze()
+        booked_customers.freeze()
+        booked_prophets.freeze()
+
+        # A sampled side keeps its sample, booked or not; the other side only what was booked
+        customer_ids, prophet_ids, account_ids = KeySet(), KeySet(), KeySet()
+        for table, selection, booked, ids in (
+            ("customers", self.customers, booked_customers, customer_ids),
+            ("prophets", self.prophets, booked_prophets, prophet_ids),
+        ):
+            def keep(row, selection=selection, booked=booked, ids=ids):
+                if row["id"] in (selection if selection.given else booked):
+                    ids.add(row["id"])
+                    account_ids.add(row["account_id"])
+                    return True
+                return False
+            self.save(table, filter(keep, self.rows(table)))
+        customer_ids.freeze()
+        prophet_ids.freeze()
+        account_ids.freeze()
+
+        admin_ids = KeySet()
+
+        def keep_account(row):
+            if row["role"] == "ADMIN":
+                admin_ids.add(row["id"])
+                return True
+            return row["id"] in account_ids
+
+        self.save("accounts", filter(keep_account, self.rows("accounts")))
+        admin_ids.freeze()
+        self.save("user_details", (
+            row for row in self.rows("user_details") if row["account_id"] in account_ids or row["account_id"] in admin_ids
+        ))
+        for table in PROPHET_TABLES:
+            self.save(table, (row for row in self.rows(table) if row["prophet_id"] in prophet_ids))
+        for table, column in BOOKING_TABLES.items():
+            self.save(table, (row for row in self.rows(table) if row[column] in booking_ids))
+        self.save("reports", (row for row in self.rows("reports") if row["customer_id"] in customer_ids))
+        for table in REFERENCE_TABLES:
+            self.save(table, self.rows(table))
+
+        options = {name: self.manifest.get(name) for name in ("seed", "id_seed", "id_spaces", "now", "passwords")} if self.manifest else {}
+        write_manifest(self.target, self.written, format="csv", compression=self.compression,
+                       chunk_rows=self.chunk_rows, **options)
+
+def print_subset(subsetter):
+    kept = total = 0
+    for table, entries in subsetter.written.items():
+        rows = sum(entry["rows"] for entry in entries)
+        count = subsetter.totals.get(table, 0)
+        if count:
+            print(f"  - {table}: {rows} of {count} records")
+        kept += rows
+        total += count
+    print(f"\nKept {kept} of {total} records")
+
+def parse_fraction(value):
+    fraction = float(value)
+    if not 0 < fraction <= 1:
+        raise argparse.ArgumentTypeError("must be in (0, 1]")
+    return fraction
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract a foreign-key consistent subset of a generated mock dataset")
+    parser.add_argument("source", help="Dataset directory (with or without manifest.json)")
+    parser.add_argument("target", help="Directory to write the subset into")
+    customers = parser.add_mutually_exclusive_group()
+    customers.add_argument("--customers-fraction", type=parse_fraction, help="Sample this fraction of the customers")
+    customers.add_argument("--customer-ids", help="File of customer IDs to keep, one per line")
+    prophets = parser.add_mutually_exclusive_group()
+    prophets.add_argument("--prophets-fraction", type=parse_fraction, help="Sample this fraction of the prophets")
+    prophets.add_argument("--prophet-ids", help="File of prophet IDs to keep, one per line")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the fraction samples")
+    parser.add_argument("--chunk-rows", type=int, help="Split every table into chunk files of this many rows")
+    parser.add_argument("--compression", choices=["none", *(c for c in COMPRESSION_SUFFIXES if c)], default="none",
+                        help="Compress the subset's CSV files")
+    args = parser.parse_args(argv)
+    if not any((args.customers_fraction, args.customer_ids, args.prophets_fraction, args.prophet_ids)):
+        parser.error("sample customers and/or prophets with a --*-fraction or --*-ids option")
+    if os.path.abspath(args.source) == os.path.abspath(args.target):
+        parser.error("the subset must go to another directory than the dataset")
+    if args.chunk_rows is not None and args.chunk_rows < 1:
+        parser.error("--chunk-rows must be positive")
+
+    subsetter = Subsetter(
+        args.source, args.target,
+        Selection(read_ids(args.customer_ids) if args.customer_ids else None, args.customers_fraction, args.seed),
+        Selection(read_ids(args.prophet_ids) if args.prophet_ids else None, args.prophets_fraction, args.seed),
+        args.chunk_rows, None if args.compression == "none" else args.compression,
+    )
+    subsetter.run()
+    print(f"\nSubset of {args.source} written to {args.target}:")
+    print_subset(subsetter)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
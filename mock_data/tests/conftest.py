@@ -0,0 +1,56 @@
+"""Fixtures shared by the mock_data tests.
+
+The tools are scripts that import each other by bare name, so their
+directory goes on sys.path. Datasets are generated by running mock.py in a
+subprocess, as users do, since it keeps its settings in module globals.
+"""
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+MOCK_DATA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MOCK_DATA)
+
+NOW = "2026-01-01T00:00:00+00:00"
+
+def run_mock(directory, *options):
+    """Generate a dataset into directory with mock.py and these options"""
+    # A cache configured in the environment would skip generation
+    env = {name: value for name, value in os.environ.items() if name != "MOCK_DATA_CACHE"}
+    subprocess.run(
+        [sys.executable, os.path.join(MOCK_DATA, "mock.py"), "--now", NOW, "--output-dir", str(directory), *options],
+        cwd=MOCK_DATA, env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+    return directory
+
+@pytest.fixture(scope="session")
+def generate(tmp_path_factory):
+    """generate(*options): directory of a dataset mock.py wrote with these options.
+
+    Datasets are generated once per session and shared, so tests must not
+    modify them; copy one with the `copy_dataset` fixture first.
+    """
+    datasets = {}
+
+    def generate(*options):
+        if options not in datasets:
+            datasets[options] = run_mock(tmp_path_factory.mktemp("dataset"), *options)
+        return datasets[options]
+    return generate
+
+@pytest.fixture
+def generate_fresh(tmp_path):
+    """generate_fresh(name, *options): a dataset of its own in tmp_path/name, for comparing runs"""
+    def generate(name, *options):
+        return run_mock(tmp_path / name, *options)
+    return generate
+
+@pytest.fixture
+def copy_dataset(tmp_path):
+    """copy_dataset(directory): a private copy of a generated dataset"""
+    def copy(directory):
+        return shutil.copytree(directory, tmp_path / "dataset")
+    return copy
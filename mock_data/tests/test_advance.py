@@ -0,0 +1,56 @@
+"""--advance-days: compact state read back from a dataset, and the scale it continues at"""
+import subprocess
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import run_mock
+from dataset_state import ScheduledBookings, key, load_manifest, read_rows, read_state, timestamp
+
+OPTIONS = ("--seed", "3", "--customers", "200", "--prophets", "10", "--availability-days", "20")
+
+def test_scheduled_bookings_lookup():
+    bookings = ScheduledBookings()
+    for booking_key in (30, 10, 50, 20, 40):
+        bookings.append(booking_key, booking_key + 1, booking_key + 2, booking_key + 3, booking_key + 4)
+    bookings.finish(removed=[20, 60])
+    assert len(bookings) == 4
+    assert list(bookings.keys) == [10, 30, 40, 50]
+    assert bookings[30] == (31, 32, 33, 34)
+    assert 20 not in bookings and 50 in bookings
+    assert dict(bookings.items())[40] == (41, 42, 43, 44)
+    with pytest.raises(KeyError):
+        bookings[20]
+
+def scheduled_from_csv(directory):
+    manifest = load_manifest(directory)
+    scheduled = {
+        key(row["id"]): (key(row["customer_id"]), timestamp(row["end_datetime"]), key(row["prophet_id"]), key(row["course_id"]))
+        for row in read_rows(directory, manifest, "bookings") if row["status"] == "SCHEDULED"
+    }
+    for row in read_rows(directory, manifest, "booking_status_updates"):
+        scheduled.pop(key(row["id"]), None)
+    return scheduled
+
+def test_read_state_follows_increments(generate, copy_dataset):
+    directory = copy_dataset(generate(*OPTIONS))
+    assert dict(read_state(directory).scheduled_bookings.items()) == scheduled_from_csv(directory)
+    run_mock(directory, "--advance-days", "5")
+    state = read_state(directory)
+    assert load_manifest(directory)["tables"]["booking_status_updates"]["rows"]
+    assert dict(state.scheduled_bookings.items()) == scheduled_from_csv(directory)
+
+def test_advance_keeps_the_scale_of_the_manifest(generate, copy_dataset):
+    directory = copy_dataset(generate(*OPTIONS))
+    assert load_manifest(directory)["scale"]["availability_days"] == 20
+    run_mock(directory, "--advance-days", "5")
+    state = read_state(directory)
+    now = datetime.fromisoformat(state.manifest["now"])
+    assert state.manifest["scale"]["availability_days"] == 20
+    assert state.last_available_date == now.date() + timedelta(days=19)
+
+def test_advance_rejects_scale_options(generate, copy_dataset):
+    directory = copy_dataset(generate(*OPTIONS))
+    with pytest.raises(subprocess.CalledProcessError):
+        run_mock(directory, "--advance-days", "5", "--customers", "500")
+    assert read_state(directory).manifest["now"] == load_manifest(generate(*OPTIONS))["now"]
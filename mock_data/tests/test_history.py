@@ -0,0 +1,26 @@
+"""--history-days: signup times follow the master seed and agree across processes"""
+from datetime import datetime, timezone
+
+from dataset_state import load_manifest, read_rows
+from history import Timeline
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def signups(seed):
+    return list(Timeline(NOW, 365, seed=seed).signups(0, 1000))
+
+def test_signups_depend_on_the_seed():
+    assert signups(1) == signups(1)
+    assert signups(1) != signups(2)
+    assert signups(None) == signups(None)
+    assert all(NOW.replace(year=2025) <= moment <= NOW for moment in signups(3))
+
+def created_at(directory):
+    # Sorted: shards write the accounts in another order, but each global index signs up at the same time
+    return sorted(row["created_at"] for row in read_rows(directory, load_manifest(directory), "accounts"))
+
+def test_seed_changes_account_history(generate):
+    options = ("--customers", "200", "--prophets", "10", "--history-days", "120")
+    first = created_at(generate("--seed", "1", *options))
+    assert first == created_at(generate("--seed", "1", *options, "--shards", "2"))
+    assert first != created_at(generate("--seed", "2", *options))
@@ -0,0 +1,93 @@
+"""IdEngine and the unique values built from it: unique by construction, sized for their columns, reproducible"""
+import re
+
+import pytest
+
+from dataset_state import load_manifest, read_rows
+from ids import ACCOUNT_NUMBER_DIGITS, SPACE_SIZE, IdEngine
+from prisma_schema import GENERATED_TABLE_MODELS, field_by_name, load_schema
+
+HEX_ID = re.compile(r"[0-9a-f]{16}")
+LARGE = ("--seed", "11", "--customers", "20000", "--prophets", "500")
+
+def test_ids_are_unique_hex_strings():
+    ids = IdEngine(seed=1)
+    values = [ids.next_id("booking") for _ in range(200_000)]
+    assert len(set(values)) == len(values)
+    assert all(HEX_ID.fullmatch(value) for value in values)
+
+def test_shard_spaces_never_overlap():
+    values = set()
+    for space in range(4):
+        ids = IdEngine(seed=1, space=space)
+        values.update(ids.next_id("account") for _ in range(50_000))
+    assert len(values) == 200_000
+
+def test_ids_around_space_boundaries():
+    ids = IdEngine(seed=1)
+    counters = [space * SPACE_SIZE + offset for space in (0, 1, 999) for offset in (0, 1, SPACE_SIZE - 1)]
+    values = {ids.id_for("course", counter) for counter in counters}
+    assert len(values) == len(counters)
+    assert all(HEX_ID.fullmatch(value) for value in values)
+
+def test_account_numbers_are_unique_and_fixed_width():
+    ids = IdEngine(seed=1)
+    numbers = [ids.account_number(value) for value in range(1_000_000)]
+    assert len(set(numbers)) == len(numbers)
+    assert all(len(number) == ACCOUNT_NUMBER_DIGITS and number.isdigit() for number in numbers)
+
+def test_same_seed_same_ids_and_other_seed_other_ids():
+    first, second, other = IdEngine(seed=5), IdEngine(seed=5), IdEngine(seed=6)
+    values = [first.next_id("review") for _ in range(1000)]
+    assert values == [second.next_id("review") for _ in range(1000)]
+    assert values != [other.next_id("review") for _ in range(1000)]
+    assert [first.account_number(n) for n in range(100)] == [second.account_number(n) for n in range(100)]
+
+def test_vectorised_ids_match_python():
+    np = pytest.importorskip("numpy")
+    import vectorized
+    ids = IdEngine(seed=3)
+    keys = ids.namespace_keys("customer")
+    counters = np.arange(2_000_000, dtype=np.uint64)
+    values = vectorized.feistel64(counters, keys)
+    assert len(np.unique(values)) == len(values)
+    sample = range(0, 2_000_000, 9_973)
+    assert vectorized.hex_ids(values[list(sample)]) == [ids.id_for("customer", n) for n in sample]
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_generated_unique_values_fit_their_columns(generate, engine):
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    directory = generate(*LARGE, "--engine", engine)
+    manifest = load_manifest(directory)
+    schema = load_schema()
+    for table, model_name in GENERATED_TABLE_MODELS.items():
+        model = schema.models[model_name]
+        fields = field_by_name(model)
+        rows = list(read_rows(directory, manifest, table))
+        assert rows, table
+        # Auto-increment IDs and defaulted columns are left to the database
+        written = rows[0].keys()
+        for field in fields.values():
+            if field.column in written and field.varchar_length:
+                longest = max(rows, key=lambda row: len(row[field.column]))[field.column]
+                assert len(longest) <= field.varchar_length, (table, field.column, longest)
+        for names in model.unique_constraints:
+            columns = [fields[name].column for name in names]
+            if all(column in written for column in columns):
+                values = [tuple(row[column] for column in columns) for row in rows]
+                assert len(set(values)) == len(values), (table, columns)
+        if fields["id"].type == "String":
+            assert all(HEX_ID.fullmatch(row["id"]) for row in rows), table
+
+    assert sum(1 for _ in read_rows(directory, manifest, "accounts")) == 20000 + 500 + 2
+    numbers = [row["account_number"] for row in read_rows(directory, manifest, "transaction_accounts")]
+    assert len(set(numbers)) == len(numbers) > 0
+
+def test_same_seed_same_dataset(generate_fresh):
+    options = ("--seed", "7", "--customers", "300", "--prophets", "20")
+    first = load_manifest(generate_fresh("first", *options))["tables"]
+    second = load_manifest(generate_fresh("second", *options))["tables"]
+    assert first == second
+    other = load_manifest(generate_fresh("other", "--seed", "8", *options[2:]))["tables"]
+    assert other["accounts"] != first["accounts"]
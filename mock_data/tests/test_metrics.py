@@ -0,0 +1,28 @@
+"""metrics.json: stage counters reported by the generators instead of debug output"""
+import json
+import os
+
+import pytest
+
+from metrics import Metrics
+
+def test_counts_belong_to_the_running_stage():
+    metrics = Metrics()
+    metrics.count("ignored")
+    with metrics.stage("bookings"):
+        metrics.count("skipped_bookings", 3)
+        metrics.count("skipped_bookings")
+    with metrics.stage("reviews"):
+        pass
+    assert [entry["counts"] for entry in metrics.stages] == [{"skipped_bookings": 4}, {}]
+    assert metrics.report()["counts"] == {"skipped_bookings": 4}
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_skipped_bookings_are_reported(generate, engine):
+    # Far more bookings than two days of three prophets' availability can take
+    directory = generate("--seed", "2", "--customers", "3000", "--prophets", "3", "--availability-days", "2", "--engine", engine)
+    with open(os.path.join(directory, "metrics.json"), encoding="utf-8") as f:
+        report = json.load(f)
+    bookings = next(entry for entry in report["stages"] if entry["stage"] == "bookings")
+    assert bookings["counts"]["skipped_bookings"] > 1000
+    assert report["counts"] == bookings["counts"]
@@ -0,0 +1,116 @@
+"""oracle.json agrees with the aggregates recomputed from the tables that were written"""
+import json
+import os
+from decimal import Decimal
+
+import pytest
+
+from conftest import run_mock
+from dataset_state import load_manifest, read_rows
+from oracle import COMPLETED, OPEN_REPORT_STATUS, ORACLE_FILE, UNASSIGNED
+
+OPTIONS = ("--seed", "13", "--customers", "300", "--prophets", "20")
+
+def _add(counts, name, amount=1):
+    counts[name] = counts.get(name, 0) + amount
+
+def _scores(count, total):
+    return {"reviews": count, "score_total": total, "average_score": round(total / count, 4) if count else None}
+
+def recompute(directory):
+    """The oracle's aggregates, from the tables in the manifest of directory"""
+    manifest = load_manifest(directory)
+    tables = manifest["tables"]
+
+    def rows(table):
+        return read_rows(directory, manifest, table) if table in tables else ()
+
+    bookings = {row["id"]: [row["prophet_id"], row["course_id"], row["status"]] for row in rows("bookings")}
+    for row in rows("booking_status_updates"):
+        bookings[row["id"]][2] = row["status"]
+
+    bookings_by_status = {}
+    prophets = {}
+    for prophet_id, _, status in bookings.values():
+        _add(bookings_by_status, status)
+        entry = prophets.setdefault(prophet_id, {"bookings": {}, "reviews": [0, 0], "revenue": {}})
+        _add(entry["bookings"], status)
+
+    courses = {}
+    for row in rows("reviews"):
+        prophet_id, course_id, _ = bookings[row["booking_id"]]
+        score = int(row["score"])
+        for reviews in (prophets[prophet_id]["reviews"], courses.setdefault(course_id, [0, 0])):
+            reviews[0] += 1
+            reviews[1] += score
+
+    for row in rows("transactions"):
+        prophet_id, _, status = bookings[row["booking_id"]]
+        if status == COMPLETED:
+            _add(prophets[prophet_id]["revenue"], row["status"], Decimal(row["amount"]))
+
+    reports_by_status = {}
+    open_reports = {}
+    for row in rows("reports"):
+        _add(reports_by_status, row["report_status"])
+        if row["report_status"] == OPEN_REPORT_STATUS:
+            _add(open_reports, row["admin_id"] or UNASSIGNED)
+
+    return {
+        "bookings_by_status": bookings_by_status,
+        "reports_by_status": reports_by_status,
+        "open_reports_per_admin": open_reports,
+        "prophets": {
+            prophet_id: {
+                "bookings_by_status": entry["bookings"],
+                **_scores(*entry["reviews"]),
+                "completed_revenue": sum(entry["revenue"].values(), Decimal(0)),
+                "revenue_by_payout_status": entry["revenue"],
+            } for prophet_id, entry in prophets.items()
+        },
+        "courses": {course_id: _scores(*reviews) for course_id, reviews in courses.items()},
+    }
+
+def nonzero(counts):
+    return {name: count for name, count in counts.items() if count}
+
+def assert_oracle_matches(directory):
+    with open(os.path.join(directory, ORACLE_FILE), encoding="utf-8") as f:
+        oracle = json.load(f)
+    expected = recompute(directory)
+
+    assert nonzero(oracle["bookings_by_status"]) == expected["bookings_by_status"]
+    assert oracle["reports_by_status"] == expected["reports_by_status"]
+    assert oracle["open_reports_per_admin"] == expected["open_reports_per_admin"]
+    assert oracle["courses"] == expected["courses"]
+
+    # The oracle only lists prophets that have bookings
+    assert oracle["prophets"].keys() == expected["prophets"].keys()
+    for prophet_id, entry in expected["prophets"].items():
+        written = oracle["prophets"][prophet_id]
+        assert nonzero(written["bookings_by_status"]) == entry["bookings_by_status"], prophet_id
+        assert (written["reviews"], written["score_total"], written["average_score"]) == (
+            entry["reviews"], entry["score_total"], entry["average_score"]), prophet_id
+        assert Decimal(written["completed_revenue"]) == entry["completed_revenue"], prophet_id
+        assert {name: Decimal(amount) for name, amount in written["revenue_by_payout_status"].items()} == \
+            entry["revenue_by_payout_status"], prophet_id
+    return oracle
+
+@pytest.mark.parametrize("extra", [
+    (),
+    ("--engine", "numpy"),
+    ("--shards", "3", "--workers", "2"),
+    ("--history-days", "120"),
+    ("--history-days", "120", "--shards", "3", "--workers", "2"),
+    ("--scheduler", "dag", "--workers", "2"),
+], ids=["sequential", "numpy", "sharded", "history", "history-sharded", "dag"])
+def test_oracle_matches_written_tables(generate, extra):
+    oracle = assert_oracle_matches(generate(*OPTIONS, *extra))
+    assert oracle["bookings_by_status"] and oracle["courses"] and oracle["reports_by_status"]
+
+def test_oracle_follows_advance(generate, copy_dataset):
+    directory = copy_dataset(generate(*OPTIONS))
+    run_mock(directory, "--advance-days", "5")
+    run_mock(directory, "--advance-days", "5")
+    oracle = assert_oracle_matches(directory)
+    assert oracle["bookings_by_status"].get("SCHEDULED")
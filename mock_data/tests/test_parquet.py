@@ -0,0 +1,57 @@
+"""Parquet output: one fixed schema per table, typed from prisma/schema.prisma, whichever engine wrote it"""
+import os
+from decimal import Decimal
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from dataset_state import load_manifest, read_rows
+from writers import parquet_schema
+
+PARQUET = ("--seed", "5", "--format", "parquet")
+
+def schemas(directory):
+    return {
+        name: pq.read_schema(os.path.join(directory, table["chunks"][0]["path"]))
+        for name, table in load_manifest(directory)["tables"].items()
+    }
+
+def test_engines_write_the_same_schema(generate):
+    python = schemas(generate(*PARQUET, "--engine", "python"))
+    numpy = schemas(generate(*PARQUET, "--engine", "numpy"))
+    # The engines draw different random data, so a small table may be empty in one of them
+    assert len(python.keys() & numpy.keys()) >= 10
+    for name in python.keys() & numpy.keys():
+        assert python[name].equals(numpy[name]), name
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_columns_are_typed_from_the_prisma_schema(generate, engine):
+    tables = schemas(generate(*PARQUET, "--engine", engine))
+    utc = pa.timestamp("us", tz="UTC")
+    assert tables["courses"].field("duration_min").type == pa.int32()
+    assert tables["courses"].field("price").type == pa.decimal128(7, 2)
+    assert tables["courses"].field("is_active").type == pa.bool_()
+    assert tables["courses"].field("horoscope_method_id").type == pa.int32()
+    assert tables["transactions"].field("amount").type == pa.decimal128(10, 2)
+    assert tables["reviews"].field("score").type == pa.int32()
+    assert tables["bookings"].field("start_datetime").type == utc
+    assert tables["bookings"].field("status").type == pa.string()
+    assert tables["accounts"].field("created_at").type == utc
+    assert tables["customers"].field("birth_date").type == pa.date32()
+    assert tables["customers"].field("birth_time").type == pa.time64("us")
+
+def test_values_match_the_csv_output(generate):
+    directory = generate(*PARQUET, "--engine", "numpy")
+    csv_directory = generate("--seed", "5", "--engine", "numpy")
+    courses = pq.read_table(os.path.join(directory, "courses.parquet")).to_pylist()
+    expected = list(read_rows(csv_directory, load_manifest(csv_directory), "courses"))
+    assert [course["price"] for course in courses] == [Decimal(course["price"]) for course in expected]
+    assert [course["is_active"] for course in courses] == [course["is_active"] == "True" for course in expected]
+    bookings = pq.read_table(os.path.join(directory, "bookings.parquet")).to_pylist()
+    assert bookings[0]["start_datetime"].isoformat()[:19] == next(read_rows(csv_directory, load_manifest(csv_directory), "bookings"))["start_datetime"][:19]
+
+def test_unknown_columns_are_strings():
+    schema = parquet_schema(pa, "courses", ["id", "price", "notes"])
+    assert schema.types == [pa.string(), pa.decimal128(7, 2), pa.string()]
@@ -0,0 +1,35 @@
+"""Seeded output is byte-identical across runs, shard schedules and schedulers, as the manifest checksums show"""
+import pytest
+
+from dataset_state import load_manifest
+
+OPTIONS = ("--seed", "7", "--customers", "300", "--prophets", "20")
+
+def checksums(directory):
+    """{table: [(path, rows, sha256) of every chunk]} of a dataset"""
+    return {
+        table: [(chunk["path"], chunk["rows"], chunk["sha256"]) for chunk in entry["chunks"]]
+        for table, entry in load_manifest(directory)["tables"].items()
+    }
+
+@pytest.mark.parametrize("extra", [
+    (),
+    ("--format", "copy", "--chunk-rows", "100", "--compression", "gzip"),
+    ("--history-days", "120"),
+], ids=["csv", "copy-chunked-gzip", "history"])
+def test_sharded_runs_are_identical(generate_fresh, extra):
+    first = checksums(generate_fresh("first", *OPTIONS, "--shards", "3", "--workers", "2", *extra))
+    second = checksums(generate_fresh("second", *OPTIONS, "--shards", "3", "--workers", "3", *extra))
+    assert first == second
+    assert all(first.values())
+
+def test_shard_count_changes_output(generate_fresh):
+    two = checksums(generate_fresh("two", *OPTIONS, "--shards", "2"))
+    three = checksums(generate_fresh("three", *OPTIONS, "--shards", "3"))
+    assert two["accounts"] != three["accounts"]
+
+@pytest.mark.parametrize("extra", [(), ("--history-days", "120")], ids=["default", "history"])
+def test_dag_scheduler_matches_sequential(generate_fresh, extra):
+    sequential = checksums(generate_fresh("sequential", *OPTIONS, *extra))
+    dag = checksums(generate_fresh("dag", *OPTIONS, "--scheduler", "dag", "--workers", "2", *extra))
+    assert dag == sequential
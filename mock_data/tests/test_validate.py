@@ -0,0 +1,102 @@
+"""validate.py passes generated datasets and reports each kind of broken row"""
+import csv
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import validate
+from conftest import MOCK_DATA
+from dataset_state import load_manifest
+
+OPTIONS = ("--seed", "7", "--customers", "300", "--prophets", "20")
+
+def edit_table(directory, table, edit):
+    """Rewrite <table>.csv with edit(rows) applied to its rows (dicts)"""
+    path = directory / f"{table}.csv"
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        header = reader.fieldnames
+        rows = list(reader)
+    edit(rows)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, header)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def errors(directory):
+    return {(entry["table"], entry["check"]) for entry in validate.validate(str(directory)).as_dict()["errors"]}
+
+@pytest.mark.parametrize("extra", [
+    (),
+    ("--history-days", "120"),
+    ("--chunk-rows", "100", "--compression", "gzip"),
+    ("--history-days", "120", "--partition", "month"),
+    ("--shards", "2"),
+], ids=["default", "history", "chunked-gzip", "partitioned", "sharded"])
+def test_generated_datasets_pass(generate, extra):
+    report = validate.validate(str(generate(*OPTIONS, *extra)))
+    assert not report.errors, report.as_dict()["errors"]
+    assert report.rows["bookings"] > 0
+
+def test_committed_csv_output_is_current(generate):
+    committed = os.path.join(MOCK_DATA, "csv_output")
+    report = validate.validate(committed)
+    assert not report.errors, report.as_dict()["errors"]
+    # The command in the DEFAULT_SCALE comment of mock.py reproduces it
+    regenerated = load_manifest(generate("--seed", "42"))["tables"]
+    assert {name: [chunk["sha256"] for chunk in table["chunks"]] for name, table in load_manifest(committed)["tables"].items()} == \
+        {name: [chunk["sha256"] for chunk in table["chunks"]] for name, table in regenerated.items()}
+
+def test_main_exit_codes(generate, copy_dataset, capsys):
+    directory = generate(*OPTIONS)
+    assert validate.main([str(directory)]) == 0
+    broken = copy_dataset(directory)
+    edit_table(broken, "bookings", lambda rows: rows[0].update(status="BOGUS"))
+    assert validate.main([str(broken)]) == 1
+    assert "1 kinds of errors found" in capsys.readouterr().out
+
+def test_rejects_non_csv_datasets(generate):
+    with pytest.raises(ValueError, match="csv dataset"):
+        validate.validate(str(generate(*OPTIONS, "--format", "copy")))
+
+def break_foreign_key(directory):
+    edit_table(directory, "bookings", lambda rows: rows[0].update(customer_id="ffffffffffffffff"))
+
+def duplicate_email(directory):
+    edit_table(directory, "accounts", lambda rows: rows[1].update(email=rows[0]["email"]))
+
+def bad_enum(directory):
+    edit_table(directory, "bookings", lambda rows: rows[0].update(status="BOGUS"))
+
+def too_long(directory):
+    edit_table(directory, "accounts", lambda rows: rows[0].update(username="x" * 31))
+
+def overlapping_booking(directory):
+    # A second booking of the same prophet, starting before the first one ends
+    def edit(rows):
+        start, end = (datetime.fromisoformat(rows[0][column]) + timedelta(minutes=1)
+                      for column in ("start_datetime", "end_datetime"))
+        rows.append({**rows[0], "id": "0000000000000001",
+                     "start_datetime": start.isoformat(), "end_datetime": end.isoformat()})
+    edit_table(directory, "bookings", edit)
+
+@pytest.mark.parametrize("inject, expected", [
+    (break_foreign_key, {("bookings", "customer references a missing Customer")}),
+    (duplicate_email, {("accounts", "duplicate (email)")}),
+    (bad_enum, {("bookings", "status is not a valid enum value")}),
+    (too_long, {("accounts", "username is longer than VarChar(30)")}),
+    (overlapping_booking, {("bookings", "overlapping bookings of one prophet")}),
+])
+def test_broken_rows_are_reported(generate, copy_dataset, inject, expected):
+    directory = copy_dataset(generate(*OPTIONS))
+    inject(directory)
+    assert errors(directory) == expected
+
+def test_examples_point_at_the_row(generate, copy_dataset):
+    directory = copy_dataset(generate(*OPTIONS))
+    duplicate_email(directory)
+    entry = validate.validate(str(directory)).as_dict()["errors"][0]
+    assert entry["count"] == 1
+    email = next(csv.DictReader(open(directory / "accounts.csv", encoding="utf-8")))["email"]
+    assert entry["examples"] == [email]
@@ -0,0 +1,178 @@
+"""API request traces matching a generated dataset, for load tests.
+
+A trace is NDJSON, one request per line in time order:
+
+    {"t": 0.412, "session": 3, "op": "login", "method": "POST", "path": "/auth/login", "body": {...}}
+    {"t": 1.087, "session": 3, "op": "search_courses", "method": "GET", "path": "/course", "query": {...}, "auth": true}
+    ...
+
+``t`` is seconds since the start of the trace, ``auth`` means the request
+carries the session's token from its login, and the last request of a
+session has ``"last": true``. Sessions arrive as a Poisson process:
+
+- customers log in, search courses with the sort and filter parameters of
+  FilterAndSortCoursesDto, look up the availability of a course and may book
+  it, always into a slot that is still free in the dataset and not taken by
+  an earlier booking of the same trace;
+- prophets log in and look up their own availability;
+- admins log in.
+
+Free slots are rebuilt from prophet_availabilities minus every booking, so
+only the keys of the dataset and its calendar are held in memory, and
+accounts are reservoir-sampled per role.
+"""
+import heapq
+import json
+import random
+from datetime import date, datetime, timedelta
+
+from availability import AvailabilityCalendar, DAY_START_HOUR, SLOT_MINUTES, slot_count, slot_time
+from dataset_state import read_rows
+from passwords import account_password
+
+SESSION_ROLES = {"CUSTOMER": 0.85, "PROPHET": 0.12, "ADMIN": 0.03}
+SESSION_RATE = 10.0  # new sessions per second
+THINK_TIME = 2.0  # mean seconds between the requests of a session
+SEARCHES_PER_SESSION = (1, 3)
+BOOKING_PROBABILITY = 0.5  # of a customer session that looked up availability
+
+# sort_by values CourseRepository.getFilteredCourses understands
+SORT_BY = ["Popular", "Newest Update", "Oldest Update", "Lowest Price", "Highest Price"]
+PAGE_SIZES = [10, 20, 50]
+MAX_PAGE = 5
+FILTER_PROBABILITY = 0.4  # of each optional filter in a search
+
+def slot_of(start_time):
+    """Slot index of an HH:MM[:SS] time within the day"""
+    hours, minutes = (int(part) for part in start_time.split(":")[:2])
+    return ((hours - DAY_START_HOUR) * 60 + minutes) // SLOT_MINUTES
+
+def sample_accounts(rows, size, rng):
+    """Reservoir sample of up to `size` usernames per role from a stream of account rows"""
+    samples, seen = {}, {}
+    for row in rows:
+        role = row["role"]
+        sample = samples.setdefault(role, [])
+        seen[role] = seen.get(role, 0) + 1
+        if len(sample) < size:
+            sample.append(row["username"])
+        else:
+            i = rng.randrange(seen[role])
+            if i < size:
+                sample[i] = row["username"]
+    return samples
+
+def free_calendar(directory, manifest, today, durations, rng):
+    """Calendar of the slots from tomorrow on that are available and not booked yet"""
+    calendar = AvailabilityCalendar(durations, rng=rng)
+    for row in read_rows(directory, manifest, "prophet_availabilities"):
+        day = (date.fromisoformat(row["date"]) - today).days
+        if day > 0:
+            calendar.open(row["prophet_id"], day, slot_of(row["start_time"]), 1)
+    for row in read_rows(directory, manifest, "bookings"):
+        start = datetime.fromisoformat(row["start_datetime"])
+        day = (start.date() - today).days
+        if day > 0:
+            minutes = (datetime.fromisoformat(row["end_datetime"]) - start).total_seconds() // 60
+            calendar.reserve(row["prophet_id"], day, slot_of(start.strftime("%H:%M")), slot_count(minutes))
+    return calendar
+
+class TraceGenerator:
+    """Sessions of requests against the dataset in `directory`, as of its manifest's clock"""
+
+    def __init__(self, directory, manifest, sessions, rng=random):
+        self.rng = rng
+        self.today = datetime.fromisoformat(manifest["now"]).date()
+        # Logins send the passwords of the dataset's --password-hashes
+        self.password_mode = manifest.get("passwords")
+        self.courses = [
+            (row["id"], row["prophet_id"], int(row["duration_min"]), float(row["price"]),
+             row["horoscope_method"], row["horoscope_sector"])
+            for row in read_rows(directory, manifest, "courses") if row["is_active"] == "True"
+        ]
+        self.methods = sorted({course[4] for course in self.courses})
+        self.sectors = sorted({course[5] for course in self.courses})
+        self.accounts = sample_accounts(read_rows(directory, manifest, "accounts"), sessions, rng)
+        self.calendar = free_calendar(directory, manifest, self.today, {c[2] for c in self.courses} or {SLOT_MINUTES}, rng)
+        self.roles = [role for role in SESSION_ROLES if self.accounts.get(role)]
+        self.bookings = 0
+
+    def _search(self, course=None):
+        """Query of a course search; with a course, one whose filters that course matches"""
+        rng = self.rng
+        query = {}
+        if rng.random() < 0.7:
+            query["sort_by"] = rng.choice(SORT_BY)
+        if course is not None or rng.random() < FILTER_PROBABILITY:
+            price = course[3] if course else rng.uniform(300, 2000)
+            query["price_min"] = int(price * rng.uniform(0.5, 1.0))
+            query["price_max"] = int(price * rng.uniform(1.0, 1.5)) + 1
+        if self.methods and rng.random() < FILTER_PROBABILITY:
+            query["horoscope_method"] = course[4] if course else rng.choice(self.methods)
+        if self.sectors and rng.random() < FILTER_PROBABILITY:
+            query["horoscope_sector"] = course[5] if course else rng.choice(self.sectors)
+        query["limit"] = rng.choice(PAGE_SIZES)
+        if rng.random() < 0.3:
+            query["offset"] = query["limit"] * rng.randint(1, MAX_PAGE)
+        return query
+
+    def _booking(self, course):
+        course_id, prophet_id, duration = course[:3]
+        window = self.calendar.book(prophet_id, duration)
+        if window is None:
+            return None
+        day, start_slot = window
+        start = datetime.combine(self.today + timedelta(days=day), slot_time(start_slot))
+        end = start + timedelta(minutes=duration)
+        self.bookings += 1
+        return {"courseId": course_id, "startDateTime": f"{start.isoformat()}Z", "endDateTime": f"{end.isoformat()}Z"}
+
+    def session(self):
+        """Requests of one session as (op, method, path, extra fields)"""
+        rng = self.rng
+        role = rng.choices(self.roles, weights=[SESSION_ROLES[r] for r in self.roles])[0]
+        username = rng.choice(self.accounts[role])
+        yield "login", "POST", "/auth/login", {"body": {"username": username, "password": account_password(username, self.password_mode)}}
+
+        if role == "PROPHET":
+            yield "my_availability", "GET", "/prophet/availability", {"auth": True}
+        elif role == "CUSTOMER" and self.courses:
+            course = rng.choice(self.courses)
+            for _ in range(rng.randint(*SEARCHES_PER_SESSION) - 1):
+                yield "search_courses", "GET", "/course", {"query": self._search()}
+            yield "search_courses", "GET", "/course", {"query": self._search(course)}
+            yield "availability", "GET", f"/prophet/availability/{course[0]}", {"auth": True}
+            if rng.random() < BOOKING_PROBABILITY:
+                body = self._booking(course)
+                if body is not None:
+                    yield "create_booking", "POST", "/booking", {"body": body, "auth": True}
+
+    def requests(self, sessions, session_rate=SESSION_RATE, think_time=THINK_TIME):
+        """Yield the request records of `sessions` sessions in time order"""
+        if not self.roles:
+            return
+        rng = self.rng
+        pending = []  # heap of (t, session, order, record)
+        start = 0.0
+        for session in range(sessions):
+            start += rng.expovariate(session_rate)
+            while pending and pending[0][0] <= start:
+                yield heapq.heappop(pending)[3]
+            t = start
+            records = list(self.session())
+            for order, (op, method, path, extra) in enumerate(records):
+                record = {"t": round(t, 6), "session": session, "op": op, "method": method, "path": path, **extra}
+                if order == len(records) - 1:
+                    record["last"] = True
+                heapq.heappush(pending, (t, session, order, record))
+                t += rng.expovariate(1 / think_time)
+        while pending:
+            yield heapq.heappop(pending)[3]
+
+def write_traces(stream, records):
+    """Write request records as NDJSON to a text stream; returns the count per op"""
+    counts = {}
+    for record in records:
+        stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+        counts[record["op"]] = counts.get(record["op"], 0) + 1
+    return counts
@@ -0,0 +1,385 @@
+"""Streaming integrity check of a generated CSV dataset against prisma/schema.prisma.
+
+Every table is read once, in foreign-key dependency order, and checked for
+
+- missing required columns and empty required values (seed.ts loads "" as NULL),
+- enum values and VarChar lengths,
+- foreign keys, including bookings only referencing active courses,
+- duplicate primary and unique keys,
+- overlapping bookings of the same prophet.
+
+Keys are kept in compact indexes: sorted arrays of 64-bit keys, where
+16-hex-char IDs are their own value and anything else is an 8-byte BLAKE2b
+hash. Memory grows by 8 bytes per key and per booking, not with row size, so
+multi-GB datasets fit in memory. Hashed keys could collide with probability
+~n^2 / 2^65, which is negligible at any size this tool generates. NumPy,
+when installed, speeds up sorting the indexes. COPY and Parquet datasets are
+rejected; generate a csv one to validate.
+
+    python3 validate.py [directory] [--json report.json]   # exits 1 on errors
+"""
+import argparse
+import csv
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from dataset_state import chunk_paths, load_manifest, open_text
+from prisma_schema import GENERATED_TABLE_MODELS, dependency_order, field_by_name, load_schema
+from writers import MANIFEST
+
+MAX_EXAMPLES = 5
+
+# (model, field) -> (referenced model, flag field): the referenced row must also have the flag set
+ACTIVE_REFERENCES = {("Booking", "courseId"): ("Course", "isActive")}
+TRUE_VALUES = ("True", "true", "t", "1")
+
+# Bookings are packed into one 64-bit integer for the overlap check: prophet
+# position (27 bits) | start minute since BOOKING_EPOCH (27 bits) | duration in minutes (10 bits)
+BOOKING_EPOCH = datetime(2000, 1, 1)
+START_BITS = 27
+DURATION_BITS = 10
+
+def hashed_key(values):
+    return int.from_bytes(hashlib.blake2b("\x1f".join(values).encode(), digest_size=8).digest(), "big")
+
+def hex_key(values):
+    try:
+        value = int(values[0], 16)
+    except ValueError:
+        return hashed_key(values)
+    return value if 0 <= value < 1 << 64 else hashed_key(values)
+
+def is_hex_id(fields):
+    return len(fields) == 1 and fields[0].type == "String" and fields[0].varchar_length == 16
+
+def _numpy():
+    if importlib.util.find_spec("numpy") is None:
+        return None
+    import numpy
+    return numpy
+
+def sort_keys(keys):
+    np = _numpy()
+    if np is None:
+        return array("Q", sorted(keys))
+    values = np.frombuffer(keys, dtype=np.uint64).copy()
+    values.sort()
+    return array("Q", values.tobytes())
+
+def file_label(path):
+    """File name in reports, with its month=... directory for monthly partitions"""
+    partition = os.path.basename(os.path.dirname(path))
+    return f"{partition}/{os.path.basename(path)}" if partition.startswith("month=") else os.path.basename(path)
+
+class KeyIndex:
+    """Compact set of 64-bit keys: appended while a table streams, sorted once, then searched"""
+
+    def __init__(self, fields):
+        self.hex = is_hex_id(fields)
+        self.key = hex_key if self.hex else hashed_key
+        self.keys = array("Q")
+
+    def add(self, values):
+        self.keys.append(self.key(values))
+
+    def freeze(self):
+        """Sort the keys; returns the keys that occur more than once"""
+        self.keys = sort_keys(self.keys)
+        keys = self.keys
+        return sorted({keys[i] for i in range(1, len(keys)) if keys[i] == keys[i - 1]})
+
+    def position(self, values):
+        """Index the key of values would have in the sorted keys"""
+        return bisect_left(self.keys, self.key(values))
+
+    def __contains__(self, values):
+        key = self.key(values)
+        i = bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def label(self, key):
+        return f"{key:016x}" if self.hex else f"key {key:016x}"
+
+class Report:
+    """Error and warning counts per table and check, with the first few examples of each"""
+
+    def __init__(self, max_examples=MAX_EXAMPLES):
+        self.max_examples = max_examples
+        self.rows = {}
+        self.errors = defaultdict(list)
+        self.warnings = defaultdict(list)
+        self._counts = defaultdict(int)
+
+    def _add(self, kind, table, check, example):
+        self._counts[kind, table, check] += 1
+        examples = getattr(self, kind)[table, check]
+        if example is not None and len(examples) < self.max_examples:
+            examples.append(example)
+
+    def error(self, table, check, example=None):
+        self._add("errors", table, check, example)
+
+    def warning(self, table, check, example=None):
+        self._add("warnings", table, check, example)
+
+    def _entries(self, kind):
+        return [{"table": table, "check": check, "count": self._counts[kind, table, check], "examples": examples}
+                for (table, check), examples in getattr(self, kind).items()]
+
+    def as_dict(self):
+        return {"ok": not self.errors, "rows": self.rows,
+                "errors": self._entries("errors"), "warnings": self._entries("warnings")}
+
+def _required(field):
+    return not field.optional and field.default is None and not field.is_updated_at
+
+class TableCheck:
+    """Checks of one model's rows against the schema, the key indexes and the other tables"""
+
+    def __init__(self, schema, model, table, indexes, flagged, report):
+        self.schema = schema
+        self.model = model
+        self.table = table
+        self.indexes = indexes
+        self.flagged = flagged
+        self.report = report
+        self.fields = field_by_name(model)
+        self.bookings = array("Q") if model.name == "Booking" else None
+
+    def _columns(self, names):
+        return [self.fields[name].column for name in names]
+
+    def _plan(self, header, where):
+        """Per-file column positions of every check, from the file's header"""
+        position = {name: i for i, name in enumerate(header)}
+        by_column = {field.column: field for field in self.model.fields}
+        for name in header:
+            if name not in by_column:
+                self.report.warning(self.table, f"column {name} is not in the schema", where)
+
+        values = []
+        for field in self.model.fields:
+            if field.column not in position:
+                if _required(field):
+                    self.report.error(self.table, f"required column {field.column} is missing", where)
+                continue
+            enum = self.schema.enums.get(field.type)
+            if enum is not None:
+                # Rows may carry either the enum value or its @map label
+                enum = set(enum) | set(enum.values())
+            values.append((position[field.column], field.column, _required(field), enum, field.varchar_length))
+
+        def positions(names):
+            columns = self._columns(names)
+            return [position[c] for c in columns] if all(c in position for c in columns) else None
+
+        keys = [(index, positions(names)) for (model_name, names), index in self.indexes.items()
+                if model_name == self.model.name and positions(names) is not None]
+        references = []
+        for relation in self.model.relations:
+            columns = positions(relation.fields)
+            if columns is None:
+                continue
+            active = ACTIVE_REFERENCES.get((self.model.name, relation.fields[0]))
+            references.append((relation, columns, self.indexes[relation.target, tuple(relation.references)],
+                               self.flagged.get(active) if active else None))
+        flags = [(index, position[self.fields[flag].column], positions(("id",)))
+                 for (model_name, flag), index in self.flagged.items()
+                 if model_name == self.model.name and self.fields[flag].column in position]
+        booking = None
+        if self.bookings is not None:
+            booking = positions(("prophetId", "startDateTime", "endDateTime"))
+        return values, keys, references, flags, booking
+
+    def run(self, paths):
+        rows = 0
+        for path in paths:
+            with open_text(path) as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if header is None:
+                    continue
+                name = file_label(path)
+                values, keys, references, flags, booking = self._plan(header, name)
+                for line, row in enumerate(reader, 2):
+                    rows += 1
+                    self._check_row(row, f"{name}:{line}", values, keys, references, flags, booking)
+        return rows
+
+    def _check_row(self, row, where, values, keys, references, flags, booking):
+        report, table = self.report, self.table
+        for i, column, required, enum, max_length in values:
+            value = row[i]
+            if not value:
+                if required:
+                    report.error(table, f"{column} is empty", where)
+                continue
+            if enum is not None and value not in enum:
+                report.error(table, f"{column} is not a valid enum value", f"{where}: {value!r}")
+            if max_length is not None and len(value) > max_length:
+                report.error(table, f"{column} is longer than VarChar({max_length})", f"{where}: {len(value)} chars")
+
+        for index, columns in keys:
+            key_values = [row[i] for i in columns]
+            if all(key_values):
+                index.add(key_values)
+
+        for relation, columns, target, active in references:
+            key_values = [row[i] for i in columns]
+            if not any(key_values):
+                # An empty optional foreign key; empty required ones are reported above
+                continue
+            if key_values not in target:
+                report.error(table, f"{relation.name} references a missing {relation.target}", f"{where}: {', '.join(key_values)}")
+            elif active is not None and key_values not in active:
+                report.error(table, f"{relation.name} references an inactive {relation.target}", f"{where}: {', '.join(key_values)}")
+
+        for index, flag, columns in flags:
+            if row[flag] in TRUE_VALUES:
+                index.add([row[i] for i in columns])
+
+        if booking is not None:
+            self._add_booking(row, where, booking)
+
+    def _add_booking(self, row, where, columns):
+        prophet, start, end = (row[i] for i in columns)
+        try:
+            start, end = datetime.fromisoformat(start).replace(tzinfo=None), datetime.fromisoformat(end).replace(tzinfo=None)
+        except ValueError:
+            self.report.error(self.table, "start_datetime / end_datetime is not a datetime", where)
+            return
+        duration = int((end - start).total_seconds() // 60)
+        start_minute = int((start - BOOKING_EPOCH).total_seconds() // 60)
+        if not 0 < duration < 1 << DURATION_BITS or not 0 <= start_minute < 1 << START_BITS:
+            self.report.error(self.table, "booking time range is invalid", f"{where}: {start} - {end}")
+            return
+        prophets = self.indexes["Prophet", ("id",)]
+        if [prophet] in prophets:
+            self.bookings.append(
+                (prophets.position([prophet]) << (START_BITS + DURATION_BITS)) | (start_minute << DURATION_BITS) | duration
+            )
+
+    def finish(self, examples):
+        """Freeze this model's indexes, reporting duplicate keys, and check bookings for overlaps"""
+        for (model_name, names), index in self.indexes.items():
+            if model_name != self.model.name:
+                continue
+            duplicates = index.freeze()
+            if not duplicates:
+                continue
+            # Hashed keys cannot be printed; look their values up again when asked to
+            shown = duplicates[:self.report.max_examples]
+            values = examples(self._columns(names), index, set(shown)) if not index.hex and examples else {}
+            check = f"duplicate ({', '.join(self._columns(names))})"
+            for key in duplicates:
+                self.report.error(self.table, check, values.get(key, index.label(key)))
+
+        for index in (index for (model_name, _), index in self.flagged.items() if model_name == self.model.name):
+            index.freeze()
+
+        if self.bookings is not None:
+            self._check_overlaps()
+
+    def _check_overlaps(self):
+        prophets = self.indexes["Prophet", ("id",)]
+        current, busy_until = None, 0
+        for packed in sort_keys(self.bookings):
+            prophet = packed >> (START_BITS + DURATION_BITS)
+            start = (packed >> DURATION_BITS) & ((1 << START_BITS) - 1)
+            end = start + (packed & ((1 << DURATION_BITS) - 1))
+            if prophet != current:
+                current, busy_until = prophet, end
+                continue
+            if start < busy_until:
+                started = BOOKING_EPOCH + timedelta(minutes=start)
+                self.report.error(self.table, "overlapping bookings of one prophet",
+                                  f"prophet {prophets.label(prophets.keys[prophet])} at {started.isoformat()}")
+            busy_until = max(busy_until, end)
+
+def validate(directory, max_examples=MAX_EXAMPLES):
+    """Check every generated table in directory; returns a Report"""
+    schema = load_schema()
+    manifest = load_manifest(directory) if os.path.exists(os.path.join(directory, MANIFEST)) else None
+    if manifest is not None and manifest["format"] != "csv":
+        raise ValueError(f"Validation needs a csv dataset, {directory} is {manifest['format']}")
+    table_of = {model: table for table, model in GENERATED_TABLE_MODELS.items()}
+    report = Report(max_examples)
+
+    # An index for every unique constraint and for every key a foreign key points at
+    indexes = {}
+    for model in schema.models.values():
+        for names in model.unique_constraints:
+            indexes[model.name, tuple(names)] = None
+        for relation in model.relations:
+            indexes[relation.target, tuple(relation.references)] = None
+    for model_name, names in indexes:
+        fields = field_by_name(schema.models[model_name])
+        indexes[model_name, names] = KeyIndex([fields[name] for name in names])
+    flagged = {target: KeyIndex([field_by_name(schema.models[target[0]])["id"]]) for target in ACTIVE_REFERENCES.values()}
+
+    for model_name in dependency_order(schema):
+        table = table_of.get(model_name)
+        if table is None:
+            continue
+        paths = chunk_paths(directory, manifest, table)
+        if not paths:
+            report.warning(table, "table has no files", directory)
+            continue
+        check = TableCheck(schema, schema.models[model_name], table, indexes, flagged, report)
+        report.rows[table] = check.run(paths)
+
+        def examples(columns, index, keys, paths=paths):
+            """Second pass over a table for the values behind hashed keys: {key: values}"""
+            found = {}
+            for path in paths:
+                with open_text(path) as f:
+                    for row in csv.DictReader(f):
+                        key = index.key([row[c] for c in columns])
+                        if key in keys:
+                            found[key] = ", ".join(row[c] for c in columns)
+                            if len(found) == len(keys):
+                                return found
+            return found
+        check.finish(examples)
+    return report
+
+def print_report(report):
+    for table, rows in report.rows.items():
+        print(f"  - {table}: {rows} rows")
+    for title, entries in (("Warnings", report.as_dict()["warnings"]), ("Errors", report.as_dict()["errors"])):
+        if not entries:
+            continue
+        print(f"\n{title}:")
+        for entry in entries:
+            print(f"  - {entry['table']}: {entry['check']} ({entry['count']}x)")
+            for example in entry["examples"]:
+                print(f"      {example}")
+    print("\n✅ Dataset is consistent" if not report.errors else f"\n❌ {len(report.errors)} kinds of errors found")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate a generated mock dataset against prisma/schema.prisma")
+    parser.add_argument("directory", nargs="?", default="./csv_output", help="Dataset directory (with or without manifest.json)")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    parser.add_argument("--max-examples", type=int, default=MAX_EXAMPLES, help="Examples kept per kind of error")
+    args = parser.parse_args(argv)
+
+    try:
+        report = validate(args.directory, args.max_examples)
+    except ValueError as error:
+        parser.error(str(error))
+    print(f"Validated {args.directory}:")
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report.as_dict(), f, indent=2)
+    return 1 if report.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
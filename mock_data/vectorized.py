@@ -0,0 +1,426 @@
+"""Vectorised, column-wise mock data engine (``mock.py --engine numpy``).
+
+Produces the same tables, columns and value distributions as the row-by-row
+generators in mock.py, but builds each table in blocks of columns with NumPy
+(prices, durations, statuses, scores, phone numbers, dates, FK indices) and
+formats whole columns at once before handing them to the writers. Parent
+tables are kept as uint64 ID counters and FK indices rather than strings.
+
+Requires NumPy (``pip install numpy``).
+"""
+import string
+from datetime import timedelta
+from functools import reduce
+
+import numpy as np
+
+import mock
+import popularity
+from availability import AvailabilityCalendar, DAY_START_HOUR, SLOT_MINUTES, SLOTS_PER_DAY, slot_time
+
+BLOCK_ROWS = 100_000
+PROPHET_BLOCK = 2_000
+MASK32 = np.uint64(0xFFFFFFFF)
+
+def feistel64(values, keys):
+    """Vectorised ids.feistel64: the same permutation applied to a uint64 array"""
+    left, right = values >> np.uint64(32), values & MASK32
+    for key in keys:
+        x = (right ^ np.uint64(key)) & MASK32
+        x = ((x ^ (x >> np.uint64(16))) * np.uint64(0x45D9F3B)) & MASK32
+        x = ((x ^ (x >> np.uint64(16))) * np.uint64(0x45D9F3B)) & MASK32
+        x ^= x >> np.uint64(16)
+        left, right = right, left ^ x
+    return (left << np.uint64(32)) | right
+
+def id_values(ids, namespace, count):
+    """Reserve `count` IDs from the engine and return them as a uint64 array"""
+    first = ids.reserve(namespace, count)
+    return feistel64(np.arange(first, first + count, dtype=np.uint64), ids.namespace_keys(namespace))
+
+def hex_ids(values):
+    """Format a uint64 array as 16-hex-char IDs"""
+    text = values.astype(">u8").tobytes().hex()
+    return [text[i:i + 16] for i in range(0, len(text), 16)]
+
+def random_text(rng, alphabet, count, length):
+    """`count` random strings of `length` characters drawn from alphabet"""
+    lut = np.frombuffer(alphabet.encode(), dtype=np.uint8)
+    chars = lut[rng.integers(0, len(lut), (count, length))]
+    return chars.view(f"S{length}").ravel().astype(f"U{length}")
+
+def choose(rng, options, count):
+    return np.asarray(options)[rng.integers(0, len(options), count)]
+
+def padded(values, width):
+    return np.char.zfill(values.astype(str), width)
+
+def concat(*parts):
+    return reduce(np.char.add, parts)
+
+def ranks(counts):
+    """Position of every element within its group, for groups of the given sizes laid out back to back"""
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+def alias_sampler(rng, weights):
+    """Vectorised popularity.AliasTable: a function drawing `count` indices by weight"""
+    table = popularity.AliasTable(weights)
+    prob, alias = np.asarray(table.prob), np.asarray(table.alias)
+
+    def sample(count):
+        i = rng.integers(0, len(prob), count)
+        return np.where(rng.random(count) < prob[i], i, alias[i])
+    return sample
+
+def activity_counts(rng, n, low, high, exponent):
+    """Vectorised popularity.activity_counts for all n customers at once"""
+    weights = np.asarray(popularity.zipf_weights(n, exponent))
+    rng.shuffle(weights)
+    expected = weights * n * (low + high) / 2
+    return np.floor(expected).astype(np.int64) + (rng.random(n) < expected % 1)
+
+def blocks(total, size=BLOCK_ROWS):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+def generate_accounts(rng, ids, ranges, stamp, account_values, passwords=None):
+    for role, first, count in ranges:
+        for start, n in blocks(count):
+            values = id_values(ids, "account", n)
+            account_values[role].append(values)
+            # role + global account index is unique by construction
+            username = np.char.add(role.lower(), np.arange(first + start, first + start + n).astype(str))
+            yield "accounts", {
+                "id": hex_ids(values),
+                "email": concat(username, padded(rng.integers(0, 10000, n), 4), "@",
+                                random_text(rng, string.ascii_lowercase, n, 5), ".com"),
+                "username": username,
+                "password_hash": random_text(rng, string.hexdigits.lower(), n, 60) if passwords is None else
+                    passwords.hashes_for(zip(range(first + start, first + start + n), username.tolist())),
+                "role": [role] * n,
+                "created_at": [stamp] * n,
+                "updated_at": [stamp] * n,
+            }
+
+def generate_user_details(rng, ids, account_values, stamp):
+    for start, n in blocks(len(account_values)):
+        yield "user_details", {
+            "account_id": hex_ids(account_values[start:start + n]),
+            "name": choose(rng, mock.FIRST_NAMES, n),
+            "lastname": choose(rng, mock.LAST_NAMES, n),
+            "profile_url": concat("https://example.com/profile/", hex_ids(id_values(ids, "profile", n)), ".jpg"),
+            "phone_number": np.char.add("+66", rng.integers(100000000, 1000000000, n).astype(str)),
+            "gender": choose(rng, mock.SEX, n),
+            "created_at": [stamp] * n,
+            "updated_at": [stamp] * n,
+        }
+
+def generate_customers(rng, ids, customer_account_values, stamp, customer_values):
+    for start, n in blocks(len(customer_account_values)):
+        values = id_values(ids, "customer", n)
+        customer_values.append(values)
+        yield "customers", {
+            "id": hex_ids(values),
+            "account_id": hex_ids(customer_account_values[start:start + n]),
+            "birth_date": concat(rng.integers(1950, 2006, n).astype(str), "-",
+                                 padded(rng.integers(1, 13, n), 2), "-", padded(rng.integers(1, 29, n), 2)),
+            "birth_time": concat(padded(rng.integers(0, 24, n), 2), ":", padded(rng.integers(0, 60, n), 2), ":00"),
+            "zodiac_sign": choose(rng, mock.ZODIAC_SIGNS, n),
+            "created_at": [stamp] * n,
+            "updated_at": [stamp] * n,
+            "is_public": rng.random(n) < 0.5,
+        }
+
+def generate_prophets(rng, ids, prophet_account_values, stamp, prophet_values):
+    for start, n in blocks(len(prophet_account_values)):
+        values = id_values(ids, "prophet", n)
+        prophet_values.append(values)
+        yield "prophets", {
+            "id": hex_ids(values),
+            "account_id": hex_ids(prophet_account_values[start:start + n]),
+            "line_id": random_text(rng, string.ascii_lowercase + string.digits, n, 20),
+            "created_at": [stamp] * n,
+            "updated_at": [stamp] * n,
+        }
+
+def sample_methods(rng, n):
+    """1-3 distinct horoscope method indices per prophet: (shuffled method table, methods per prophet)"""
+    shuffled = np.argsort(rng.random((n, len(mock.HOROSCOPE_METHOD_NAMES))), axis=1)
+    return shuffled, rng.integers(1, 4, n)
+
+def generate_prophet_methods(rng, prophet_values):
+    for start, n in blocks(len(prophet_values)):
+        shuffled, counts = sample_methods(rng, n)
+        selected = np.arange(shuffled.shape[1]) < counts[:, None]
+        yield "prophet_methods", {
+            "prophet_id": hex_ids(np.repeat(prophet_values[start:start + n], counts)),
+            "method_id": shuffled[selected] + 1,
+        }
+
+def generate_prophet_availabilities(rng, prophet_values, calendar, days, stamp, date_text):
+    """Availability windows per prophet day, matching mock.generate_prophet_availabilities"""
+    half_day = SLOTS_PER_DAY // 2
+    min_slots, max_slots = mock.AVAILABILITY_WINDOW_SLOTS
+    slot_text = np.array([slot_time(s).strftime("%H:%M:%S") for s in range(SLOTS_PER_DAY)])
+    if calendar.hours is not None:
+        busy_slot = [alias_sampler(rng, calendar.hours.weights[:half_day]), alias_sampler(rng, calendar.hours.weights[half_day:])]
+
+    for start, n in blocks(len(prophet_values), PROPHET_BLOCK):
+        values = prophet_values[start:start + n]
+
+        # Every prophet steps through the days by 1 or 2
+        stride = rng.integers(1, 3, n)
+        days_per_prophet = -(-days // stride)
+        day_prophet = np.repeat(np.arange(n), days_per_prophet)
+        day = ranks(days_per_prophet) * stride[day_prophet]
+
+        # One or two windows per day, in different halves of the day
+        windows_per_day = rng.integers(1, 3, len(day))
+        window_day = np.repeat(np.arange(len(day)), windows_per_day)
+        first_half = rng.integers(0, 2, len(day))
+        half = ((first_half[window_day] + ranks(windows_per_day)) % 2) * half_day
+        length = rng.integers(min_slots, max_slots + 1, len(window_day))
+        if calendar.hours is None:
+            window_start = half + rng.integers(0, half_day - length + 1)
+        else:
+            # Windows cover a busy slot of their half, as in popularity.HourProfile.window_start
+            busy = half + np.where(half == 0, busy_slot[0](len(half)), busy_slot[1](len(half)))
+            window_start = np.clip(busy - rng.integers(0, length), half, half + half_day - length)
+        window_prophet = day_prophet[window_day]
+        window_offset = day[window_day]
+
+        for p, d, s, l in zip(values[window_prophet].tolist(), window_offset.tolist(), window_start.tolist(), length.tolist()):
+            calendar.open(p, d, s, l)
+
+        slot_window = np.repeat(np.arange(len(length)), length)
+        slot = window_start[slot_window] + ranks(length)
+        yield "prophet_availabilities", {
+            "prophet_id": hex_ids(values[window_prophet[slot_window]]),
+            "date": date_text[window_offset[slot_window]],
+            "start_time": slot_text[slot],
+            "created_at": [stamp] * len(slot),
+        }
+
+def generate_courses(rng, ids, prophet_values, stamp, active):
+    method_names = np.asarray(mock.HOROSCOPE_METHOD_NAMES)
+
+    for start, n in blocks(len(prophet_values)):
+        values = prophet_values[start:start + n]
+        shuffled, method_counts = sample_methods(rng, n)
+        courses_per_prophet = rng.integers(1, 3, n)
+        prophet = np.repeat(np.arange(n), courses_per_prophet)
+        method = shuffled[prophet, rng.integers(0, method_counts[prophet])]
+        count = len(prophet)
+
+        course_values = id_values(ids, "course", count)
+        duration = choose(rng, mock.COURSE_DURATIONS, count)
+        cents = rng.integers(30000, 200001, count)
+        price = concat((cents // 100).astype(str), ".", padded(cents % 100, 2))
+        is_active = rng.random(count) < 0.75
+
+        active["values"].append(course_values[is_active])
+        active["prophet"].append(values[prophet][is_active])
+        active["duration"].append(duration[is_active])
+        active["price"].append(price[is_active])
+
+        yield "courses", {
+            "id": hex_ids(course_values),
+            "prophet_id": hex_ids(values[prophet]),
+            "course_name": concat(choose(rng, mock.COURSE_LEVELS, count), " ", method_names[method], " Session"),
+            "horoscope_method_id": method + 1,
+            "horoscope_method": method_names[method],
+            "horoscope_sector": choose(rng, mock.HOROSCOPE_SECTORS, count),
+            "duration_min": duration,
+            "price": price,
+            "is_active": is_active,
+            "created_at": [stamp] * count,
+            "updated_at": [stamp] * count,
+        }
+
+def generate_bookings(rng, ids, customer_values, active, calendar, scale, stamp, date_text, summary, metrics):
+    """Bookings with their transactions and reviews, taking windows from the calendar"""
+    minute_text = np.array([f"{m // 60:02d}:{m % 60:02d}:00" for m in range(24 * 60)])
+    if not len(active["values"]):
+        return
+
+    low, high = scale["min_bookings_per_customer"], scale["max_bookings_per_customer"]
+    activity = None
+    if scale["customer_skew"]:
+        activity = activity_counts(rng, len(customer_values), low, high, scale["customer_skew"])
+    pick_courses = None
+    if scale["prophet_skew"] or scale["course_skew"]:
+        courses = list(zip(active["values"].tolist(), active["prophet"].tolist()))
+        pick_courses = alias_sampler(rng, popularity.course_weights(courses, scale["prophet_skew"], scale["course_skew"], rng))
+
+    for start, n in blocks(len(customer_values)):
+        if activity is None:
+            bookings_per_customer = rng.integers(low, high + 1, n)
+        else:
+            bookings_per_customer = activity[start:start + n]
+        customer = np.repeat(customer_values[start:start + n], bookings_per_customer)
+        if pick_courses is None:
+            course = rng.integers(0, len(active["values"]), len(customer))
+        else:
+            course = pick_courses(len(customer))
+
+        # Window allocation is inherently sequential, the calendar keeps it O(1) per booking
+        day = np.empty(len(course), dtype=np.int64)
+        slot = np.empty(len(course), dtype=np.int64)
+        booked = np.zeros(len(course), dtype=bool)
+        for i, (prophet, duration) in enumerate(zip(active["prophet"][course].tolist(), active["duration"][course].tolist())):
+            window = calendar.book(prophet, duration)
+            if window is not None:
+                day[i], slot[i] = window
+                booked[i] = True
+        skipped = int((~booked).sum())
+        if skipped and metrics is not None:
+            metrics.count("skipped_bookings", skipped)
+
+        customer, course, day, slot = customer[booked], course[booked], day[booked], slot[booked]
+        count = len(course)
+        if not count:
+            continue
+
+        start_minute = DAY_START_HOUR * 60 + slot * SLOT_MINUTES
+        date = date_text[day]
+        status = choose(rng, mock.BOOKING_STATUSES, count)
+        completed = status == "COMPLETED"
+        summary["completed_bookings"] += int(completed.sum())
+        booking_values = id_values(ids, "booking", count)
+        booking_ids = hex_ids(booking_values)
+        customer_ids = hex_ids(customer)
+
+        yield "bookings", {
+            "id": booking_ids,
+            "customer_id": customer_ids,
+            "course_id": hex_ids(active["values"][course]),
+            "prophet_id": hex_ids(active["prophet"][course]),
+            "start_datetime": concat(date, "T", minute_text[start_minute]),
+            "end_datetime": concat(date, "T", minute_text[start_minute + active["duration"][course]]),
+            "status": status,
+            "created_at": [stamp] * count,
+        }
+
+        # Only completed bookings can already have been paid out to the prophet
+        yield "transactions", {
+            "id": hex_ids(id_values(ids, "transaction", count)),
+            "booking_id": booking_ids,
+            "status": np.where(completed, choose(rng, mock.TRANSACTION_STATUSES, count), "PENDING_PAYOUT"),
+            "amount": active["price"][course],
+            "created_at": [stamp] * count,
+            "updated_at": [stamp] * count,
+        }
+
+        reviewed = np.flatnonzero(completed & (rng.random(count) < mock.REVIEW_PROBABILITY))
+        review_count = len(reviewed)
+        yield "reviews", {
+            "id": hex_ids(id_values(ids, "review", review_count)),
+            "customer_id": [customer_ids[i] for i in reviewed],
+            "booking_id": [booking_ids[i] for i in reviewed],
+            "score": rng.integers(3, 6, review_count),
+            "description": np.where(rng.random(review_count) < mock.REVIEW_DESCRIPTION_PROBABILITY,
+                                    choose(rng, mock.REVIEW_DESCRIPTIONS, review_count), ""),
+            "created_at": [stamp] * review_count,
+            "updated_at": [stamp] * review_count,
+        }
+
+def generate_transaction_accounts(rng, ids, prophet_values, stamp):
+    for start, n in blocks(len(prophet_values)):
+        # Account numbers come from the same counter as the ID, as in mock.py
+        first = ids.reserve("transaction_account", n)
+        sequence = np.arange(first, first + n, dtype=np.uint64)
+        yield "transaction_accounts", {
+            "id": hex_ids(feistel64(sequence, ids.namespace_keys("transaction_account"))),
+            "prophet_id": hex_ids(prophet_values[start:start + n]),
+            "account_name": concat(choose(rng, mock.FIRST_NAMES, n), " ", choose(rng, mock.LAST_NAMES, n)),
+            "account_number": [ids.account_number(value) for value in range(first, first + n)],
+            "bank": choose(rng, mock.BANKS, n),
+            "created_at": [stamp] * n,
+            "updated_at": [stamp] * n,
+        }
+
+def generate_reports(rng, ids, customer_values, admin_ids, stamp):
+    for start, n in blocks(len(customer_values)):
+        reporting = np.flatnonzero(rng.random(n) < mock.REPORT_PROBABILITY)
+        count = len(reporting)
+        assigned = (rng.random(count) < mock.REPORT_ASSIGNED_PROBABILITY) & bool(len(admin_ids))
+        admin = np.where(assigned, choose(rng, admin_ids or [""], count), "")
+        yield "reports", {
+            "id": hex_ids(id_values(ids, "report", count)),
+            "customer_id": hex_ids(customer_values[start:start + n][reporting]),
+            "admin_id": admin,
+            "report_type": choose(rng, mock.REPORT_TYPES, count),
+            "topic": choose(rng, mock.REPORT_TOPICS, count),
+            "description": choose(rng, mock.REPORT_DESCRIPTIONS, count),
+            "report_status": np.where(assigned, choose(rng, mock.REPORT_STATUSES, count), "PENDING"),
+            "created_at": [stamp] * count,
+            "updated_at": [stamp] * count,
+        }
+
+def _stack(arrays, dtype=np.uint64):
+    return np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+
+def generate_dataset(scale, ids, now, save_blocks, seed=None, ranges=None, admin_ids=None, passwords=None, metrics=None):
+    """Column-wise counterpart of mock.generate_dataset.
+
+    ``save_blocks(blocks, filenames)`` writes ``(filename, columns)`` pairs
+    and returns row counts per table. ``passwords`` is a
+    passwords.PasswordHashes for real password hashes. Bookings skipped for
+    want of a free window are counted in ``metrics`` (a metrics.Metrics).
+    Returns (counts, summary, admin IDs).
+    """
+    rng = np.random.default_rng(seed)
+    stamp = now.isoformat()
+    date_text = np.array([(now.date() + timedelta(days=d)).isoformat() for d in range(scale["availability_days"])])
+    counts = {}
+    summary = {"completed_bookings": 0}
+
+    account_values = {"CUSTOMER": [], "PROPHET": [], "ADMIN": []}
+    counts.update(save_blocks(generate_accounts(rng, ids, ranges, stamp, account_values, passwords), ["accounts"]))
+    account_values = {role: _stack(values) for role, values in account_values.items()}
+    own_admin_ids = hex_ids(account_values["ADMIN"])
+    if admin_ids is None:
+        admin_ids = own_admin_ids
+
+    all_accounts = np.concatenate([account_values["CUSTOMER"], account_values["PROPHET"], account_values["ADMIN"]])
+    counts.update(save_blocks(generate_user_details(rng, ids, all_accounts, stamp), ["user_details"]))
+
+    customer_values = []
+    counts.update(save_blocks(generate_customers(rng, ids, account_values["CUSTOMER"], stamp, customer_values), ["customers"]))
+    customer_values = _stack(customer_values)
+
+    prophet_values = []
+    counts.update(save_blocks(generate_prophets(rng, ids, account_values["PROPHET"], stamp, prophet_values), ["prophets"]))
+    prophet_values = _stack(prophet_values)
+
+    counts.update(save_blocks(generate_prophet_methods(rng, prophet_values), ["prophet_methods"]))
+
+    calendar = AvailabilityCalendar(mock.COURSE_DURATIONS, hours=popularity.hour_profile(scale["booking_hours"]))
+    counts.update(save_blocks(generate_prophet_availabilities(
+        rng, prophet_values, calendar, scale["availability_days"], stamp, date_text
+    ), ["prophet_availabilities"]))
+
+    active = {"values": [], "prophet": [], "duration": [], "price": []}
+    counts.update(save_blocks(generate_courses(rng, ids, prophet_values, stamp, active), ["courses"]))
+    active = {
+        "values": _stack(active["values"]),
+        "prophet": _stack(active["prophet"]),
+        "duration": _stack(active["duration"], np.int64),
+        "price": _stack(active["price"], str),
+    }
+
+    counts.update(save_blocks(
+        generate_bookings(rng, ids, customer_values, active, calendar, scale, stamp, date_text, summary, metrics),
+        ["bookings", "transactions", "reviews"],
+    ))
+
+    counts.update(save_blocks(generate_transaction_accounts(rng, ids, prophet_values, stamp), ["transaction_accounts"]))
+    counts.update(save_blocks(generate_reports(rng, ids, customer_values, admin_ids, stamp), ["reports"]))
+
+    return counts, {
+        "customers": len(customer_values),
+        "prophets": len(prophet_values),
+        "admins": len(own_admin_ids),
+        "active_courses": len(active["values"]),
+        "completed_bookings": summary["completed_bookings"],
+    }, own_admin_ids
@@ -0,0 +1,590 @@
+"""Output backends for generated mock tables.
+
+A writer receives rows one at a time (or column blocks from the NumPy engine)
+and owns the files it writes, so tables can be streamed straight from the
+generators without ever being held in memory.
+
+With ``chunk_rows`` a table is split into rolling chunk files of that many
+rows each (``bookings.part-00000.csv``, ...), every one of them complete with
+its own header so chunks can be loaded in parallel. Text formats can be gzip
+or zstd compressed. Every finished file is recorded in ``writer.chunks`` with
+its row count, size and SHA-256, which write_manifest turns into
+``manifest.json``. PartitionedWriter splits a table by month on top of that.
+"""
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import queue
+import threading
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+
+from prisma_schema import model_for
+
+QUOTED_CHARS = (',', '"', '\r', '\n')
+
+# --compression choice -> file name suffix of the compressed text formats
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+PARQUET_ROW_GROUP_ROWS = 100_000
+
+# Generated columns without a Prisma field behind them -> the Prisma type they hold
+UNMODELED_COLUMN_TYPES = {
+    ("horoscope_methods", "id"): "Int",
+    ("prophet_methods", "method_id"): "Int",
+    ("courses", "horoscope_method_id"): "Int",
+    ("booking_status_updates", "updated_at"): "DateTime",
+}
+
+# Rows per hand-off to a BackgroundWriter's thread, and hand-offs that may
+# wait in its queue before the producer blocks
+BACKGROUND_BATCH_ROWS = 2_000
+BACKGROUND_QUEUE_BATCHES = 8
+MANIFEST = "manifest.json"
+
+class ChecksumFile(io.RawIOBase):
+    """Binary output file that keeps a running SHA-256 and byte count of what was written"""
+
+    def __init__(self, path):
+        super().__init__()
+        # Replace rather than truncate an existing file, which may be a link
+        # into the dataset cache
+        if os.path.lexists(path):
+            os.unlink(path)
+        self._file = open(path, "wb")
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.size
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+def compressed(stream, compression):
+    """Wrap a binary stream in a gzip or zstd compressor (closing it leaves `stream` open)"""
+    if compression is None:
+        return stream
+    if compression == "gzip":
+        # mtime=0 keeps compressed output byte-identical between seeded runs
+        return gzip.GzipFile(fileobj=stream, mode="wb", compresslevel=GZIP_LEVEL, mtime=0)
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(stream, closefd=False)
+    raise ValueError(f"Unknown compression {compression!r}")
+
+class TableWriter:
+    """Base class: opens a chunk file lazily on the first row, rolls over every chunk_rows rows and counts rows"""
+
+    extension = ""
+    has_header = False
+    # Whole files of this format can be concatenated (minus headers) into one
+    concatenable = True
+    # The format compresses internally, so no outer compression layer and suffix
+    compresses_itself = False
+    # close() reports what was written; off for the partitions of a PartitionedWriter
+    verbose = True
+
+    def __init__(self, filename, directory, chunk_rows=None, compression=None):
+        self.filename = filename
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.compression = compression
+        self.count = 0
+        self.chunks = []
+        self._stream = None
+
+    @classmethod
+    def base_name(cls, filename):
+        """File name stem for a generated table"""
+        return filename
+
+    @classmethod
+    def suffix(cls, compression=None):
+        if cls.compresses_itself:
+            return cls.extension
+        return cls.extension + COMPRESSION_SUFFIXES[compression]
+
+    def chunk_path(self, index):
+        name = self.base_name(self.filename)
+        if self.chunk_rows:
+            name += f".part-{index:05d}"
+        return os.path.join(self.directory, name + self.suffix(self.compression))
+
+    def _open(self, stream, first):
+        """Start writing a chunk to a binary stream; `first` is the first row or column block"""
+        raise NotImplementedError
+
+    def _write(self, row):
+        raise NotImplementedError
+
+    def _write_block(self, columns):
+        names = list(columns)
+        for values in zip(*columns.values()):
+            self._write(dict(zip(names, values)))
+
+    def _close(self):
+        """Flush the current chunk; the streams under it are closed by _end_chunk"""
+        raise NotImplementedError
+
+    def _begin_chunk(self, first):
+        path = self.chunk_path(len(self.chunks))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = ChecksumFile(path)
+        self._stream = self._file if self.compresses_itself else compressed(self._file, self.compression)
+        self._chunk_path = path
+        self._chunk_count = 0
+        self._open(self._stream, first)
+
+    def _end_chunk(self):
+        self._close()
+        self._stream.close()
+        self._file.close()
+        self.chunks.append({
+            "path": self._chunk_path,
+            "rows": self._chunk_count,
+            "bytes": self._file.size,
+            "sha256": self._file.hexdigest(),
+        })
+        self._stream = None
+
+    def write(self, row):
+        if self._stream is None:
+            self._begin_chunk(row)
+        self._write(row)
+        self.count += 1
+        self._chunk_count += 1
+        if self._chunk_count == self.chunk_rows:
+            self._end_chunk()
+
+    def write_columns(self, columns):
+        """Write a block of rows given as {column name: sequence of values}"""
+        total = len(next(iter(columns.values()), ()))
+        start = 0
+        while start < total:
+            if self._stream is None:
+                self._begin_chunk(columns)
+            stop = total
+            if self.chunk_rows:
+                stop = min(total, start + self.chunk_rows - self._chunk_count)
+            block = columns if (start, stop) == (0, total) else {name: values[start:stop] for name, values in columns.items()}
+            self._write_block(block)
+            self.count += stop - start
+            self._chunk_count += stop - start
+            if self._chunk_count == self.chunk_rows:
+                self._end_chunk()
+            start = stop
+
+    def close(self):
+        if self._stream is not None:
+            self._end_chunk()
+        if not self.verbose:
+            return
+        if not self.chunks:
+            print(f"Warning: No data to save for {self.filename}")
+        elif len(self.chunks) == 1:
+            print(f"Saved {self.count} records to {self.chunks[0]['path']}")
+        else:
+            print(f"Saved {self.count} records to {len(self.chunks)} chunks in {self.directory}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class CsvTableWriter(TableWriter):
+    """Write rows to CSV, taking the header from the first row of each chunk"""
+
+    extension = ".csv"
+    has_header = True
+
+    def _open(self, stream, first):
+        self._text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._text, fieldnames=first.keys())
+        self._writer.writeheader()
+
+    def _write(self, row):
+        self._writer.writerow(row)
+
+    def _write_block(self, columns):
+        # Bulk path: format whole columns and join them into lines instead of
+        # going through csv.writer row by row
+        texts = [csv_field_texts(c) for c in columns.values()]
+        self._text.write("\r\n".join(map(",".join, zip(*texts))) + "\r\n")
+
+    def _close(self):
+        self._text.flush()
+        self._text.detach()
+
+def parquet_type(pa, prisma_type, native_type=None):
+    """Arrow type of a column of the given Prisma scalar type and @db native type"""
+    native, args = native_type or (None, ())
+    if prisma_type == "Int":
+        return pa.int32()
+    if prisma_type == "BigInt":
+        return pa.int64()
+    if prisma_type == "Float":
+        return pa.float64()
+    if prisma_type == "Boolean":
+        return pa.bool_()
+    if prisma_type == "Decimal":
+        # Without @db.Decimal Prisma uses Decimal(65, 30), too wide for decimal128
+        return pa.decimal128(*args) if args else pa.decimal256(65, 30)
+    if prisma_type == "DateTime":
+        if native == "Date":
+            return pa.date32()
+        if native == "Time":
+            return pa.time64("us")
+        return pa.timestamp("us", tz="UTC")
+    return pa.string()
+
+def parquet_schema(pa, filename, columns):
+    """Fixed Arrow schema of a generated table, typed from prisma/schema.prisma.
+
+    Enums and columns the schema does not know are strings, so a table gets the
+    same schema whichever engine generated it.
+    """
+    model = model_for(filename)
+    fields = {field.column: field for field in model.fields} if model else {}
+    types = []
+    for column in columns:
+        field = fields.get(column)
+        if field is not None:
+            types.append((column, parquet_type(pa, field.type, field.native_type)))
+        else:
+            types.append((column, parquet_type(pa, UNMODELED_COLUMN_TYPES.get((filename, column)))))
+    return pa.schema(types)
+
+def _utc_timestamp(value):
+    # Generated timestamps without an offset are UTC, like the ones with one
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _parquet_value_converter(pa, arrow_type):
+    """Function from a generated value (text, Python or NumPy scalar) to the Python value Arrow stores as `arrow_type`"""
+    if pa.types.is_integer(arrow_type):
+        return int
+    if pa.types.is_floating(arrow_type):
+        return float
+    if pa.types.is_boolean(arrow_type):
+        return lambda value: str(value).lower() in ("true", "t", "1")
+    if pa.types.is_decimal(arrow_type):
+        exponent = Decimal(1).scaleb(-arrow_type.scale)
+        return lambda value: Decimal(str(value)).quantize(exponent)
+    if pa.types.is_timestamp(arrow_type):
+        return _utc_timestamp
+    if pa.types.is_date(arrow_type):
+        return lambda value: value if isinstance(value, date) and not isinstance(value, datetime) else date.fromisoformat(str(value)[:10])
+    if pa.types.is_time(arrow_type):
+        return lambda value: value if isinstance(value, time) else time.fromisoformat(str(value))
+    return str
+
+def parquet_array(pa, values, arrow_type):
+    """One generated column as an Arrow array of `arrow_type`; None, and "" outside strings, are nulls"""
+    if getattr(values, "dtype", None) is not None and values.dtype.kind in "biuf" and (
+            pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type) or pa.types.is_boolean(arrow_type)):
+        return pa.array(values).cast(arrow_type)
+    convert = _parquet_value_converter(pa, arrow_type)
+    if pa.types.is_string(arrow_type):
+        return pa.array([None if value is None else convert(value) for value in values], arrow_type)
+    return pa.array([None if value is None or value == "" else convert(value) for value in values], arrow_type)
+
+class ParquetTableWriter(TableWriter):
+    """Write rows to Parquet (requires pyarrow), using --compression as the column codec.
+
+    Column types come from prisma/schema.prisma (see parquet_schema), so the
+    Python and NumPy engines write the same schema: integers, decimal128
+    prices, UTC timestamps, dates, times and booleans rather than text. Rows
+    written one at a time are buffered into row groups of
+    PARQUET_ROW_GROUP_ROWS; column blocks become row groups as they are.
+    """
+
+    extension = ".parquet"
+    concatenable = False
+    compresses_itself = True
+    _schema = None
+
+    def _open(self, stream, first):
+        import pyarrow
+        import pyarrow.parquet
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._output = stream
+        self._parquet = None
+        self._rows = []
+        if self._schema is None:
+            self._schema = parquet_schema(pyarrow, self.filename, list(first))
+
+    def _write(self, row):
+        self._rows.append(row)
+        if len(self._rows) == PARQUET_ROW_GROUP_ROWS:
+            self._flush_rows()
+
+    def _write_block(self, columns):
+        self._flush_rows()
+        self._write_table(columns)
+
+    def _flush_rows(self):
+        if self._rows:
+            self._write_table({name: [row.get(name) for row in self._rows] for name in self._schema.names})
+            self._rows = []
+
+    def _write_table(self, columns):
+        if self._parquet is None:
+            self._parquet = self._pq.ParquetWriter(self._output, self._schema, compression=self.compression or "none")
+        arrays = [parquet_array(self._pa, columns[field.name], field.type) for field in self._schema]
+        self._parquet.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def _close(self):
+        self._flush_rows()
+        self._parquet.close()
+
+def partition_key(value):
+    """Month partition ("YYYY-MM") of an ISO date or timestamp"""
+    return str(value)[:7]
+
+def partition_dir(directory, filename, key):
+    """Directory of one month of a table, in the Hive layout DuckDB, Spark and pyarrow prune on"""
+    return os.path.join(directory, filename, f"month={key}")
+
+class PartitionedWriter:
+    """Split a table into one writer per month of a date or timestamp column.
+
+    ``open_partition(directory)`` returns the writer for the files of one
+    month, under partition_dir. Rows without the column (tables that have no
+    timestamps) go to one unpartitioned writer in `directory` instead. The
+    chunks of all months are listed in month order, each with its
+    ``partition`` key.
+    """
+
+    def __init__(self, filename, directory, column, open_partition):
+        self.filename = filename
+        self.directory = directory
+        self.column = column
+        self._open_partition = open_partition
+        self.writers = {}  # month, or None when unpartitioned -> writer
+
+    def _writer(self, key):
+        writer = self.writers.get(key)
+        if writer is None:
+            if key is None:
+                writer = self._open_partition(self.directory)
+            else:
+                writer = self._open_partition(partition_dir(self.directory, self.filename, key))
+                writer.verbose = False
+            self.writers[key] = writer
+        return writer
+
+    @property
+    def count(self):
+        return sum(writer.count for writer in self.writers.values())
+
+    @property
+    def chunks(self):
+        entries = list(self.writers[None].chunks) if None in self.writers else []
+        for key in sorted(k for k in self.writers if k is not None):
+            entries.extend({**entry, "partition": key} for entry in self.writers[key].chunks)
+        return entries
+
+    def write(self, row):
+        value = row.get(self.column)
+        self._writer(None if value is None else partition_key(value)).write(row)
+
+    def write_columns(self, columns):
+        values = columns.get(self.column)
+        if values is None:
+            self._writer(None).write_columns(columns)
+            return
+        rows = {}
+        for i, value in enumerate(values.tolist() if hasattr(values, "tolist") else values):
+            rows.setdefault(partition_key(value), []).append(i)
+        if len(rows) == 1:
+            self._writer(next(iter(rows))).write_columns(columns)
+            return
+        for key, indices in rows.items():
+            self._writer(key).write_columns({
+                name: column[indices] if hasattr(column, "dtype") else [column[i] for i in indices]
+                for name, column in columns.items()
+            })
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        months = sum(key is not None for key in self.writers)
+        if months:
+            print(f"Saved {self.count} records to {months} monthly partitions in {os.path.join(self.directory, self.filename)}")
+        elif not self.writers:
+            print(f"Warning: No data to save for {self.filename}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class BackgroundWriter:
+    """Run a TableWriter on a thread of its own, fed through a bounded queue.
+
+    Rows are handed over in batches of BACKGROUND_BATCH_ROWS, so the producer
+    keeps generating while earlier rows are formatted, compressed and written.
+    Once BACKGROUND_QUEUE_BATCHES batches are waiting the producer blocks,
+    which bounds the memory held in between. An error on the writer thread is
+    raised in the producer on its next hand-off or on close. Leaving a with
+    block on an exception aborts the wrapped writer instead of closing it, so
+    a failed stage does not commit a partial table.
+    """
+
+    def __init__(self, writer, batch_rows=BACKGROUND_BATCH_ROWS, queue_batches=BACKGROUND_QUEUE_BATCHES):
+        self.writer = writer
+        self.filename = writer.filename
+        self.batch_rows = batch_rows
+        self._queue = queue.Queue(maxsize=queue_batches)
+        self._batch = []
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name=f"writer-{writer.filename}", daemon=True)
+        self._thread.start()
+
+    @property
+    def count(self):
+        return self.writer.count
+
+    @property
+    def chunks(self):
+        return self.writer.chunks
+
+    def _run(self):
+        while (item := self._queue.get()) is not None:
+            if self._error is not None:
+                # Keep draining so the producer never blocks on a failed writer
+                continue
+            method, payload = item
+            try:
+                if method == "rows":
+                    for row in payload:
+                        self.writer.write(row)
+                else:
+                    self.writer.write_columns(payload)
+            except BaseException as error:
+                self._error = error
+
+    def _put(self, item):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(item)
+
+    def _flush(self):
+        if self._batch:
+            self._put(("rows", self._batch))
+            self._batch = []
+
+    def write(self, row):
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_rows:
+            self._flush()
+
+    def write_columns(self, columns):
+        """Hand a column block over as it is; the producer must not modify it afterwards"""
+        self._flush()
+        self._put(("columns", columns))
+
+    def close(self):
+        if not self._thread.is_alive():
+            return
+        try:
+            self._flush()
+        finally:
+            self._queue.put(None)
+            self._thread.join()
+        if self._error is not None:
+            self._abort_writer(type(self._error), self._error, self._error.__traceback__)
+            raise self._error
+        self.writer.close()
+
+    def abort(self, *exc):
+        """Stop the thread without writing what is still queued, then abort the wrapped writer"""
+        if not self._thread.is_alive():
+            return
+        self._batch = []
+        # The thread skips everything queued after an error
+        self._error = exc[1] if exc and exc[1] is not None else RuntimeError(f"{self.filename} aborted")
+        self._queue.put(None)
+        self._thread.join()
+        self._abort_writer(*exc)
+
+    def _abort_writer(self, *exc):
+        abort = getattr(self.writer, "abort", None)
+        if abort is not None:
+            abort(*exc)
+        else:
+            self.writer.__exit__(*exc)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self.abort(*exc)
+
+def csv_field_texts(values):
+    """A column as CSV field text, byte-identical to csv.writer's default dialect"""
+    if hasattr(values, "dtype"):
+        if values.dtype == bool:
+            values = ["True" if v else "False" for v in values.tolist()]
+        else:
+            values = values.astype(str).tolist()
+    elif values and not isinstance(values[0], str):
+        values = [str(v) for v in values]
+
+    # csv quotes fields containing the delimiter, the quote char or line breaks;
+    # checking the joined column first keeps the common no-quoting case cheap
+    joined = "\0".join(values)
+    if any(ch in joined for ch in QUOTED_CHARS):
+        values = [_quote(v) if any(ch in v for ch in QUOTED_CHARS) else v for v in values]
+    return values
+
+def _quote(value):
+    return '"' + value.replace('"', '""') + '"'
+
+def write_manifest(directory, chunks, **options):
+    """Write manifest.json listing every table's chunk files with row counts and checksums.
+
+    ``chunks`` maps table name -> the ``writer.chunks`` entries of its files,
+    in load order. Paths are stored relative to `directory`.
+    """
+    tables = {}
+    for name, entries in chunks.items():
+        if not entries:
+            continue
+        tables[name] = {
+            "rows": sum(entry["rows"] for entry in entries),
+            "chunks": [{**entry, "path": os.path.relpath(entry["path"], directory)} for entry in entries],
+        }
+    manifest_path = os.path.join(directory, MANIFEST)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({**options, "tables": tables}, f, indent=2)
+        f.write("\n")
+    print(f"Saved manifest of {sum(len(t['chunks']) for t in tables.values())} files to {manifest_path}")
+    return manifest_path